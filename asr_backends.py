@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ASR Backends - Pluggable speech recognition engines
+Các engine nhận dạng giọng nói có thể thay thế (Whisper gốc, Whisper int8, faster-whisper)
+
+Every backend loads a model object whose transcribe(audio, **options) returns
+the openai-whisper result structure: {'text', 'segments', 'language'}, where
+each segment has id, start, end, text, avg_logprob, no_speech_prob and
+compression_ratio.
+"""
+
+# Approximate parameter counts, used to make room before a model is loaded
+WHISPER_MODEL_PARAMS = {
+    'tiny': 39_000_000,
+    'base': 74_000_000,
+    'small': 244_000_000,
+    'medium': 769_000_000,
+    'large': 1_550_000_000,
+}
+
+DEFAULT_BACKEND = 'whisper'
+
+
+class ASRBackend:
+    """Base class for speech recognition backends"""
+
+    name = None
+    label = None
+    bytes_per_param = 4
+
+    def is_available(self):
+        """Whether the packages this backend needs are installed"""
+        return True
+
+    def load(self, model_name):
+        """Load a model, returns an object with a whisper-style transcribe()"""
+        raise NotImplementedError
+
+    def estimate_bytes(self, model_name, model=None):
+        """Approximate memory used by a model of this backend"""
+        params = WHISPER_MODEL_PARAMS.get(model_name, WHISPER_MODEL_PARAMS['large'])
+        return int(params * self.bytes_per_param)
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper in full precision (the original engine)"""
+
+    name = 'whisper'
+    label = "Whisper (fp32)"
+
+    def is_available(self):
+        try:
+            import whisper
+            return True
+        except ImportError:
+            return False
+
+    def load(self, model_name):
+        import whisper
+        return whisper.load_model(model_name)
+
+    def estimate_bytes(self, model_name, model=None):
+        if model is not None:
+            try:
+                return sum(p.numel() * p.element_size() for p in model.parameters())
+            except Exception:
+                pass
+        return super().estimate_bytes(model_name)
+
+
+class QuantizedWhisperModel:
+    """Wrap a dynamically quantized Whisper model so transcribe() runs in fp32 on CPU"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, **options):
+        options.setdefault('fp16', False)
+        return self.model.transcribe(audio, **options)
+
+
+def to_plain_linear(module):
+    """Replace Linear subclasses with torch.nn.Linear so quantize_dynamic picks them up"""
+    import torch
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            linear.weight = child.weight
+            linear.bias = child.bias
+            setattr(module, name, linear)
+        else:
+            to_plain_linear(child)
+    return module
+
+
+class WhisperInt8Backend(ASRBackend):
+    """openai-whisper with int8 dynamic quantization of the linear layers (CPU)"""
+
+    name = 'whisper-int8'
+    label = "Whisper int8 (CPU)"
+    # Linear layers hold most weights; embeddings and convolutions stay fp32
+    bytes_per_param = 1.6
+
+    def is_available(self):
+        try:
+            import whisper
+            import torch
+            return hasattr(torch, 'ao') or hasattr(torch, 'quantization')
+        except ImportError:
+            return False
+
+    def load(self, model_name):
+        import torch
+        import whisper
+        model = whisper.load_model(model_name, device='cpu')
+        model = to_plain_linear(model)
+        quantization = torch.ao.quantization if hasattr(torch, 'ao') else torch.quantization
+        model = quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+        return QuantizedWhisperModel(model)
+
+
+class FasterWhisperModel:
+    """Adapt a faster-whisper (CTranslate2) model to the whisper result structure"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, language=None, **options):
+        # Options only understood by openai-whisper are dropped
+        options.pop('fp16', None)
+        options.pop('verbose', None)
+        segments, info = self.model.transcribe(audio, language=language, **options)
+        result_segments = []
+        for i, segment in enumerate(segments):
+            item = {
+                'id': i,
+                'seek': 0,
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+                'tokens': list(segment.tokens),
+                'temperature': segment.temperature,
+                'avg_logprob': segment.avg_logprob,
+                'compression_ratio': segment.compression_ratio,
+                'no_speech_prob': segment.no_speech_prob,
+            }
+            if segment.words:
+                item['words'] = [
+                    {'word': w.word, 'start': w.start, 'end': w.end, 'probability': w.probability}
+                    for w in segment.words
+                ]
+            result_segments.append(item)
+        return {
+            'text': ''.join(s['text'] for s in result_segments),
+            'segments': result_segments,
+            'language': info.language
+        }
+
+
+class FasterWhisperInt8Backend(ASRBackend):
+    """CTranslate2 engine via faster-whisper with int8 weights (CPU)"""
+
+    name = 'faster-whisper-int8'
+    label = "faster-whisper int8 (CPU)"
+    bytes_per_param = 1.1
+
+    def is_available(self):
+        try:
+            import faster_whisper
+            return True
+        except ImportError:
+            return False
+
+    def load(self, model_name):
+        import os
+        from faster_whisper import WhisperModel
+        threads = int(os.environ.get('OMP_NUM_THREADS') or 0)
+        model = WhisperModel(model_name, device='cpu', compute_type='int8', cpu_threads=threads)
+        return FasterWhisperModel(model)
+
+
+ASR_BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperBackend(), WhisperInt8Backend(), FasterWhisperInt8Backend())
+}
+
+
+def get_backend(name):
+    """Look up a backend by name"""
+    try:
+        return ASR_BACKENDS[name or DEFAULT_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unknown ASR backend: {name}. Choose from {', '.join(ASR_BACKENDS)}")
+
+
+def available_backends():
+    """Names of backends whose dependencies are installed"""
+    return [name for name, backend in ASR_BACKENDS.items() if backend.is_available()]
+
+
+def load_asr_model(model_name, backend=DEFAULT_BACKEND):
+    """Load model_name with the given backend"""
+    return get_backend(backend).load(model_name)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+ASR Parallel - Chunked transcription across a process pool
+Chia audio thành các đoạn chồng lấn, nhận dạng song song rồi ghép lại theo thời gian
+"""
+
+import os
+import time
+import difflib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from asr_backends import load_asr_model, DEFAULT_BACKEND
+from asr_worker import ModelCache, DEFAULT_MEMORY_BUDGET_MB
+from audio_processing import SAMPLE_RATE, share_array, attach_array
+
+DEFAULT_CHUNK_SECONDS = 120.0
+DEFAULT_OVERLAP_SECONDS = 5.0
+SEAM_TEXT_SIMILARITY = 0.8
+
+# Per-process state of pool workers
+_worker_cache = None
+
+
+def plan_windows(num_samples, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                 overlap_seconds=DEFAULT_OVERLAP_SECONDS, sample_rate=SAMPLE_RATE):
+    """Split num_samples into overlapping (start, end) sample windows"""
+    chunk = max(1, int(chunk_seconds * sample_rate))
+    overlap = min(int(overlap_seconds * sample_rate), chunk // 2)
+    step = chunk - overlap
+    windows = []
+    start = 0
+    while start < num_samples:
+        end = min(start + chunk, num_samples)
+        windows.append((start, end))
+        if end >= num_samples:
+            break
+        start += step
+    return windows
+
+
+def init_pool_worker(loader, max_memory_mb, threads):
+    """Pool initializer: one model cache per worker, bounded torch threads"""
+    global _worker_cache
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_cache = ModelCache(max_memory_mb, loader=loader)
+
+
+def transcribe_window(descriptor, start, end, model_name, backend, options, sample_rate=SAMPLE_RATE):
+    """Transcribe one window of shared audio, returns segments in global time"""
+    started = time.time()
+    model, _ = _worker_cache.get(model_name, backend)
+    shm, audio = attach_array(descriptor)
+    try:
+        window = audio[start:end]
+        result = model.transcribe(window, **options)
+    finally:
+        del audio, window
+        shm.close()
+
+    offset = start / sample_rate
+    segments = []
+    for segment in result.get('segments', []):
+        segment = dict(segment)
+        segment['start'] = segment['start'] + offset
+        segment['end'] = segment['end'] + offset
+        segments.append(segment)
+    return {
+        'start': offset,
+        'end': end / sample_rate,
+        'segments': segments,
+        'language': result.get('language'),
+        'elapsed': time.time() - started
+    }
+
+
+def similar_text(a, b, threshold=SEAM_TEXT_SIMILARITY):
+    """Whether two segment texts are near-duplicates"""
+    a, b = a.strip(), b.strip()
+    if not a or not b:
+        return False
+    if a in b or b in a:
+        return True
+    return difflib.SequenceMatcher(None, a, b).ratio() >= threshold
+
+
+def stitch_windows(window_results):
+    """Merge per-window segments into one list with de-duplicated seams
+
+    Each pair of neighbouring windows is cut at the middle of their overlap:
+    a segment belongs to the window whose side of the seam holds its midpoint.
+    Near-identical segments that still straddle the seam are dropped.
+    """
+    window_results = sorted(window_results, key=lambda w: w['start'])
+    segments = []
+    for i, window in enumerate(window_results):
+        lower = float('-inf')
+        upper = float('inf')
+        if i > 0:
+            lower = (window['start'] + window_results[i - 1]['end']) / 2
+        if i + 1 < len(window_results):
+            upper = (window_results[i + 1]['start'] + window['end']) / 2
+
+        for segment in window['segments']:
+            midpoint = (segment['start'] + segment['end']) / 2
+            if not lower <= midpoint < upper:
+                continue
+            if segments:
+                previous = segments[-1]
+                overlaps = segment['start'] < previous['end']
+                if overlaps and similar_text(segment['text'], previous['text']):
+                    # Keep the longer reading of a line seen by both windows
+                    if len(segment['text'].strip()) > len(previous['text'].strip()):
+                        segments[-1] = segment
+                    continue
+                if overlaps:
+                    segment['start'] = previous['end']
+            segments.append(segment)
+
+    for i, segment in enumerate(segments):
+        segment['id'] = i
+    return segments
+
+
+class ParallelTranscriber:
+    """Transcribe long audio as overlapping windows on a pool of worker processes
+
+    The decoded audio is placed in shared memory once; workers only receive
+    window offsets. The pool stays alive between jobs so every worker keeps
+    its model loaded.
+    """
+
+    def __init__(self, workers, chunk_seconds=DEFAULT_CHUNK_SECONDS, overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+                 max_memory_mb=DEFAULT_MEMORY_BUDGET_MB, loader=load_asr_model, threads_per_worker=None):
+        self.workers = max(1, int(workers))
+        self.chunk_seconds = float(chunk_seconds)
+        self.overlap_seconds = float(overlap_seconds)
+        self.max_memory_mb = max_memory_mb
+        self.loader = loader
+        if threads_per_worker is None:
+            # Share the thread budget of this process (set by batch workers) between pool workers
+            budget = int(os.environ.get('OMP_NUM_THREADS') or os.cpu_count() or 1)
+            threads_per_worker = max(1, budget // self.workers)
+        self.threads_per_worker = threads_per_worker
+        self.executor = None
+
+    @property
+    def broken(self):
+        """Whether a worker died (e.g. killed while loading a model) and broke the pool"""
+        return self.executor is not None and bool(getattr(self.executor, '_broken', False))
+
+    def start(self):
+        if self.broken:
+            # A broken pool fails every submit; replace it with fresh workers
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context('spawn'),
+                initializer=init_pool_worker,
+                initargs=(self.loader, self.max_memory_mb, self.threads_per_worker)
+            )
+
+    def transcribe(self, audio, model_name, backend=DEFAULT_BACKEND, stop_callback=None, progress_callback=None,
+                   **options):
+        """Transcribe audio, returns a Whisper-style result or None if stopped"""
+        self.start()
+        # Short clips gain nothing from splitting below one window per worker
+        duration = len(audio) / SAMPLE_RATE
+        chunk_seconds = min(self.chunk_seconds, max(duration / self.workers, 30.0) + self.overlap_seconds)
+        windows = plan_windows(len(audio), chunk_seconds, self.overlap_seconds)
+
+        shm, descriptor = share_array(audio)
+        futures = set()
+        try:
+            futures = {
+                self.executor.submit(transcribe_window, descriptor, start, end, model_name, backend, options)
+                for start, end in windows
+            }
+            window_results = []
+            pending = set(futures)
+            while pending:
+                if stop_callback and stop_callback():
+                    for future in pending:
+                        future.cancel()
+                    return None
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window_results.append(future.result())
+                if done and progress_callback:
+                    progress_callback(len(window_results), len(windows))
+        finally:
+            # Windows not started yet are cancelled; running ones still read the block, so they
+            # finish (results discarded) before it is released
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            shm.close()
+            shm.unlink()
+
+        segments = stitch_windows(window_results)
+        languages = [w['language'] for w in window_results if w['language']]
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': languages[0] if languages else options.get('language'),
+            'windows': len(windows),
+            'window_seconds': sum(w['elapsed'] for w in window_results)
+        }
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+_shared_transcriber = None
+
+
+def get_parallel_transcriber(workers, chunk_seconds=DEFAULT_CHUNK_SECONDS, overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+                             max_memory_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Process-wide transcriber, recreated only when its pool settings change"""
+    global _shared_transcriber
+    current = _shared_transcriber
+    if current is not None and (current.workers, current.max_memory_mb) != (int(workers), max_memory_mb):
+        current.shutdown()
+        current = None
+    if current is None:
+        current = ParallelTranscriber(workers, chunk_seconds, overlap_seconds, max_memory_mb)
+    current.chunk_seconds = float(chunk_seconds)
+    current.overlap_seconds = float(overlap_seconds)
+    _shared_transcriber = current
+    return current
+
+
+def shutdown_parallel_transcriber():
+    """Stop the process-wide transcriber pool, if any"""
+    global _shared_transcriber
+    if _shared_transcriber is not None:
+        _shared_transcriber.shutdown()
+        _shared_transcriber = None
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+ASR Worker - Persistent speech recognition process
+Tiến trình nhận dạng giọng nói chạy nền, giữ model Whisper trong bộ nhớ giữa các lần xử lý
+"""
+
+import time
+import queue
+import itertools
+import multiprocessing as mp
+from collections import OrderedDict
+import numpy as np
+
+from asr_backends import get_backend, load_asr_model, DEFAULT_BACKEND
+from audio_processing import share_array, attach_array, is_shared_array
+
+DEFAULT_MEMORY_BUDGET_MB = 4096
+
+
+class ModelCache:
+    """LRU cache of loaded models bounded by a memory budget
+
+    Models are keyed by (backend, model name); loader(model_name, backend)
+    loads a missing one.
+    """
+
+    def __init__(self, max_memory_mb=DEFAULT_MEMORY_BUDGET_MB, loader=load_asr_model):
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.loader = loader
+        self.models = OrderedDict()  # (backend, name) -> (model, size in bytes)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def used_bytes(self):
+        return sum(size for _, size in self.models.values())
+
+    def __contains__(self, key):
+        return key in self.models
+
+    def get(self, model_name, backend=DEFAULT_BACKEND):
+        """Return (model, cache_hit), loading and evicting as needed"""
+        key = (backend, model_name)
+        if key in self.models:
+            self.models.move_to_end(key)
+            self.hits += 1
+            return self.models[key][0], True
+
+        self.misses += 1
+        engine = get_backend(backend)
+        # Free memory before loading so peak usage stays within budget
+        self.evict(engine.estimate_bytes(model_name))
+        model = self.loader(model_name, backend)
+        self.models[key] = (model, engine.estimate_bytes(model_name, model))
+        self.evict(0, keep=key)
+        return model, False
+
+    def evict(self, incoming_bytes, keep=None):
+        """Drop least recently used models until incoming_bytes fits in the budget"""
+        evicted = []
+        while self.models and self.used_bytes + incoming_bytes > self.max_bytes:
+            oldest = next(iter(self.models))
+            if oldest == keep:
+                break
+            del self.models[oldest]
+            evicted.append(oldest)
+        if evicted:
+            try:
+                import gc
+                import torch
+                gc.collect()
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except ImportError:
+                pass
+        return evicted
+
+    def clear(self):
+        self.models.clear()
+
+
+_shared_cache = None
+
+
+def get_shared_cache(max_memory_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Process-wide model cache for in-process transcription"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ModelCache(max_memory_mb)
+    else:
+        _shared_cache.max_bytes = int(max_memory_mb * 1024 * 1024)
+    return _shared_cache
+
+
+def transcribe_job(cache, job):
+    """Run one transcription job against the cache, returns a result dict"""
+    started = time.time()
+    backend = job.get('backend', DEFAULT_BACKEND)
+    result = {'job_id': job['job_id'], 'model': job['model'], 'backend': backend, 'result': None, 'error': None}
+    timing = {'queue_wait': started - job.get('submitted', started)}
+    try:
+        model, cache_hit = cache.get(job['model'], backend)
+        loaded = time.time()
+        timing['model_load'] = loaded - started
+        result['cache_hit'] = cache_hit
+
+        audio = job.get('audio')
+        if audio is not None:
+            options = dict(job.get('options') or {})
+            if is_shared_array(audio):
+                shm, audio = attach_array(audio)
+                try:
+                    result['result'] = model.transcribe(audio, **options)
+                finally:
+                    del audio
+                    shm.close()
+            else:
+                result['result'] = model.transcribe(audio, **options)
+        timing['transcribe'] = time.time() - loaded
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    timing['total'] = time.time() - started
+    result['timing'] = timing
+    result['cached_models'] = list(cache.models)
+    return result
+
+
+def worker_main(job_queue, result_queue, cancel_queue, max_memory_mb):
+    """Worker process loop: take jobs until a None sentinel arrives, skipping cancelled ones"""
+    cache = ModelCache(max_memory_mb)
+    cancelled = set()
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        try:
+            while True:
+                cancelled.add(cancel_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if job['job_id'] in cancelled:
+            cancelled.discard(job['job_id'])
+            # Still answer, so the client frees the job's shared audio
+            result_queue.put({'job_id': job['job_id'], 'result': None, 'error': 'cancelled'})
+            continue
+        result_queue.put(transcribe_job(cache, job))
+    cache.clear()
+
+
+class ASRWorker:
+    """Client handle for a long-lived ASR process
+
+    Jobs are submitted over a queue and results come back with per-job timing.
+    The worker keeps recently used models loaded, so back-to-back jobs with the
+    same model skip the load step entirely.
+    """
+
+    def __init__(self, max_memory_mb=DEFAULT_MEMORY_BUDGET_MB):
+        self.max_memory_mb = max_memory_mb
+        # Spawn so the child does not inherit Tk or torch thread state
+        self.context = mp.get_context('spawn')
+        self.process = None
+        self.job_queue = None
+        self.result_queue = None
+        self.cancel_queue = None
+        self.job_ids = itertools.count(1)
+        self.pending = {}
+        self.discarded = set()  # job ids nobody waits for; their results are dropped on arrival
+        self.shared = {}  # job id -> shared memory holding that job's audio
+
+    def start(self):
+        """Start the worker process if it is not running"""
+        if self.is_alive():
+            return
+        self.job_queue = self.context.Queue()
+        self.result_queue = self.context.Queue()
+        self.cancel_queue = self.context.Queue()
+        self.pending = {}
+        self.discarded = set()
+        self.process = self.context.Process(
+            target=worker_main,
+            args=(self.job_queue, self.result_queue, self.cancel_queue, self.max_memory_mb),
+            daemon=True
+        )
+        self.process.start()
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def submit(self, audio, model_name, backend=DEFAULT_BACKEND, **options):
+        """Queue a transcription job, returns its job id
+
+        audio may be a file path or a float32 array; arrays are handed over
+        through shared memory instead of being pickled into the queue.
+        """
+        self.start()
+        job_id = next(self.job_ids)
+        if isinstance(audio, np.ndarray):
+            shm, audio = share_array(audio)
+            self.shared[job_id] = shm
+        self.job_queue.put({
+            'job_id': job_id,
+            'model': model_name,
+            'backend': backend,
+            'audio': audio,
+            'options': options,
+            'submitted': time.time()
+        })
+        return job_id
+
+    def preload(self, model_name, backend=DEFAULT_BACKEND):
+        """Load a model ahead of time without transcribing anything; nothing waits for the result"""
+        job_id = self.submit(None, model_name, backend)
+        self.discarded.add(job_id)
+        return job_id
+
+    def cancel(self, job_id):
+        """Give up on a job: skipped if the worker has not started it, its result dropped otherwise"""
+        if job_id in self.pending:
+            del self.pending[job_id]
+            return
+        self.discarded.add(job_id)
+        if self.cancel_queue is not None:
+            self.cancel_queue.put(job_id)
+
+    def get_result(self, job_id, timeout=None, stop_callback=None, poll_interval=0.5):
+        """Wait for a job result; returns None on timeout or when stop_callback() is true"""
+        deadline = None if timeout is None else time.time() + timeout
+        while job_id not in self.pending:
+            if stop_callback and stop_callback():
+                self.cancel(job_id)
+                return None
+            if not self.is_alive():
+                raise RuntimeError("ASR worker process exited unexpectedly")
+            wait = poll_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.time())
+                if wait <= 0:
+                    return None
+            try:
+                result = self.result_queue.get(timeout=wait)
+                self.release_shared(result['job_id'])
+                if result['job_id'] in self.discarded:
+                    self.discarded.discard(result['job_id'])
+                else:
+                    self.pending[result['job_id']] = result
+            except queue.Empty:
+                pass
+        return self.pending.pop(job_id)
+
+    def release_shared(self, job_id):
+        """Free the shared audio buffer of a finished job"""
+        shm = self.shared.pop(job_id, None)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    def transcribe(self, audio, model_name, backend=DEFAULT_BACKEND, stop_callback=None, **options):
+        """Submit a job and wait for it, raising on worker errors"""
+        job_id = self.submit(audio, model_name, backend, **options)
+        result = self.get_result(job_id, stop_callback=stop_callback)
+        if result is not None and result['error']:
+            raise RuntimeError(result['error'])
+        return result
+
+    def shutdown(self, timeout=5):
+        """Stop the worker process, discarding queued jobs"""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.job_queue.put(None)
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.process = None
+        for job_id in list(self.shared):
+            self.release_shared(job_id)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+ASS Subtitles - Styled subtitle file for native burn-in
+Tạo file phụ đề ASS cùng kiểu chữ với overlay để ffmpeg/libass vẽ trực tiếp
+
+The style mirrors SubtitleRenderer: font size 2.5% of the frame height
+(at least 14 px), white text with a 1 px black outline, bottom-centred with
+5% side margins and 30 px above the bottom. PlayRes is the video size, so
+every size here is in video pixels. libass reads Fontsize as the font's
+full line height (ascent + descent) where PIL uses the em size, so the
+size is converted with the renderer's font metrics.
+"""
+
+from subtitle_render import load_font
+
+DEFAULT_FONT_NAME = 'Arial'
+
+
+def ass_timestamp(seconds):
+    """H:MM:SS.cc as used by ASS events"""
+    centiseconds = int(round(max(0.0, seconds) * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def ass_font_size(pixel_size):
+    """ASS Fontsize that draws glyphs as large as a PIL font of pixel_size"""
+    try:
+        ascent, descent = load_font(pixel_size).getmetrics()
+    except AttributeError:
+        return pixel_size
+    return max(pixel_size, ascent + descent)
+
+
+def escape_ass_text(text):
+    """Dialogue text with line breaks as \\N and no accidental override tags"""
+    # A backslash starts a tag: an invisible word joiner after it keeps it literal.
+    # libass reads \{ and \} as plain braces instead of an override block
+    text = text.replace('\\', '\\\u2060').replace('{', '\\{').replace('}', '\\}')
+    return '\\N'.join(line.strip() for line in text.splitlines())
+
+
+def build_ass(subtitles, width, height, font_name=DEFAULT_FONT_NAME):
+    """ASS document for subtitles with 'start', 'end' (seconds) and 'text'"""
+    font_size = ass_font_size(max(14, int(height * 0.025)))
+    margin_x = int(width * 0.05)
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Default,{font_name},{font_size},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,"
+        f"0,0,0,0,100,100,0,0,1,1,0,2,{margin_x},{margin_x},30,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for sub in sorted(subtitles, key=lambda s: s['start']):
+        if sub['end'] <= sub['start'] or not sub['text'].strip():
+            continue
+        lines.append(
+            f"Dialogue: 0,{ass_timestamp(sub['start'])},{ass_timestamp(sub['end'])},Default,,0,0,0,,"
+            f"{escape_ass_text(sub['text'])}"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def write_ass(subtitles, output_file, width, height, font_name=DEFAULT_FONT_NAME):
+    """Write subtitles as an ASS file (UTF-8 with BOM, which libass and players expect)"""
+    with open(output_file, 'w', encoding='utf-8-sig') as f:
+        f.write(build_ass(subtitles, width, height, font_name))
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Audio Processing - Decode audio straight from ffmpeg into NumPy
+Giải mã âm thanh trực tiếp từ ffmpeg vào bộ nhớ, không cần file WAV tạm
+"""
+
+import shutil
+import subprocess
+from pathlib import Path
+import numpy as np
+
+# Whisper expects 16 kHz mono float32 PCM
+SAMPLE_RATE = 16000
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_MEMORY_MB = 512
+
+
+def get_ffmpeg_exe():
+    """Find an ffmpeg executable, preferring the one bundled with imageio-ffmpeg"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        pass
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("FFmpeg not found. Install FFmpeg or imageio-ffmpeg")
+    return ffmpeg
+
+
+def load_audio(media_file, sample_rate=SAMPLE_RATE, spill_path=None,
+               max_memory_mb=DEFAULT_MAX_MEMORY_MB, should_stop=None):
+    """Decode the audio track of media_file into a mono float32 array
+
+    PCM is read from an ffmpeg pipe. When spill_path is given and the decoded
+    audio grows past max_memory_mb, the rest is streamed into spill_path and a
+    memory-mapped array is returned instead, so long sources don't have to
+    fit in RAM.
+    """
+    cmd = [
+        get_ffmpeg_exe(), '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-threads', '0', '-i', str(media_file),
+        '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 'f32le', '-'
+    ]
+    max_bytes = int(max_memory_mb * 1024 * 1024)
+    chunks = []
+    buffered = 0
+    spill = None
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            if should_stop and should_stop():
+                process.kill()
+                return None
+            chunk = process.stdout.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            if spill is not None:
+                spill.write(chunk)
+                continue
+            chunks.append(chunk)
+            buffered += len(chunk)
+            if spill_path is not None and buffered > max_bytes:
+                # Too long for memory: move what we have to disk and keep streaming there
+                spill = open(spill_path, 'wb')
+                for buffered_chunk in chunks:
+                    spill.write(buffered_chunk)
+                chunks = []
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode audio: {stderr.decode(errors='ignore').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+        if spill is not None:
+            spill.close()
+
+    if spill is not None:
+        # Copy-on-write map: writable for torch, never written back to disk
+        return np.memmap(spill_path, dtype=np.float32, mode='c')
+
+    data = bytearray(buffered)
+    offset = 0
+    for chunk in chunks:
+        data[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    # Trim a partial trailing sample, frombuffer needs whole float32 values
+    usable = len(data) - (len(data) % 4)
+    return np.frombuffer(data, dtype=np.float32, count=usable // 4)
+
+
+def release_audio(audio, spill_path=None):
+    """Close a memory-mapped audio array and remove its spill file"""
+    mmap = getattr(audio, '_mmap', None)
+    if mmap is not None:
+        try:
+            mmap.close()
+        except (BufferError, ValueError):
+            pass
+    if spill_path is not None:
+        try:
+            Path(spill_path).unlink()
+        except OSError:
+            pass
+
+
+def audio_duration(audio, sample_rate=SAMPLE_RATE):
+    """Duration in seconds of a decoded audio array"""
+    return len(audio) / sample_rate
+
+
+def share_array(array):
+    """Copy an array into shared memory, returns (shm, descriptor)
+
+    The descriptor is small and picklable; pass it to attach_array() in
+    another process. The caller owns shm and must close() and unlink() it.
+    """
+    from multiprocessing import shared_memory
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[:] = array
+    descriptor = {'shm': shm.name, 'shape': array.shape, 'dtype': array.dtype.str}
+    return shm, descriptor
+
+
+def attach_array(descriptor):
+    """Attach to an array created by share_array(), returns (shm, array)"""
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=descriptor['shm'])
+    array = np.ndarray(descriptor['shape'], dtype=np.dtype(descriptor['dtype']), buffer=shm.buf)
+    return shm, array
+
+
+def is_shared_array(value):
+    """Whether value is a descriptor produced by share_array()"""
+    return isinstance(value, dict) and 'shm' in value
+
+
+def frame_features(audio, frame_length, block_frames=65536):
+    """Per-frame RMS energy (dB) and zero-crossing rate, computed block by block"""
+    num_frames = len(audio) // frame_length
+    energy_db = np.empty(num_frames, dtype=np.float32)
+    zcr = np.empty(num_frames, dtype=np.float32)
+    for first in range(0, num_frames, block_frames):
+        last = min(first + block_frames, num_frames)
+        frames = np.asarray(audio[first * frame_length:last * frame_length]).reshape(-1, frame_length)
+        power = np.einsum('ij,ij->i', frames, frames) / frame_length
+        energy_db[first:last] = 10.0 * np.log10(power + 1e-10)
+        signs = np.signbit(frames)
+        zcr[first:last] = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length
+    return energy_db, zcr
+
+
+def close_gaps(mask, max_gap):
+    """Fill runs of False shorter than max_gap frames that sit between True runs"""
+    if max_gap <= 0 or not mask.any():
+        return mask
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    gap_starts = ends[:-1]
+    gap_ends = starts[1:]
+    mask = mask.copy()
+    for gap_start, gap_end in zip(gap_starts, gap_ends):
+        if gap_end - gap_start < max_gap:
+            mask[gap_start:gap_end] = True
+    return mask
+
+
+def local_std(values, window):
+    """Moving standard deviation over window frames (same length as values)"""
+    kernel = np.ones(window) / window
+    mean = np.convolve(values, kernel, mode='same')
+    mean_sq = np.convolve(values.astype(np.float64) ** 2, kernel, mode='same')
+    return np.sqrt(np.maximum(mean_sq - mean ** 2, 0.0))
+
+
+def detect_speech(audio, sample_rate=SAMPLE_RATE, frame_ms=30, margin_db=12.0, min_energy_db=-50.0,
+                  max_zcr=0.35, min_modulation_db=2.0, min_speech_ms=300, min_silence_ms=500, pad_ms=200):
+    """Find speech islands with an energy / zero-crossing voice activity detector
+
+    A frame is voiced when its energy is margin_db above the noise floor (10th
+    percentile of frame energy), its zero-crossing rate is below max_zcr
+    (rejects hiss and broadband noise) and its energy varies by at least
+    min_modulation_db over the surrounding second, as syllables do while
+    sustained music beds don't. Short gaps are bridged, short islands dropped
+    and the rest padded. Returns a list of (start, end) sample offsets.
+    """
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    if len(audio) < frame_length:
+        return [(0, len(audio))] if len(audio) else []
+
+    energy_db, zcr = frame_features(audio, frame_length)
+    noise_floor = float(np.percentile(energy_db, 10))
+    threshold = max(noise_floor + margin_db, min_energy_db)
+    voiced = (energy_db > threshold) & (zcr < max_zcr)
+    if min_modulation_db > 0:
+        window = max(3, int(1000 / frame_ms))
+        voiced &= local_std(energy_db, window) >= min_modulation_db
+
+    voiced = close_gaps(voiced, int(min_silence_ms / frame_ms))
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = (ends - starts) >= int(min_speech_ms / frame_ms)
+    pad = int(pad_ms / frame_ms)
+
+    islands = []
+    for start, end in zip(starts[keep], ends[keep]):
+        start = max(0, start - pad) * frame_length
+        end = min(len(audio), (end + pad) * frame_length)
+        if islands and start <= islands[-1][1]:
+            islands[-1] = (islands[-1][0], end)
+        else:
+            islands.append((start, end))
+    return islands
+
+
+def compact_speech(audio, islands, sample_rate=SAMPLE_RATE):
+    """Concatenate speech islands, returns (compact_audio, time_map)
+
+    time_map rows are (compact_start, original_start, length) in seconds and
+    are used by remap_transcription() to put timestamps back on the original
+    timeline.
+    """
+    if not islands:
+        return np.zeros(0, dtype=np.float32), np.zeros((0, 3))
+    compact = np.concatenate([audio[start:end] for start, end in islands]).astype(np.float32, copy=False)
+    lengths = np.array([end - start for start, end in islands], dtype=np.float64)
+    compact_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    original_starts = np.array([start for start, _ in islands], dtype=np.float64)
+    time_map = np.column_stack((compact_starts, original_starts, lengths)) / sample_rate
+    return compact, time_map
+
+
+def map_times(times, time_map):
+    """Translate compact-audio times to original times"""
+    times = np.asarray(times, dtype=np.float64)
+    if len(time_map) == 0:
+        return times
+    index = np.clip(np.searchsorted(time_map[:, 0], times, side='right') - 1, 0, len(time_map) - 1)
+    offset = np.minimum(times - time_map[index, 0], time_map[index, 2])
+    return time_map[index, 1] + offset
+
+
+def remap_transcription(result, time_map):
+    """Shift segment (and word) timestamps of a Whisper result back to the original timeline"""
+    if result is None or time_map is None or len(time_map) == 0:
+        return result
+    for segment in result.get('segments', []):
+        # An end exactly on an island boundary belongs to the island it closes
+        start, = map_times([segment['start']], time_map)
+        end, = map_times([max(segment['start'], segment['end'] - 1e-3)], time_map)
+        segment['start'] = float(start)
+        segment['end'] = float(end + 1e-3)
+        for word in segment.get('words') or []:
+            word_start, word_end = map_times([word['start'], max(word['start'], word['end'] - 1e-3)], time_map)
+            word['start'] = float(word_start)
+            word['end'] = float(word_end + 1e-3)
+    return result
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark ASR backends - speed and output parity
+So sánh tốc độ và độ khớp kết quả giữa các engine nhận dạng giọng nói
+
+Usage:
+    python benchmarks/benchmark_asr_backends.py sample.mp4 --model base
+    python benchmarks/benchmark_asr_backends.py sample.mp4 --backends whisper whisper-int8 --seconds 120
+"""
+
+import sys
+import time
+import difflib
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asr_backends import ASR_BACKENDS, available_backends, get_backend
+from audio_processing import load_audio, audio_duration, SAMPLE_RATE
+
+
+def boundary_drift(reference, candidate):
+    """Mean distance in seconds from each candidate segment start to the nearest reference start"""
+    ref_starts = [s['start'] for s in reference['segments']]
+    if not ref_starts or not candidate['segments']:
+        return float('nan')
+    drift = [min(abs(s['start'] - r) for r in ref_starts) for s in candidate['segments']]
+    return sum(drift) / len(drift)
+
+
+def run_backend(name, model_name, audio, repeats):
+    """Load once, then transcribe `repeats` times; returns timings and the last result"""
+    backend = get_backend(name)
+    start = time.perf_counter()
+    model = backend.load(model_name)
+    load_time = time.perf_counter() - start
+
+    times = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = model.transcribe(audio, language="zh")
+        times.append(time.perf_counter() - start)
+    return {'load': load_time, 'transcribe': min(times), 'result': result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare ASR backends on one media file")
+    parser.add_argument('media', help="Audio or video file")
+    parser.add_argument('--model', default='base', help="Model size (default: base)")
+    parser.add_argument('--backends', nargs='+', choices=list(ASR_BACKENDS),
+                        help="Backends to compare (default: all installed); the first is the reference")
+    parser.add_argument('--seconds', type=float, help="Only use the first N seconds of audio")
+    parser.add_argument('--repeats', type=int, default=1, help="Timed runs per backend, best is reported")
+    args = parser.parse_args(argv)
+
+    backends = args.backends or available_backends()
+    if not backends:
+        print("❌ No ASR backend is installed")
+        return 1
+
+    audio = load_audio(args.media)
+    if args.seconds:
+        audio = audio[:int(args.seconds * SAMPLE_RATE)]
+    duration = audio_duration(audio)
+    print(f"🎵 {args.media}: {duration:.1f}s of audio, model {args.model}\n")
+
+    runs = {}
+    for name in backends:
+        print(f"⏱️ Running {name}...", flush=True)
+        runs[name] = run_backend(name, args.model, audio, args.repeats)
+
+    reference_name = backends[0]
+    reference = runs[reference_name]['result']
+    print(f"\n{'backend':<22}{'load s':>8}{'asr s':>9}{'x realtime':>12}{'speedup':>9}"
+          f"{'segments':>10}{'text match':>12}{'drift s':>9}")
+    for name in backends:
+        run = runs[name]
+        result = run['result']
+        similarity = difflib.SequenceMatcher(None, reference['text'], result['text']).ratio()
+        print(f"{name:<22}{run['load']:>8.1f}{run['transcribe']:>9.1f}"
+              f"{duration / run['transcribe']:>12.1f}"
+              f"{runs[reference_name]['transcribe'] / run['transcribe']:>9.2f}"
+              f"{len(result['segments']):>10}{similarity:>12.1%}"
+              f"{boundary_drift(reference, result):>9.2f}")
+    print(f"\nReference for parity: {reference_name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark active-subtitle lookup - list scan vs. timeline index
+So sánh tra cứu phụ đề theo frame: quét cả danh sách và timeline đã sắp xếp
+
+Usage:
+    python benchmarks/benchmark_subtitle_timeline.py
+    python benchmarks/benchmark_subtitle_timeline.py --lines 2000 --minutes 120 --fps 30
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from subtitle_render import SubtitleTimeline
+
+
+def make_subtitles(count, duration, overlap, seed):
+    """Sorted synthetic subtitles; overlap is the share also shown next to the previous line"""
+    rng = random.Random(seed)
+    step = duration / count
+    subtitles = []
+    for i in range(count):
+        start = i * step + rng.uniform(0, step * 0.2)
+        end = start + step * rng.uniform(0.5, 0.95)
+        if subtitles and rng.random() < overlap:
+            start = subtitles[-1]['start'] + step * 0.3
+        subtitles.append({'start': start, 'end': end, 'text': f"line {i}"})
+    return subtitles
+
+
+def scan(subtitles, fps, frames):
+    """The renderer's original per-frame lookup"""
+    sets = []
+    for frame in range(frames):
+        current_time = frame / fps
+        sets.append([sub['text'] for sub in subtitles if sub['start'] <= current_time <= sub['end']])
+    return sets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure per-frame active-subtitle lookup")
+    parser.add_argument('--lines', type=int, default=2000, help="Number of subtitles")
+    parser.add_argument('--minutes', type=float, default=120, help="Video length")
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--overlap', type=float, default=0.1, help="Share of lines overlapping the previous one")
+    parser.add_argument('--scan-minutes', type=float, default=5,
+                        help="Only time the list scan on the first N minutes (it is slow)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    duration = args.minutes * 60
+    frames = int(duration * args.fps)
+    subtitles = make_subtitles(args.lines, duration, args.overlap, args.seed)
+    print(f"🎞️ {len(subtitles)} subtitles over {args.minutes:g} min at {args.fps:g} fps = {frames} frames\n")
+
+    start = time.perf_counter()
+    timeline = SubtitleTimeline(subtitles, args.fps)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        timeline.set_at(frame)
+    walk = time.perf_counter() - start
+
+    start = time.perf_counter()
+    set_ids = timeline.set_ids(frames)
+    vectorised = time.perf_counter() - start
+
+    scan_frames = min(frames, int(args.scan_minutes * 60 * args.fps))
+    start = time.perf_counter()
+    expected = scan(subtitles, args.fps, scan_frames)
+    scanned = time.perf_counter() - start
+
+    mismatches = sum(1 for frame in range(scan_frames) if timeline.texts(set_ids[frame]) != expected[frame])
+    per_frame_scan = scanned / scan_frames
+    print(f"{'method':<26}{'total s':>10}{'us/frame':>10}")
+    print(f"{'list scan (projected)':<26}{per_frame_scan * frames:>10.2f}{per_frame_scan * 1e6:>10.2f}")
+    print(f"{'timeline build':<26}{build:>10.3f}")
+    print(f"{'timeline walk':<26}{walk:>10.3f}{walk / frames * 1e6:>10.2f}")
+    print(f"{'timeline set_ids (numpy)':<26}{vectorised:>10.3f}{vectorised / frames * 1e6:>10.2f}")
+    print(f"\nDistinct on-screen sets: {timeline.distinct_sets}, "
+          f"mismatches vs scan on {scan_frames} frames: {mismatches}")
+    return 0 if not mismatches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
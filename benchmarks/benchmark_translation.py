@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark translation throughput - batching, concurrency and retries
+Đo tốc độ dịch theo số request song song, không cần mạng (backend 'local')
+
+Usage:
+    python benchmarks/benchmark_translation.py --texts 2000 --concurrency 1 2 4 8 16
+    python benchmarks/benchmark_translation.py --latency 0.5 --error-rate 0.05 --rate-limit 10
+    python benchmarks/benchmark_translation.py --backend google --texts 100 --concurrency 1 4
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from translation_backends import TRANSLATION_BACKENDS, create_translation_backend
+from translation_scheduler import TranslationScheduler
+
+SAMPLE_WORDS = ['我们', '今天', '晚上', '一起', '吃饭', '你', '知道', '这个', '地方', '吗', '他', '已经',
+                '走了', '别', '担心', '没事', '快点', '来', '看看', '真的']
+
+
+def make_texts(count, repeat_ratio, seed):
+    """Subtitle-like Chinese lines, repeat_ratio of them repeating an earlier line"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        if texts and rng.random() < repeat_ratio:
+            texts.append(rng.choice(texts))
+        else:
+            texts.append(''.join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(3, 12))))
+    return texts
+
+
+def run(args, texts, concurrency):
+    """Translate texts once with a fresh backend, returns (seconds, scheduler stats, untranslated)"""
+    options = {}
+    if args.backend == 'local':
+        options = {'latency': args.latency, 'latency_per_char': args.latency_per_char,
+                   'error_rate': args.error_rate, 'rate_limit': args.rate_limit,
+                   'max_concurrent': args.server_concurrency, 'seed': args.seed}
+    backend = create_translation_backend(args.backend, **options)
+    scheduler = TranslationScheduler.for_backend(
+        backend,
+        concurrency=concurrency,
+        requests_per_second=args.requests_per_second,
+        max_batch_items=args.batch_items or backend.max_batch_items,
+        retries=args.retries,
+        backoff_seconds=args.backoff
+    )
+    start = time.perf_counter()
+    translations, errors = scheduler.translate_all(texts)
+    elapsed = time.perf_counter() - start
+    return elapsed, scheduler.stats, sum(1 for t in translations if t is None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure translation throughput against a backend")
+    parser.add_argument('--backend', default='local', choices=list(TRANSLATION_BACKENDS),
+                        help="Translation backend (default: local, no network)")
+    parser.add_argument('--texts', type=int, default=1000, help="Number of subtitle lines")
+    parser.add_argument('--repeat-ratio', type=float, default=0.3, help="Share of lines repeating an earlier one")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="Concurrent requests to compare")
+    parser.add_argument('--requests-per-second', type=float, default=0.0,
+                        help="Client-side rate limit, 0 = unlimited")
+    parser.add_argument('--batch-items', type=int, help="Texts per request (default: backend hint)")
+    parser.add_argument('--retries', type=int, default=4, help="Retries per failed batch")
+    parser.add_argument('--backoff', type=float, default=0.2, help="First retry delay in seconds")
+    parser.add_argument('--latency', type=float, default=0.2, help="local: seconds per request")
+    parser.add_argument('--latency-per-char', type=float, default=0.0002, help="local: extra seconds per character")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="local: share of requests that fail")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="local: requests per second before 429s")
+    parser.add_argument('--server-concurrency', type=int, default=0,
+                        help="local: requests served at once before 503s")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for texts and simulated failures")
+    args = parser.parse_args(argv)
+
+    texts = make_texts(args.texts, args.repeat_ratio, args.seed)
+    print(f"🌐 {len(texts)} lines ({len(set(texts))} unique) via {args.backend}\n")
+    print(f"{'concurrency':>11}{'seconds':>9}{'lines/s':>9}{'requests':>10}{'retries':>9}{'failed':>8}")
+    for concurrency in args.concurrency:
+        elapsed, stats, untranslated = run(args, texts, concurrency)
+        print(f"{concurrency:>11}{elapsed:>9.2f}{len(texts) / elapsed:>9.0f}{stats['requests']:>10}"
+              f"{stats['retries']:>9}{untranslated:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,38 +4,27 @@ Enhanced Video Subtitle Tool V2 - Improved UI and Functionality
 Công cụ tạo phụ đề video nâng cao với giao diện được cải thiện
 """
 
-import os
 import sys
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext, font
+from tkinter import ttk, filedialog, messagebox, scrolledtext
 import subprocess
 import threading
 import json
 from pathlib import Path
 import time
-import re
-import cv2
-import numpy as np
-from PIL import Image, ImageTk, ImageDraw, ImageFont
 
-def check_dependencies_available():
-    """Check if all dependencies are available"""
-    try:
-        import whisper
-        import moviepy.editor as mp
-        from deep_translator import GoogleTranslator
-        import pysrt
-        import pytesseract
-        return True
-    except ImportError:
-        return False
+from subtitle_pipeline import SubtitlePipeline, check_dependencies_available
+from asr_worker import ASRWorker
+from asr_backends import ASR_BACKENDS, DEFAULT_BACKEND
+from asr_parallel import shutdown_parallel_transcriber
+from ocr_engine import OCR_ENGINES, DEFAULT_PSM
+from ocr_parallel import shutdown_ocr_pool
+from ocr_processing import DEFAULT_PREPROCESS
+from quality_filter import FILTER_MODES
+from video_encoder import OVERLAY_ENGINES
 
 # Try to import dependencies at startup
 try:
-    import whisper
-    import moviepy.editor as mp
-    from deep_translator import GoogleTranslator
-    import pysrt
     import pytesseract
 except ImportError:
     pass
@@ -66,6 +55,9 @@ class EnhancedVideoSubtitleToolV2:
         self.should_stop = False
         self.processing_thread = None
         
+        # Persistent ASR process, keeps Whisper models loaded between runs
+        self.asr_worker = ASRWorker()
+        
         # Settings file for session memory
         self.settings_file = Path.cwd() / "subtitle_tool_settings.json"
         
@@ -77,12 +69,29 @@ class EnhancedVideoSubtitleToolV2:
         
         # Model settings
         self.model_var = tk.StringVar(value="base")
+        self.asr_backend_var = tk.StringVar(value=DEFAULT_BACKEND)
         self.max_length_var = tk.StringVar(value="80")
+        self.asr_workers_var = tk.StringVar(value="1")
+        self.enable_vad = tk.BooleanVar(value=False)
+        self.quality_filter = tk.StringVar(value="drop")
+        self.translation_cache = tk.BooleanVar(value=True)
+        self.target_languages = tk.StringVar(value="vi")
         
         # OCR Settings
         self.enable_ocr = tk.BooleanVar(value=True)
         self.ocr_interval = tk.StringVar(value="2.0")
+        self.ocr_region_mode = tk.StringVar(value="auto")
+        self.ocr_region_band = tk.StringVar(value="80-100")
+        self.ocr_change_threshold = tk.StringVar(value="4.0")
+        self.ocr_text_threshold = tk.StringVar(value="0.005")
+        self.ocr_engine = tk.StringVar(value="auto")
+        self.ocr_psm = tk.StringVar(value=str(DEFAULT_PSM))
+        self.ocr_whitelist = tk.StringVar(value="")
+        self.ocr_workers_var = tk.StringVar(value="1")
+        self.ocr_preprocess = tk.StringVar(value=DEFAULT_PREPROCESS)
+        self.ocr_dedup = tk.BooleanVar(value=True)
         self.overlay_video = tk.BooleanVar(value=False)
+        self.overlay_engine = tk.StringVar(value="auto")
         
         # Export options - removed auto-selection, use saved preferences
         self.export_srt = tk.BooleanVar(value=False)
@@ -115,7 +124,7 @@ class EnhancedVideoSubtitleToolV2:
         self.setup_ui()
         
         # Check dependencies on startup
-        if not check_dependencies_available():
+        if not check_dependencies_available(self.get_pipeline_settings()):
             self.show_install_dependencies()
         
         # Save settings when closing
@@ -130,12 +139,29 @@ class EnhancedVideoSubtitleToolV2:
                 
                 # Load model settings
                 self.model_var.set(settings.get('model', 'base'))
+                self.asr_backend_var.set(settings.get('asr_backend', DEFAULT_BACKEND))
                 self.max_length_var.set(settings.get('max_length', '80'))
+                self.asr_workers_var.set(settings.get('asr_workers', '1'))
+                self.enable_vad.set(settings.get('enable_vad', False))
+                self.quality_filter.set(settings.get('quality_filter', 'drop'))
+                self.translation_cache.set(settings.get('translation_cache', True))
+                self.target_languages.set(settings.get('target_languages', 'vi'))
                 
                 # Load OCR settings
                 self.enable_ocr.set(settings.get('enable_ocr', True))
                 self.ocr_interval.set(settings.get('ocr_interval', '2.0'))
+                self.ocr_region_mode.set(settings.get('ocr_region_mode', 'auto'))
+                self.ocr_region_band.set(settings.get('ocr_region_band', '80-100'))
+                self.ocr_change_threshold.set(settings.get('ocr_change_threshold', '4.0'))
+                self.ocr_text_threshold.set(settings.get('ocr_text_threshold', '0.005'))
+                self.ocr_engine.set(settings.get('ocr_engine', 'auto'))
+                self.ocr_psm.set(settings.get('ocr_psm', str(DEFAULT_PSM)))
+                self.ocr_whitelist.set(settings.get('ocr_whitelist', ''))
+                self.ocr_workers_var.set(settings.get('ocr_workers', '1'))
+                self.ocr_preprocess.set(settings.get('ocr_preprocess', DEFAULT_PREPROCESS))
+                self.ocr_dedup.set(settings.get('ocr_dedup', True))
                 self.overlay_video.set(settings.get('overlay_video', False))
+                self.overlay_engine.set(settings.get('overlay_engine', 'auto'))
                 
                 # Load export options
                 self.export_srt.set(settings.get('export_srt', True))
@@ -153,18 +179,7 @@ class EnhancedVideoSubtitleToolV2:
     def save_settings(self):
         """Save current settings to file"""
         try:
-            settings = {
-                'model': self.model_var.get(),
-                'max_length': self.max_length_var.get(),
-                'enable_ocr': self.enable_ocr.get(),
-                'ocr_interval': self.ocr_interval.get(),
-                'overlay_video': self.overlay_video.get(),
-                'export_srt': self.export_srt.get(),
-                'export_transcript': self.export_transcript.get(),
-                'export_ocr_only': self.export_ocr_only.get(),
-                'auto_output_folder': self.auto_output_folder.get(),
-                'output_folder': self.output_folder.get()
-            }
+            settings = self.get_pipeline_settings()
             
             with open(self.settings_file, 'w', encoding='utf-8') as f:
                 json.dump(settings, f, indent=2, ensure_ascii=False)
@@ -178,12 +193,18 @@ class EnhancedVideoSubtitleToolV2:
         if self.is_processing:
             if messagebox.askyesno("Confirm Exit", "Processing is in progress. Do you want to stop and exit?"):
                 self.stop_processing()
+                self.asr_worker.shutdown(timeout=0)
+                shutdown_parallel_transcriber()
+                shutdown_ocr_pool()
                 # Wait a moment for cleanup
                 self.root.after(500, self.root.destroy)
             return
         
         # Save settings and exit
         self.save_settings()
+        self.asr_worker.shutdown()
+        shutdown_parallel_transcriber()
+        shutdown_ocr_pool()
         self.root.destroy()
 
     def setup_ui(self):
@@ -386,6 +407,7 @@ class EnhancedVideoSubtitleToolV2:
             width=15
         )
         model_combo.pack(side='left', padx=(10, 0))
+        model_combo.bind('<<ComboboxSelected>>', lambda event: self.preload_model())
         
         tk.Label(model_row, text="Max Line Length:", bg=self.card_color, fg=self.text_color).pack(side='left', padx=(20, 0))
         
@@ -401,6 +423,124 @@ class EnhancedVideoSubtitleToolV2:
         )
         length_spin.pack(side='left', padx=(10, 0))
         
+        engine_row = tk.Frame(model_tab, bg=self.card_color)
+        engine_row.pack(fill='x', padx=10, pady=(0, 10))
+        
+        tk.Label(engine_row, text="ASR Engine:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        engine_combo = ttk.Combobox(
+            engine_row,
+            textvariable=self.asr_backend_var,
+            values=list(ASR_BACKENDS),
+            state="readonly",
+            width=22
+        )
+        engine_combo.pack(side='left', padx=(10, 0))
+        engine_combo.bind('<<ComboboxSelected>>', lambda event: self.preload_model())
+        
+        tk.Label(
+            engine_row,
+            text="(int8 engines are faster on CPU-only machines)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
+        parallel_row = tk.Frame(model_tab, bg=self.card_color)
+        parallel_row.pack(fill='x', padx=10, pady=(0, 10))
+        
+        tk.Label(parallel_row, text="Parallel ASR Workers:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        workers_spin = tk.Spinbox(
+            parallel_row,
+            textvariable=self.asr_workers_var,
+            from_=1,
+            to=32,
+            width=8,
+            bg='#404040',
+            fg='white',
+            insertbackground='white'
+        )
+        workers_spin.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            parallel_row,
+            text="(1 = off; splits long audio into chunks transcribed in parallel)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
+        vad_check = tk.Checkbutton(
+            model_tab,
+            text="Skip silence and music before transcription (VAD)",
+            variable=self.enable_vad,
+            bg=self.card_color,
+            fg=self.text_color,
+            selectcolor='#404040',
+            activebackground=self.card_color,
+            activeforeground=self.text_color
+        )
+        vad_check.pack(anchor='w', padx=10, pady=(0, 10))
+        
+        quality_row = tk.Frame(model_tab, bg=self.card_color)
+        quality_row.pack(fill='x', padx=10, pady=(0, 10))
+        
+        tk.Label(quality_row, text="Low-confidence items:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        quality_combo = ttk.Combobox(
+            quality_row,
+            textvariable=self.quality_filter,
+            values=list(FILTER_MODES),
+            state="readonly",
+            width=8
+        )
+        quality_combo.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            quality_row,
+            text="(drop = skip translation, flag = mark with (?) in the transcript)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
+        cache_check = tk.Checkbutton(
+            model_tab,
+            text="Reuse cached translations (translation_cache.sqlite3)",
+            variable=self.translation_cache,
+            bg=self.card_color,
+            fg=self.text_color,
+            selectcolor='#404040',
+            activebackground=self.card_color,
+            activeforeground=self.text_color
+        )
+        cache_check.pack(anchor='w', padx=10, pady=(0, 10))
+        
+        languages_row = tk.Frame(model_tab, bg=self.card_color)
+        languages_row.pack(fill='x', padx=10, pady=(0, 10))
+        
+        tk.Label(languages_row, text="Target Languages:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        languages_entry = tk.Entry(
+            languages_row,
+            textvariable=self.target_languages,
+            bg='#404040',
+            fg='white',
+            insertbackground='white',
+            relief='flat',
+            width=16
+        )
+        languages_entry.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            languages_row,
+            text="(e.g. vi,en,th - audio and OCR are processed once for all languages)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
         # OCR Tab
         ocr_tab = tk.Frame(notebook, bg=self.card_color)
         notebook.add(ocr_tab, text="👁️ OCR Settings")
@@ -438,6 +578,186 @@ class EnhancedVideoSubtitleToolV2:
         )
         interval_spin.pack(side='left', padx=(10, 0))
         
+        tk.Label(interval_row, text="Change Threshold:", bg=self.card_color, fg=self.text_color).pack(side='left', padx=(20, 0))
+        
+        change_spin = tk.Spinbox(
+            interval_row,
+            textvariable=self.ocr_change_threshold,
+            from_=0.0,
+            to=30.0,
+            increment=1.0,
+            width=6,
+            bg='#404040',
+            fg='white',
+            insertbackground='white'
+        )
+        change_spin.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            interval_row,
+            text="(reuse OCR text while the region is unchanged, 0 = off)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
+        gate_row = tk.Frame(ocr_content, bg=self.card_color)
+        gate_row.pack(fill='x', pady=(10, 0))
+        
+        tk.Label(gate_row, text="Text Gate Threshold:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        gate_spin = tk.Spinbox(
+            gate_row,
+            textvariable=self.ocr_text_threshold,
+            from_=0.0,
+            to=0.1,
+            increment=0.005,
+            width=8,
+            bg='#404040',
+            fg='white',
+            insertbackground='white'
+        )
+        gate_spin.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            gate_row,
+            text="(skip OCR on frames without text-like shapes, 0 = off)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
+        engine_row = tk.Frame(ocr_content, bg=self.card_color)
+        engine_row.pack(fill='x', pady=(10, 0))
+        
+        tk.Label(engine_row, text="OCR Engine:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        engine_combo = ttk.Combobox(
+            engine_row,
+            textvariable=self.ocr_engine,
+            values=list(OCR_ENGINES),
+            state="readonly",
+            width=12
+        )
+        engine_combo.pack(side='left', padx=(10, 0))
+        
+        tk.Label(engine_row, text="PSM:", bg=self.card_color, fg=self.text_color).pack(side='left', padx=(20, 0))
+        
+        psm_combo = ttk.Combobox(
+            engine_row,
+            textvariable=self.ocr_psm,
+            values=["3", "6", "7", "11"],
+            width=4
+        )
+        psm_combo.pack(side='left', padx=(10, 0))
+        
+        tk.Label(engine_row, text="Whitelist:", bg=self.card_color, fg=self.text_color).pack(side='left', padx=(20, 0))
+        
+        whitelist_entry = tk.Entry(
+            engine_row,
+            textvariable=self.ocr_whitelist,
+            bg='#404040',
+            fg='white',
+            insertbackground='white',
+            relief='flat',
+            width=16
+        )
+        whitelist_entry.pack(side='left', padx=(10, 0))
+        
+        ocr_workers_row = tk.Frame(ocr_content, bg=self.card_color)
+        ocr_workers_row.pack(fill='x', pady=(10, 0))
+        
+        tk.Label(ocr_workers_row, text="OCR Workers:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        ocr_workers_spin = tk.Spinbox(
+            ocr_workers_row,
+            textvariable=self.ocr_workers_var,
+            from_=1,
+            to=32,
+            width=8,
+            bg='#404040',
+            fg='white',
+            insertbackground='white'
+        )
+        ocr_workers_spin.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            ocr_workers_row,
+            text="(1 = in-process; more runs Tesseract on several processes)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
+        preprocess_row = tk.Frame(ocr_content, bg=self.card_color)
+        preprocess_row.pack(fill='x', pady=(10, 0))
+        
+        tk.Label(preprocess_row, text="Preprocessing:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        preprocess_entry = tk.Entry(
+            preprocess_row,
+            textvariable=self.ocr_preprocess,
+            bg='#404040',
+            fg='white',
+            insertbackground='white',
+            relief='flat',
+            width=32
+        )
+        preprocess_entry.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            preprocess_row,
+            text="(colorkey/normalize, adaptive, outline, scale; empty = off)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
+        dedup_check = tk.Checkbutton(
+            ocr_content,
+            text="Skip OCR lines that repeat the audio (burned-in subtitles)",
+            variable=self.ocr_dedup,
+            bg=self.card_color,
+            fg=self.text_color,
+            selectcolor='#404040',
+            activebackground=self.card_color,
+            activeforeground=self.text_color
+        )
+        dedup_check.pack(anchor='w', pady=(10, 0))
+        
+        region_row = tk.Frame(ocr_content, bg=self.card_color)
+        region_row.pack(fill='x', pady=(10, 0))
+        
+        tk.Label(region_row, text="Subtitle Region:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        region_combo = ttk.Combobox(
+            region_row,
+            textvariable=self.ocr_region_mode,
+            values=["auto", "full", "manual"],
+            state="readonly",
+            width=10
+        )
+        region_combo.pack(side='left', padx=(10, 0))
+        
+        band_entry = tk.Entry(
+            region_row,
+            textvariable=self.ocr_region_band,
+            bg='#404040',
+            fg='white',
+            insertbackground='white',
+            relief='flat',
+            width=10
+        )
+        band_entry.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            region_row,
+            text="(manual: top-bottom % of height, e.g. 80-100)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
         # Export Tab
         export_tab = tk.Frame(notebook, bg=self.card_color)
         notebook.add(export_tab, text="📤 Export Options")
@@ -477,6 +797,28 @@ class EnhancedVideoSubtitleToolV2:
         )
         overlay_check.pack(anchor='w', pady=2)
         
+        overlay_engine_row = tk.Frame(export_content, bg=self.card_color)
+        overlay_engine_row.pack(fill='x', pady=(5, 0))
+        
+        tk.Label(overlay_engine_row, text="Overlay Engine:", bg=self.card_color, fg=self.text_color).pack(side='left')
+        
+        overlay_engine_combo = ttk.Combobox(
+            overlay_engine_row,
+            textvariable=self.overlay_engine,
+            values=list(OVERLAY_ENGINES),
+            state="readonly",
+            width=10
+        )
+        overlay_engine_combo.pack(side='left', padx=(10, 0))
+        
+        tk.Label(
+            overlay_engine_row,
+            text="(ffmpeg = native libass burn-in, python = custom renderer)",
+            bg=self.card_color,
+            fg='#888888',
+            font=('Segoe UI', 8)
+        ).pack(side='left', padx=(10, 0))
+        
         # Info label
         info_label = tk.Label(
             export_content,
@@ -731,6 +1073,13 @@ class EnhancedVideoSubtitleToolV2:
         )
         clear_btn.pack(side='left')
     
+    def preload_model(self):
+        """Start loading the selected model in the ASR process while the user sets up the job"""
+        # The chunked pool loads its own copies, only the single ASR process benefits
+        if self.asr_workers_var.get().strip() not in ('', '1'):
+            return
+        self.asr_worker.preload(self.model_var.get(), self.asr_backend_var.get())
+    
     def browse_video(self):
         """Browse for video file"""
         file_path = filedialog.askopenfilename(
@@ -787,7 +1136,7 @@ class EnhancedVideoSubtitleToolV2:
             messagebox.showerror("Error", "Please select at least one export option!")
             return
         
-        if not check_dependencies_available():
+        if not check_dependencies_available(self.get_pipeline_settings()):
             self.show_install_dependencies()
             return
         
@@ -820,125 +1169,54 @@ class EnhancedVideoSubtitleToolV2:
             
             # The processing thread will handle cleanup and reset UI
     
+    def get_pipeline_settings(self):
+        """Collect current UI settings as a plain dict for the pipeline"""
+        return {
+            'model': self.model_var.get(),
+            'asr_backend': self.asr_backend_var.get(),
+            'max_length': self.max_length_var.get(),
+            'asr_workers': self.asr_workers_var.get(),
+            'enable_vad': self.enable_vad.get(),
+            'quality_filter': self.quality_filter.get(),
+            'translation_cache': self.translation_cache.get(),
+            'target_languages': self.target_languages.get(),
+            'enable_ocr': self.enable_ocr.get(),
+            'ocr_interval': self.ocr_interval.get(),
+            'ocr_region_mode': self.ocr_region_mode.get(),
+            'ocr_region_band': self.ocr_region_band.get(),
+            'ocr_change_threshold': self.ocr_change_threshold.get(),
+            'ocr_text_threshold': self.ocr_text_threshold.get(),
+            'ocr_engine': self.ocr_engine.get(),
+            'ocr_psm': self.ocr_psm.get(),
+            'ocr_whitelist': self.ocr_whitelist.get(),
+            'ocr_workers': self.ocr_workers_var.get(),
+            'ocr_preprocess': self.ocr_preprocess.get(),
+            'ocr_dedup': self.ocr_dedup.get(),
+            'overlay_video': self.overlay_video.get(),
+            'overlay_engine': self.overlay_engine.get(),
+            'export_srt': self.export_srt.get(),
+            'export_transcript': self.export_transcript.get(),
+            'export_ocr_only': self.export_ocr_only.get(),
+            'auto_output_folder': self.auto_output_folder.get(),
+            'output_folder': self.output_folder.get()
+        }
+    
     def process_video(self):
         """Process the video file with stop functionality"""
-        audio_file = None
         try:
-            video_file = self.video_path.get()
-            output_dir = Path(self.output_folder.get())
-            
-            # Use custom filename if provided, otherwise use video filename
-            if self.output_filename.get().strip():
-                video_name = self.output_filename.get().strip()
-                self.log_message(f"📝 Using custom filename: {video_name}")
-            else:
-                video_name = Path(video_file).stem
-                self.log_message(f"📝 Using auto filename: {video_name}")
-            
-            self.log_message("🎬 Starting enhanced video processing...")
-            
-            # Step 1: Extract audio
-            if self.should_stop:
-                return
-            self.update_status("Extracting audio from video...", 10)
-            audio_file = output_dir / f"{video_name}_audio.wav"
-            self.extract_audio(video_file, str(audio_file))
-            
-            # Step 2: Transcribe audio
-            if self.should_stop:
-                return
-            self.update_status("Transcribing Chinese audio...", 25)
-            model = whisper.load_model(self.model_var.get())
-            result = model.transcribe(str(audio_file), language="zh")
-            
-            # Step 3: OCR processing (if enabled)
-            if self.should_stop:
-                return
-            ocr_results = []
-            if self.enable_ocr.get():
-                self.update_status("Processing OCR from video frames...", 45)
-                ocr_results = self.extract_ocr_from_video(video_file)
-                if self.should_stop:
-                    return
-            
-            # Step 4: Translate content
-            if self.should_stop:
-                return
-            self.update_status("Translating to Vietnamese...", 65)
-            translator = GoogleTranslator(source='zh-CN', target='vi')
-            
-            # Process audio subtitles
-            audio_subtitles = self.create_subtitles_from_audio(result, translator)
-            if self.should_stop:
-                return
-            
-            # Process OCR subtitles
-            ocr_subtitles = []
-            if ocr_results:
-                ocr_subtitles = self.create_subtitles_from_ocr(ocr_results, translator)
-                if self.should_stop:
-                    return
-            
-            # Step 5: Export files
-            if self.should_stop:
-                return
-            self.update_status("Saving output files...", 85)
-            
-            if self.export_srt.get():
-                if self.should_stop:
-                    return
-                # Save combined SRT
-                combined_subtitles = self.merge_subtitles(audio_subtitles, ocr_subtitles)
-                srt_file = output_dir / f"{video_name}_enhanced_vietnamese.srt"
-                self.save_subtitles(combined_subtitles, str(srt_file))
-                self.log_message(f"✅ SRT file saved: {srt_file}")
-            
-            if self.export_transcript.get():
-                if self.should_stop:
-                    return
-                # Save transcript
-                transcript_file = output_dir / f"{video_name}_transcript.txt"
-                self.save_transcript(audio_subtitles, ocr_subtitles, str(transcript_file))
-                self.log_message(f"✅ Transcript saved: {transcript_file}")
-            
-            if self.export_ocr_only.get() and ocr_results:
-                if self.should_stop:
-                    return
-                # Save OCR only
-                ocr_file = output_dir / f"{video_name}_ocr_only.txt"
-                self.save_ocr_text(ocr_subtitles, str(ocr_file))
-                self.log_message(f"✅ OCR text saved: {ocr_file}")
-            
-            # Create video with burnt-in subtitles if requested
-            if self.overlay_video.get():
-                if self.should_stop:
-                    return
-                self.update_status("Creating video with burnt-in subtitles...", 90)
-                combined_subtitles = self.merge_subtitles(audio_subtitles, ocr_subtitles)
-                output_video = output_dir / f"{video_name}_with_subtitles.mp4"
-                self.create_video_with_subtitles(video_file, combined_subtitles, str(output_video))
-                if self.should_stop:
-                    return
-                self.log_message(f"✅ Video with subtitles saved: {output_video}")
-            
-            if not self.should_stop:
-                self.update_status("✅ Processing complete!", 100)
-                self.log_message("🎉 Enhanced subtitle generation completed successfully!")
-            
-        except Exception as e:
-            if not self.should_stop:
-                self.log_message(f"❌ Error: {e}")
-                self.update_status("❌ Processing failed", 0)
+            pipeline = SubtitlePipeline(
+                self.get_pipeline_settings(),
+                log_callback=self.log_message,
+                status_callback=self.update_status,
+                stop_callback=lambda: self.should_stop,
+                asr_worker=self.asr_worker
+            )
+            pipeline.run(
+                self.video_path.get(),
+                output_dir=self.output_folder.get(),
+                video_name=self.output_filename.get().strip() or None
+            )
         finally:
-            # Clean up
-            if audio_file and audio_file.exists():
-                try:
-                    audio_file.unlink()
-                    if not self.should_stop:
-                        self.log_message("🗑️ Temporary audio file cleaned up")
-                except:
-                    pass
-            
             # Handle stop case
             if self.should_stop:
                 self.log_message("🛑 Processing stopped by user")
@@ -950,420 +1228,13 @@ class EnhancedVideoSubtitleToolV2:
             self.process_btn.config(state='normal', text="🚀 Generate Enhanced Subtitles")
             self.stop_btn.config(state='disabled', text="⏹️ Stop Processing")
     
-    def extract_audio(self, video_file, audio_file):
-        """Extract audio from video"""
-        self.log_message("🎵 Extracting audio...")
-        video = mp.VideoFileClip(video_file)
-        audio = video.audio
-        audio.write_audiofile(audio_file, verbose=False, logger=None)
-        video.close()
-        audio.close()
-        self.log_message("✅ Audio extracted successfully")
-    
-    def extract_ocr_from_video(self, video_file):
-        """Extract text from video frames using OCR"""
-        self.log_message("👁️ Starting OCR processing...")
-        ocr_results = []
-        interval = float(self.ocr_interval.get())
-        
-        try:
-            cap = cv2.VideoCapture(video_file)
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / fps
-            
-            frame_interval = int(fps * interval)
-            frame_count = 0
-            processed_frames = 0
-            
-            while True:
-                if self.should_stop:
-                    break
-                    
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_count % frame_interval == 0:
-                    if self.should_stop:
-                        break
-                        
-                    timestamp = frame_count / fps
-                    
-                    # Convert frame to PIL Image
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    pil_image = Image.fromarray(frame_rgb)
-                    
-                    # Extract text using OCR
-                    try:
-                        text = pytesseract.image_to_string(pil_image, lang='chi_sim')
-                        text = text.strip()
-                        
-                        if text and len(text) > 2:  # Only keep meaningful text
-                            ocr_results.append({
-                                'timestamp': timestamp,
-                                'text': text
-                            })
-                            self.log_message(f"OCR at {timestamp:.1f}s: {text[:50]}...")
-                    
-                    except Exception as e:
-                        self.log_message(f"⚠️ OCR error at {timestamp:.1f}s: {e}")
-                    
-                    processed_frames += 1
-                    # Update progress
-                    progress = 45 + (processed_frames * 20 / (duration / interval))
-                    self.update_status(f"OCR processing... {processed_frames} frames", min(progress, 64))
-                
-                frame_count += 1
-            
-            cap.release()
-            
-            if not self.should_stop:
-                self.log_message(f"✅ OCR completed. Found {len(ocr_results)} text segments")
-            else:
-                self.log_message(f"🛑 OCR stopped. Processed {len(ocr_results)} text segments")
-            
-        except Exception as e:
-            self.log_message(f"❌ OCR processing failed: {e}")
-        
-        return ocr_results
-    
-    def create_subtitles_from_audio(self, transcription_result, translator):
-        """Create subtitles from audio transcription"""
-        subtitles = []
-        max_length = int(self.max_length_var.get())
-        
-        for i, segment in enumerate(transcription_result['segments']):
-            if self.should_stop:
-                break
-                
-            chinese_text = segment['text'].strip()
-            if not chinese_text:
-                continue
-            
-            self.log_message(f"Translating audio segment {i+1}/{len(transcription_result['segments'])}")
-            
-            try:
-                vietnamese_text = translator.translate(chinese_text)
-                
-                # Break long lines
-                if len(vietnamese_text) > max_length:
-                    vietnamese_text = self.break_long_lines(vietnamese_text, max_length)
-                
-                subtitle = {
-                    'start': segment['start'],
-                    'end': segment['end'],
-                    'text': vietnamese_text,
-                    'source': 'audio'
-                }
-                subtitles.append(subtitle)
-                
-                self.log_message(f"Audio CN: {chinese_text}")
-                self.log_message(f"Audio VI: {vietnamese_text}")
-                
-            except Exception as e:
-                self.log_message(f"⚠️ Translation error for audio segment {i+1}: {e}")
-                subtitles.append({
-                    'start': segment['start'],
-                    'end': segment['end'],
-                    'text': chinese_text,
-                    'source': 'audio'
-                })
-        
-        return subtitles
-    
-    def create_subtitles_from_ocr(self, ocr_results, translator):
-        """Create subtitles from OCR results"""
-        subtitles = []
-        
-        for i, ocr_item in enumerate(ocr_results):
-            if self.should_stop:
-                break
-                
-            chinese_text = ocr_item['text']
-            timestamp = ocr_item['timestamp']
-            
-            try:
-                vietnamese_text = translator.translate(chinese_text)
-                
-                subtitles.append({
-                    'start': timestamp,
-                    'end': timestamp + 2.0,  # Default 2 second duration
-                    'text': vietnamese_text,
-                    'source': 'ocr'
-                })
-                
-                self.log_message(f"OCR CN: {chinese_text}")
-                self.log_message(f"OCR VI: {vietnamese_text}")
-                
-            except Exception as e:
-                self.log_message(f"⚠️ Translation error for OCR {i+1}: {e}")
-        
-        return subtitles
-    
-    def merge_subtitles(self, audio_subs, ocr_subs):
-        """Merge audio and OCR subtitles"""
-        # Simple merge - you could implement more sophisticated logic
-        all_subs = audio_subs + ocr_subs
-        # Sort by start time
-        all_subs.sort(key=lambda x: x['start'])
-        return all_subs
-    
-    def break_long_lines(self, text, max_length):
-        """Break long lines into multiple lines"""
-        if len(text) <= max_length:
-            return text
-        
-        words = text.split()
-        lines = []
-        current_line = []
-        current_length = 0
-        
-        for word in words:
-            if current_length + len(word) + 1 <= max_length:
-                current_line.append(word)
-                current_length += len(word) + 1
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-                current_length = len(word)
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return '\n'.join(lines)
-    
-    def save_subtitles(self, subtitles, output_file):
-        """Save subtitles to SRT file"""
-        subs = pysrt.SubRipFile()
-        
-        for i, subtitle in enumerate(subtitles):
-            start_time = pysrt.SubRipTime(seconds=subtitle['start'])
-            end_time = pysrt.SubRipTime(seconds=subtitle['end'])
-            
-            sub = pysrt.SubRipItem(
-                index=i+1,
-                start=start_time,
-                end=end_time,
-                text=subtitle['text']
-            )
-            subs.append(sub)
-        
-        subs.save(output_file, encoding='utf-8')
-    
-    def save_transcript(self, audio_subs, ocr_subs, output_file):
-        """Save combined transcript"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=== ENHANCED VIDEO TRANSCRIPT ===\n\n")
-            
-            if audio_subs:
-                f.write("--- AUDIO TRANSCRIPTION ---\n")
-                for sub in audio_subs:
-                    f.write(f"[{sub['start']:.1f}s - {sub['end']:.1f}s] {sub['text']}\n")
-                f.write("\n")
-            
-            if ocr_subs:
-                f.write("--- OCR TEXT ---\n")
-                for sub in ocr_subs:
-                    f.write(f"[{sub['start']:.1f}s] {sub['text']}\n")
-    
-    def save_ocr_text(self, ocr_subs, output_file):
-        """Save OCR-only text"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=== OCR EXTRACTED TEXT ===\n\n")
-            for sub in ocr_subs:
-                f.write(f"[{sub['start']:.1f}s] {sub['text']}\n")
-    
-    def create_video_with_subtitles(self, video_file, subtitles, output_file):
-        """Create video with burnt-in subtitles using OpenCV"""
-        try:
-            self.log_message("🎬 Creating video with burnt-in subtitles...")
-            
-            # Open input video
-            cap = cv2.VideoCapture(video_file)
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # Setup video writer
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_file, fourcc, fps, (width, height))
-            
-            frame_count = 0
-            
-            while True:
-                if self.should_stop:
-                    break
-                    
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                current_time = frame_count / fps
-                
-                # Find active subtitles at current time
-                active_subtitles = []
-                for sub in subtitles:
-                    if sub['start'] <= current_time <= sub['end']:
-                        active_subtitles.append(sub['text'])
-                
-                # Add subtitles to frame
-                if active_subtitles:
-                    frame = self.add_subtitles_to_frame(frame, active_subtitles, width, height)
-                
-                # Write frame
-                out.write(frame)
-                frame_count += 1
-                
-                # Update progress occasionally
-                if frame_count % int(fps * 2) == 0:  # Every 2 seconds
-                    progress = 90 + (frame_count / total_frames) * 9
-                    self.update_status(f"Processing video frame {frame_count}/{total_frames}", progress)
-            
-            # Release resources
-            cap.release()
-            out.release()
-            
-            # Use moviepy to add audio back
-            self.log_message("🔊 Adding audio to video...")
-            video_clip = mp.VideoFileClip(output_file)
-            audio_clip = mp.VideoFileClip(video_file).audio
-            final_clip = video_clip.set_audio(audio_clip)
-            
-            # Save final video with audio
-            temp_output = output_file.replace('.mp4', '_temp.mp4')
-            final_clip.write_videofile(temp_output, verbose=False, logger=None)
-            
-            # Replace original with final
-            import shutil
-            shutil.move(temp_output, output_file)
-            
-            # Cleanup
-            video_clip.close()
-            audio_clip.close()
-            final_clip.close()
-            
-            self.log_message("✅ Video with subtitles created successfully!")
-            
-        except Exception as e:
-            self.log_message(f"❌ Video creation failed: {e}")
-            raise e
-    
-    def add_subtitles_to_frame(self, frame, subtitles, width, height):
-        """Add subtitle text to a video frame with auto word wrap"""
-        try:
-            # Convert frame to PIL Image for better text rendering
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(frame_rgb)
-            draw = ImageDraw.Draw(pil_image)
-            
-            # Font settings - smaller font size
-            font_size = max(14, int(height * 0.025))  # Reduced from 0.04 to 0.025 for smaller text
-            try:
-                # Try to use a nice font
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except:
-                try:
-                    # Try other common fonts
-                    font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", font_size)
-                except:
-                    # Fallback to default font
-                    font = ImageFont.load_default()
-            
-            # Calculate usable width (with margins)
-            margin_x = int(width * 0.05)  # 5% margin on each side
-            margin_y = 30
-            usable_width = width - (2 * margin_x)
-            
-            # Process all subtitles with word wrap
-            all_lines = []
-            for subtitle in subtitles:
-                wrapped_lines = self.wrap_text(subtitle, font, usable_width, draw)
-                all_lines.extend(wrapped_lines)
-            
-            # Position settings
-            line_height = font_size + 8
-            total_text_height = len(all_lines) * line_height
-            y_start = height - margin_y - total_text_height
-            
-            # Ensure subtitles don't go off-screen at top
-            if y_start < margin_y:
-                y_start = margin_y
-            
-            # Draw each line
-            for i, line in enumerate(all_lines):
-                y_pos = y_start + (i * line_height)
-                
-                # Get text size for centering
-                bbox = draw.textbbox((0, 0), line, font=font)
-                text_width = bbox[2] - bbox[0]
-                x_pos = (width - text_width) // 2
-                
-                # Ensure text doesn't go off-screen horizontally
-                if x_pos < margin_x:
-                    x_pos = margin_x
-                elif x_pos + text_width > width - margin_x:
-                    x_pos = width - margin_x - text_width
-                
-                # Draw text outline (black) - thinner outline
-                outline_width = 1
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        if dx != 0 or dy != 0:
-                            draw.text((x_pos + dx, y_pos + dy), line, font=font, fill=(0, 0, 0))
-                
-                # Draw main text (white)
-                draw.text((x_pos, y_pos), line, font=font, fill=(255, 255, 255))
-            
-            # Convert back to OpenCV format
-            frame_with_subs = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            return frame_with_subs
-            
-        except Exception as e:
-            self.log_message(f"⚠️ Subtitle overlay error: {e}")
-            return frame
-    
-    def wrap_text(self, text, font, max_width, draw):
-        """Wrap text to fit within max_width"""
-        words = text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            # Test current line + new word
-            test_line = ' '.join(current_line + [word])
-            bbox = draw.textbbox((0, 0), test_line, font=font)
-            test_width = bbox[2] - bbox[0]
-            
-            if test_width <= max_width:
-                # Word fits, add it to current line
-                current_line.append(word)
-            else:
-                # Word doesn't fit
-                if current_line:
-                    # Save current line and start new one
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-                else:
-                    # Single word is too long, force it anyway
-                    lines.append(word)
-                    current_line = []
-        
-        # Add remaining words
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return lines
-    
     def show_install_dependencies(self):
         """Show dialog to install dependencies"""
         msg = """Some required packages are missing. Would you like to install them?
 
 Required packages:
 • openai-whisper (for speech recognition)
-• moviepy (for video processing)
+• imageio-ffmpeg (bundled FFmpeg for audio and video)
 • deep-translator (for translation)
 • pysrt (for subtitle files)
 • pytesseract (for OCR)
@@ -1382,7 +1253,7 @@ Click 'Install' to install automatically."""
         
         packages = [
             "openai-whisper",
-            "moviepy", 
+            "imageio-ffmpeg",
             "deep-translator",
             "pysrt",
             "pytesseract",
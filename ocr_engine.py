@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+OCR Engine - Persistent Tesseract engine for subtitle frames
+Giữ Tesseract khởi tạo sẵn trong tiến trình (tesserocr), dự phòng bằng pytesseract
+
+pytesseract starts a tesseract process for every call, which reloads the
+traineddata and writes the image to a temp file each time. With tesserocr
+installed, one API handle is initialised per engine and frames are handed
+over as raw NumPy bytes.
+"""
+
+import cv2
+import numpy as np
+
+OCR_LANGUAGE = 'chi_sim'
+# 6 = one uniform block of text (one or two subtitle lines), 7 = single line
+DEFAULT_PSM = 6
+OCR_ENGINES = ('auto', 'tesserocr', 'pytesseract')
+
+
+def tesserocr_available():
+    """Whether the in-process tesserocr binding is installed"""
+    try:
+        import tesserocr
+        return True
+    except ImportError:
+        return False
+
+
+class TesseractEngine:
+    """Recognize text in NumPy frames with one long-lived Tesseract instance
+
+    engine is 'tesserocr' (persistent API handle), 'pytesseract' (one process
+    per call) or 'auto' to prefer tesserocr. Not thread safe: use one engine
+    per worker and close() it when the job is done.
+    """
+
+    def __init__(self, lang=OCR_LANGUAGE, psm=DEFAULT_PSM, whitelist='', engine='auto', tessdata=None,
+                 tesseract_cmd=None):
+        self.lang = lang
+        self.psm = int(psm)
+        self.whitelist = whitelist or ''
+        self.api = None
+        if engine == 'auto':
+            engine = 'tesserocr' if tesserocr_available() else 'pytesseract'
+        if engine not in OCR_ENGINES:
+            raise ValueError(f"Unknown OCR engine: {engine}. Choose from {', '.join(OCR_ENGINES)}")
+        self.engine = engine
+
+        if engine == 'tesserocr':
+            import tesserocr
+            kwargs = {'lang': lang, 'psm': self.psm}
+            if tessdata:
+                kwargs['path'] = str(tessdata)
+            self.api = tesserocr.PyTessBaseAPI(**kwargs)
+            if self.whitelist:
+                self.api.SetVariable('tessedit_char_whitelist', self.whitelist)
+        else:
+            import pytesseract
+            if tesseract_cmd:
+                pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+            self.pytesseract = pytesseract
+            self.config = f"--psm {self.psm}"
+            if self.whitelist:
+                self.config += f" -c tessedit_char_whitelist={self.whitelist}"
+
+    @property
+    def label(self):
+        mode = "persistent API" if self.api is not None else "process per frame"
+        return f"{self.engine} ({mode}, psm {self.psm})"
+
+    def set_frame(self, frame):
+        """Hand a gray or BGR frame to the API handle without copying through PIL"""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame = np.ascontiguousarray(frame)
+        height, width = frame.shape[:2]
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        self.api.SetImageBytes(frame.tobytes(), width, height, channels, width * channels)
+
+    def recognize(self, frame):
+        """(text, confidence) for a gray or BGR frame; confidence is Tesseract's 0-100 mean word confidence"""
+        if self.api is not None:
+            self.set_frame(frame)
+            text = self.api.GetUTF8Text()
+            confidence = float(self.api.MeanTextConf())
+        else:
+            if frame.ndim == 3:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            data = self.pytesseract.image_to_data(frame, lang=self.lang, config=self.config,
+                                                  output_type=self.pytesseract.Output.DICT)
+            text, confidence = self.join_words(data)
+        return text.strip(), confidence
+
+    @staticmethod
+    def join_words(data):
+        """Rebuild text and mean word confidence from image_to_data output"""
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data['text']):
+            confidence = float(data['conf'][i])
+            if confidence < 0 or not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word)
+            confidences.append(confidence)
+        text = '\n'.join(' '.join(words) for _, words in sorted(lines.items()))
+        return text, (sum(confidences) / len(confidences) if confidences else 0.0)
+
+    def close(self):
+        """Release the Tesseract API handle"""
+        if self.api is not None:
+            self.api.End()
+            self.api = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+OCR Parallel - Tesseract across a process pool
+Nhận dạng chữ song song trên nhiều tiến trình, frame truyền qua shared memory
+
+Frames are copied into a fixed ring of shared-memory slots; workers only
+receive the slot name. When every slot is in flight, submit() waits for a
+result, so the decoder is throttled and memory stays flat however long the
+video is. Results are keyed by submission ticket and read back in order.
+With a preprocessor, frames are collected into batches and preprocessed
+together in this process before they are handed to Tesseract.
+"""
+
+import os
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from ocr_engine import TesseractEngine
+from audio_processing import attach_array
+
+# Slots per worker: one being recognized, one queued
+SLOTS_PER_WORKER = 2
+DEFAULT_BATCH_SIZE = 16
+
+# Per-process state of pool workers
+_worker_engine = None
+
+
+def init_ocr_worker(engine_options):
+    """Pool initializer: one Tesseract engine per worker, single-threaded"""
+    global _worker_engine
+    # Tesseract's own OpenMP threads would fight with the other workers
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    _worker_engine = TesseractEngine(**engine_options)
+
+
+def recognize_slot(descriptor):
+    """Recognize the frame held in a shared-memory slot, returns ((text, confidence), seconds)"""
+    started = time.perf_counter()
+    shm, frame = attach_array(descriptor)
+    try:
+        reading = _worker_engine.recognize(frame)
+    finally:
+        del frame
+        shm.close()
+    return reading, time.perf_counter() - started
+
+
+class OCRPool:
+    """Recognize frames on N worker processes (or inline when workers is 1)
+
+    Per job: begin(preprocessor), submit(frame) for every frame that needs
+    OCR, then finish() to get {ticket: (text, confidence)}; failed tickets
+    are listed in errors. The worker processes and their Tesseract engines
+    stay alive between jobs.
+    """
+
+    def __init__(self, workers, engine_options=None, max_in_flight=None):
+        self.workers = max(1, int(workers))
+        self.engine_options = dict(engine_options or {})
+        self.max_in_flight = max_in_flight or self.workers * SLOTS_PER_WORKER
+        self.executor = None
+        self.engine = None
+        self.slots = []
+        self.pending = {}
+        self.begin()
+
+    def begin(self, preprocessor=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Start a new job: forget previous tickets, results and errors"""
+        self.release()
+        self.preprocessor = preprocessor
+        self.batch_size = max(1, int(batch_size)) if preprocessor else 1
+        self.batch = []
+        self.free_slots = []
+        self.pending = {}
+        self.results = {}
+        self.errors = {}
+        self.next_ticket = 0
+        self.calls = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def label(self):
+        if self.workers > 1:
+            return f"{self.engine_options.get('engine', 'auto')} on {self.workers} worker processes"
+        self.start()
+        return self.engine.label
+
+    @property
+    def broken(self):
+        """Whether a worker died and took the process pool down with it"""
+        return self.executor is not None and bool(getattr(self.executor, '_broken', False))
+
+    def start(self):
+        if self.broken:
+            # Every submit would fail with BrokenProcessPool; start over with fresh workers
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.workers == 1:
+            if self.engine is None:
+                self.engine = TesseractEngine(**self.engine_options)
+        elif self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context('spawn'),
+                initializer=init_ocr_worker,
+                initargs=(self.engine_options,)
+            )
+
+    def allocate_slots(self, frame):
+        from multiprocessing import shared_memory
+        for _ in range(self.max_in_flight):
+            shm = shared_memory.SharedMemory(create=True, size=max(1, frame.nbytes))
+            self.slots.append(shm)
+            self.free_slots.append(len(self.slots) - 1)
+        self.slot_shape = frame.shape
+        self.slot_dtype = frame.dtype
+
+    def submit(self, frame):
+        """Queue a frame for OCR, returns its ticket"""
+        self.start()
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.batch.append((ticket, frame))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+        return ticket
+
+    def flush(self):
+        """Preprocess the collected batch and send its frames to Tesseract"""
+        if not self.batch:
+            return
+        tickets = [ticket for ticket, _ in self.batch]
+        frames = [frame for _, frame in self.batch]
+        self.batch = []
+        if self.preprocessor is not None:
+            frames = self.preprocessor(frames)
+        for ticket, frame in zip(tickets, frames):
+            self.recognize(ticket, frame)
+
+    def recognize(self, ticket, frame):
+        if self.executor is None:
+            started = time.perf_counter()
+            try:
+                self.results[ticket] = self.engine.recognize(frame)
+            except Exception as e:
+                self.errors[ticket] = str(e)
+            self.calls += 1
+            self.busy_seconds += time.perf_counter() - started
+            return
+
+        if not self.slots:
+            self.allocate_slots(frame)
+        if frame.shape != self.slot_shape or frame.dtype != self.slot_dtype:
+            raise ValueError(f"Frame shape changed from {self.slot_shape} to {frame.shape}")
+        while not self.free_slots:
+            self.collect(timeout=None)
+
+        index = self.free_slots.pop()
+        shm = self.slots[index]
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[:] = frame
+        descriptor = {'shm': shm.name, 'shape': frame.shape, 'dtype': frame.dtype.str}
+        future = self.executor.submit(recognize_slot, descriptor)
+        self.pending[future] = (ticket, index)
+
+    def collect(self, timeout=0):
+        """Move finished recognitions into results and free their slots"""
+        if not self.pending:
+            return
+        done, _ = wait(self.pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            ticket, index = self.pending.pop(future)
+            self.free_slots.append(index)
+            try:
+                reading, elapsed = future.result()
+                self.results[ticket] = reading
+                self.busy_seconds += elapsed
+            except Exception as e:
+                self.errors[ticket] = str(e)
+            self.calls += 1
+
+    def finish(self, stop_callback=None):
+        """Wait for all submitted frames, returns {ticket: (text, confidence)} or None if stopped"""
+        try:
+            self.flush()
+            while self.pending:
+                if stop_callback and stop_callback():
+                    return None
+                self.collect(timeout=0.5)
+            return dict(self.results)
+        finally:
+            self.release()
+
+    def release(self):
+        """Cancel what is still queued and free the shared-memory slots"""
+        for future in self.pending:
+            future.cancel()
+        # Frames already being read keep their slot: on Windows the segment disappears
+        # as soon as the last handle we own is closed
+        wait(self.pending)
+        self.pending = {}
+        self.free_slots = []
+        self.batch = []
+        for shm in self.slots:
+            shm.close()
+            shm.unlink()
+        self.slots = []
+
+    def shutdown(self):
+        self.release()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+
+
+_shared_pool = None
+
+
+def get_ocr_pool(workers, engine_options=None):
+    """Process-wide OCR pool, recreated only when its settings change"""
+    global _shared_pool
+    engine_options = dict(engine_options or {})
+    try:
+        # Spawned workers don't inherit a tesseract path set at runtime (e.g. by the GUI on Windows)
+        import pytesseract
+        engine_options.setdefault('tesseract_cmd', pytesseract.pytesseract.tesseract_cmd)
+    except ImportError:
+        pass
+    current = _shared_pool
+    if current is not None and (current.workers, current.engine_options) != (int(workers), engine_options):
+        current.shutdown()
+        current = None
+    if current is None:
+        current = OCRPool(workers, engine_options)
+    _shared_pool = current
+    return current
+
+
+def shutdown_ocr_pool():
+    """Stop the process-wide OCR pool, if any"""
+    global _shared_pool
+    if _shared_pool is not None:
+        _shared_pool.shutdown()
+        _shared_pool = None
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+OCR Processing - Image analysis helpers for hard-sub OCR
+Phân tích ảnh cho OCR phụ đề cứng (tìm vùng phụ đề, ...)
+"""
+
+import time
+import cv2
+import numpy as np
+
+from video_frames import FrameSampler, get_video_info
+
+CALIBRATION_SAMPLES = 40
+CALIBRATION_WIDTH = 640
+
+# Preprocessing steps in the order they run; 'adaptive' and 'colorkey' are alternative binarizers
+PREPROCESS_STEPS = ('colorkey', 'normalize', 'adaptive', 'outline', 'scale')
+DEFAULT_PREPROCESS = 'normalize,adaptive,outline,scale'
+# Tesseract reads best with capital letters roughly 30-40 px tall
+TARGET_GLYPH_HEIGHT = 36
+
+
+def row_stroke_profile(gray, gradient_threshold=60):
+    """Fraction of pixels per row that sit on a vertical stroke edge
+
+    The horizontal Sobel gradient responds to the vertical strokes glyphs are
+    made of, so rows crossing a line of text light up densely.
+    """
+    gradient = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+    edges = np.abs(gradient) > gradient_threshold
+    return edges.mean(axis=1), edges
+
+
+def find_runs(mask):
+    """(start, end) index pairs of consecutive True values"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def detect_subtitle_bands(frames, density_threshold=0.04, min_presence=0.2, min_change=0.02):
+    """Find horizontal bands where changing text appears in a stack of gray frames
+
+    For every row we accumulate how often it is dense with stroke edges
+    (presence) and how much its edges change between samples (change).
+    Burned-in subtitles are present in many samples and change between them;
+    static logos and watermarks are present but never change. Returns bands
+    as (top, bottom, score) in row units of the given frames, best first.
+    """
+    profiles = []
+    edge_maps = []
+    for frame in frames:
+        profile, edges = row_stroke_profile(frame)
+        profiles.append(profile)
+        edge_maps.append(edges)
+    if len(profiles) < 2:
+        return []
+
+    profiles = np.stack(profiles)
+    edge_maps = np.stack(edge_maps)
+    height = profiles.shape[1]
+
+    presence = (profiles > density_threshold).mean(axis=0)
+    change = np.abs(np.diff(edge_maps.astype(np.int8), axis=0)).mean(axis=(0, 2))
+
+    # Smooth over roughly one glyph height so a text line becomes one run
+    window = max(3, height // 40)
+    kernel = np.ones(window) / window
+    presence = np.convolve(presence, kernel, mode='same')
+    change = np.convolve(change, kernel, mode='same')
+
+    text_rows = (presence >= min_presence) & (change >= min_change)
+    bands = []
+    for top, bottom in find_runs(text_rows):
+        if bottom - top < window:
+            continue
+        # Subtitles usually sit in the lower part of the frame
+        position_weight = 1.0 + (top + bottom) / (2 * height)
+        score = float(presence[top:bottom].sum() * position_weight)
+        bands.append((int(top), int(bottom), score))
+    bands.sort(key=lambda band: band[2], reverse=True)
+    return bands
+
+
+def calibrate_subtitle_region(video_file, samples=CALIBRATION_SAMPLES, padding=0.3):
+    """Sample frames across a video and return the hard-sub crop (x, y, w, h), or None"""
+    info = get_video_info(video_file)
+    if not info['duration'] or not info['height']:
+        return None
+    interval = max(info['duration'] / (samples + 1), 0.5)
+    scale = min(1.0, CALIBRATION_WIDTH / info['width'])
+
+    frames = []
+    # A few dozen frames spread over the whole video: seek to each one instead of decoding everything
+    for _, frame in FrameSampler(video_file, interval, gray=True, start=interval / 2, mode='seek'):
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        frames.append(frame)
+        if len(frames) >= samples:
+            break
+
+    bands = detect_subtitle_bands(frames)
+    if not bands:
+        return None
+    top, bottom, _ = bands[0]
+    top, bottom = top / scale, bottom / scale
+    pad = max(8, (bottom - top) * padding)
+    top = int(max(0, top - pad))
+    bottom = int(min(info['height'], bottom + pad))
+    return (0, top, info['width'], bottom - top)
+
+
+def band_to_region(band, width, height):
+    """Convert a manual 'top-bottom' percentage band (e.g. '80-95') to a crop"""
+    top_percent, bottom_percent = (float(v) for v in str(band).split('-'))
+    top = int(height * max(0.0, min(top_percent, 100.0)) / 100)
+    bottom = int(height * max(0.0, min(bottom_percent, 100.0)) / 100)
+    if bottom <= top:
+        raise ValueError(f"Invalid subtitle band: {band}")
+    return (0, top, width, bottom - top)
+
+
+def text_likelihood(frame, min_contrast=40, max_width=640):
+    """Rough 0-1 score of how much of a frame is covered by text-like blobs
+
+    A morphological gradient picks up glyph outlines, a wide closing joins the
+    strokes of a line into one blob, and only blobs shaped like a text line
+    (wider than tall, not too thin or tall, densely filled) are counted. Takes
+    a few milliseconds on a subtitle band, so it can gate the Tesseract call.
+    """
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if frame.shape[1] > max_width:
+        scale = max_width / frame.shape[1]
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    height, width = frame.shape
+
+    gradient = cv2.morphologyEx(frame, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    otsu, _ = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    _, binary = cv2.threshold(gradient, max(otsu, min_contrast), 255, cv2.THRESH_BINARY)
+    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 3)))
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return 0.0
+    w = stats[1:, cv2.CC_STAT_WIDTH]
+    h = stats[1:, cv2.CC_STAT_HEIGHT]
+    area = stats[1:, cv2.CC_STAT_AREA]
+    text_like = (w >= 2 * h) & (h >= 6) & (h <= 0.9 * height) & (area >= 0.3 * w * h)
+    return float(area[text_like].sum()) / (width * height)
+
+
+class RegionChangeCache:
+    """Reuse the last OCR result while the subtitle region stays visually the same
+
+    Each sample is reduced to a small grayscale thumbnail; when its mean
+    absolute difference to the thumbnail of the last OCR'd sample is below
+    threshold (0-255 scale), the previous text is reused instead of calling
+    Tesseract again.
+    """
+
+    def __init__(self, threshold=4.0, size=(128, 16)):
+        self.threshold = float(threshold)
+        self.size = size
+        self.reference = None
+        self.text = None
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, frame):
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def lookup(self, frame):
+        """Return (hit, text, signature) for a frame"""
+        signature = self.signature(frame)
+        if self.threshold > 0 and self.reference is not None:
+            difference = float(np.abs(signature - self.reference).mean())
+            if difference < self.threshold:
+                self.hits += 1
+                return True, self.text, signature
+        self.misses += 1
+        return False, None, signature
+
+    def store(self, signature, text):
+        """Remember the OCR result (text, or a pending OCR ticket) of the frame with this signature"""
+        self.reference = signature
+        self.text = text
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class OCRPreprocessor:
+    """Prepare batches of subtitle crops for Tesseract
+
+    Frames of one job share a shape, so a batch is stacked into a single tall
+    image and most OpenCV steps run once per batch instead of once per frame.
+    Every frame comes out exactly as it would on its own: neighbourhood
+    steps pad each frame with its own border rows, and resizing and Otsu
+    run per frame.
+    Binarized output is dark text on white. timings holds the seconds spent
+    in each step, for tuning the chain.
+    """
+
+    def __init__(self, steps=DEFAULT_PREPROCESS, glyph_height=TARGET_GLYPH_HEIGHT):
+        if isinstance(steps, str):
+            steps = [step.strip() for step in steps.split(',') if step.strip()]
+        unknown = set(steps) - set(PREPROCESS_STEPS)
+        if unknown:
+            raise ValueError(f"Unknown OCR preprocessing step: {', '.join(sorted(unknown))}")
+        if 'adaptive' in steps and 'colorkey' in steps:
+            raise ValueError("Use either 'adaptive' or 'colorkey' to binarize, not both")
+        self.steps = [step for step in PREPROCESS_STEPS if step in steps]
+        self.glyph_height = glyph_height
+        self.reset()
+
+    def reset(self):
+        """Forget the scale and timings of the previous job"""
+        self.scale = None
+        self.frames = 0
+        self.timings = {step: 0.0 for step in ['gray'] + self.steps}
+
+    @property
+    def needs_color(self):
+        return 'colorkey' in self.steps
+
+    def __call__(self, frames):
+        """Preprocess a list of same-shaped frames, returns a list of 2-D uint8 frames"""
+        batch = np.stack(frames)
+        if batch.ndim == 4 and not self.needs_color:
+            started = time.perf_counter()
+            batch = self.apply_tall(batch, lambda tall: cv2.cvtColor(tall, cv2.COLOR_BGR2GRAY))
+            self.timings['gray'] += time.perf_counter() - started
+
+        binary = False
+        for step in self.steps:
+            started = time.perf_counter()
+            if step == 'colorkey':
+                batch = self.color_key(batch)
+                binary = True
+            elif step == 'normalize':
+                batch = self.normalize(batch)
+            elif step == 'adaptive':
+                batch = self.adaptive_threshold(batch)
+                binary = True
+            elif step == 'outline':
+                batch = self.remove_outline(batch, binary)
+                binary = True
+            elif step == 'scale':
+                batch = self.rescale(batch, binary)
+            self.timings[step] += time.perf_counter() - started
+
+        if binary:
+            batch = 255 - batch
+        self.frames += len(frames)
+        return list(batch)
+
+    @staticmethod
+    def apply_tall(batch, operation, pad=0):
+        """Run a same-size OpenCV operation on the whole batch stacked vertically
+
+        Per-pixel operations need no padding. Neighbourhood operations get
+        pad replicated border rows above and below every frame (at least
+        their kernel radius), so no frame sees its neighbours' pixels.
+        """
+        if pad:
+            batch = np.pad(batch, ((0, 0), (pad, pad)) + ((0, 0),) * (batch.ndim - 2), mode='edge')
+        count, height = batch.shape[:2]
+        tall = batch.reshape((count * height,) + batch.shape[2:])
+        result = operation(tall).reshape(batch.shape)
+        return result[:, pad:height - pad] if pad else result
+
+    @staticmethod
+    def apply_each(batch, operation):
+        """Run an OpenCV operation frame by frame (shape changes, whole-image statistics)"""
+        return np.stack([operation(frame) for frame in batch])
+
+    def color_key(self, batch):
+        """Keep white and yellow subtitle fill (255), everything else 0"""
+        if batch.ndim == 3:
+            return np.where(batch >= 200, 255, 0).astype(np.uint8)
+        hsv = self.apply_tall(batch, lambda tall: cv2.cvtColor(tall, cv2.COLOR_BGR2HSV))
+        hue, saturation, value = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+        white = (value >= 200) & (saturation <= 60)
+        yellow = (hue >= 20) & (hue <= 35) & (saturation >= 100) & (value >= 150)
+        return np.where(white | yellow, 255, 0).astype(np.uint8)
+
+    @staticmethod
+    def normalize(batch):
+        """Stretch each frame's 2nd-98th percentile range to 0-255"""
+        count = len(batch)
+        flat = batch.reshape(count, -1)
+        # One bincount gives all per-frame histograms, no sorting
+        offsets = (np.arange(count, dtype=np.int64) * 256)[:, None]
+        histograms = np.bincount((flat + offsets).ravel(), minlength=count * 256).reshape(count, 256)
+        cumulative = np.cumsum(histograms, axis=1) / flat.shape[1]
+        low = (cumulative < 0.02).sum(axis=1).astype(np.float32)
+        high = (cumulative < 0.98).sum(axis=1).astype(np.float32)
+        scale = 255.0 / np.maximum(high - low, 1.0)
+        lut = np.clip((np.arange(256, dtype=np.float32)[None, :] - low[:, None]) * scale[:, None], 0, 255)
+        return np.take_along_axis(lut.astype(np.uint8), flat.astype(np.intp), axis=1).reshape(batch.shape)
+
+    def adaptive_threshold(self, batch):
+        """Mark pixels clearly brighter than their neighbourhood (subtitle fill)"""
+        block = max(15, batch.shape[1] // 2) | 1
+        return self.apply_tall(batch, lambda tall: cv2.adaptiveThreshold(
+            tall, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, block, -10), pad=block // 2)
+
+    def remove_outline(self, batch, binary):
+        """Drop the thin outline/shadow fragments left around glyph fill"""
+        if not binary:
+            # Otsu picks one threshold per image
+            batch = self.apply_each(batch, lambda frame: cv2.threshold(
+                frame, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1])
+        kernel = np.ones((2, 2), np.uint8)
+        return self.apply_tall(batch, lambda tall: cv2.morphologyEx(tall, cv2.MORPH_OPEN, kernel), pad=2)
+
+    def estimate_glyph_height(self, batch, binary):
+        """Median height of the tallest text-row run per frame"""
+        heights = []
+        if binary:
+            for frame in batch:
+                rows = (frame > 0).mean(axis=1) > 0.01
+                runs = find_runs(rows)
+                if runs:
+                    heights.append(max(end - start for start, end in runs))
+        if not heights:
+            # Calibrated bands are padded by ~30% above and below the text
+            return batch.shape[1] / 1.6
+        return float(np.median(heights))
+
+    def rescale(self, batch, binary):
+        """Resize so glyphs are about glyph_height pixels tall (scale fixed per job)"""
+        if self.scale is None:
+            # Frames of a job must keep one shape, so the first batch decides the scale
+            glyph = self.estimate_glyph_height(batch, binary)
+            self.scale = float(np.clip(self.glyph_height / glyph, 0.5, 4.0))
+            if abs(self.scale - 1.0) < 0.1:
+                self.scale = 1.0
+        if self.scale == 1.0:
+            return batch
+        count, height, width = batch.shape
+        size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+        interpolation = cv2.INTER_AREA if self.scale < 1.0 else cv2.INTER_LINEAR
+        # Interpolation reads neighbouring rows, so frames are resized one by one
+        batch = self.apply_each(batch, lambda frame: cv2.resize(frame, size, interpolation=interpolation))
+        if binary:
+            batch = np.where(batch >= 128, 255, 0).astype(np.uint8)
+        return batch
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def normalize_ocr_text(text):
+    """Drop the whitespace Tesseract scatters between CJK glyphs"""
+    return ''.join(text.split())
+
+
+def text_similarity(a, b):
+    """1 - normalised edit distance of two OCR readings (1.0 = identical)"""
+    a, b = normalize_ocr_text(a), normalize_ocr_text(b)
+    if not a or not b:
+        return 0.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+def coalesce_detections(detections, interval, min_similarity=0.7):
+    """Collapse per-sample OCR readings of the same on-screen line into timed spans
+
+    detections are {'timestamp', 'text', 'confidence'} in timestamp order, one
+    per sample that had text. Readings from consecutive samples that are at
+    least min_similarity alike belong to one span, which starts at its first
+    sample and ends one interval after its last (the line was gone by the
+    next sample). The span text is the reading with the highest total
+    confidence, so a line read the same way several times beats a single
+    misread.
+    """
+    spans = []
+    current = None
+    for detection in detections:
+        timestamp = detection['timestamp']
+        joins = (
+            current is not None
+            and timestamp - current['last'] <= interval * 1.5
+            and text_similarity(detection['text'], current['last_text']) >= min_similarity
+        )
+        if not joins:
+            current = {'start': timestamp, 'readings': {}, 'samples': 0}
+            spans.append(current)
+        current['last'] = timestamp
+        current['last_text'] = detection['text']
+        current['samples'] += 1
+        key = normalize_ocr_text(detection['text'])
+        reading = current['readings'].setdefault(key, {'text': detection['text'], 'score': 0.0, 'best': -1.0})
+        confidence = max(float(detection.get('confidence', 0.0)), 0.0)
+        reading['score'] += confidence or 1.0
+        if confidence > reading['best']:
+            reading['best'] = confidence
+            reading['text'] = detection['text']
+
+    results = []
+    for span in spans:
+        best = max(span['readings'].values(), key=lambda reading: reading['score'])
+        results.append({
+            'start': span['start'],
+            'end': span['last'] + interval,
+            'text': best['text'],
+            'confidence': best['best'],
+            'samples': span['samples']
+        })
+    return results
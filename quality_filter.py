@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Quality Filter - Drop or flag low-confidence ASR and OCR items before translation
+Lọc bỏ (hoặc đánh dấu) câu nhận dạng kém tin cậy trước khi dịch
+
+Defaults follow Whisper's own decoding heuristics: a segment is silence when
+no_speech_prob is high and avg_logprob is low at the same time, and text
+that compresses too well (compression_ratio) is a repetition loop.
+"""
+
+DEFAULT_NO_SPEECH_THRESHOLD = 0.6
+DEFAULT_LOGPROB_THRESHOLD = -1.0
+DEFAULT_COMPRESSION_THRESHOLD = 2.4
+DEFAULT_OCR_MIN_CONFIDENCE = 60.0
+FILTER_MODES = ('drop', 'flag', 'off')
+
+
+def asr_segment_problem(segment, no_speech_threshold=DEFAULT_NO_SPEECH_THRESHOLD,
+                        logprob_threshold=DEFAULT_LOGPROB_THRESHOLD,
+                        compression_threshold=DEFAULT_COMPRESSION_THRESHOLD):
+    """Reason a Whisper segment looks unreliable, or None if it looks fine"""
+    no_speech = segment.get('no_speech_prob')
+    logprob = segment.get('avg_logprob')
+    compression = segment.get('compression_ratio')
+    if no_speech is not None and logprob is not None:
+        if no_speech > no_speech_threshold and logprob < logprob_threshold:
+            return 'no_speech'
+    if compression is not None and compression > compression_threshold:
+        return 'repetition'
+    if logprob is not None and logprob < logprob_threshold * 2:
+        return 'low_logprob'
+    return None
+
+
+def ocr_line_problem(line, min_confidence=DEFAULT_OCR_MIN_CONFIDENCE):
+    """Reason an OCR line looks unreliable, or None if it looks fine"""
+    confidence = line.get('confidence')
+    if confidence is not None and 0 <= confidence < min_confidence:
+        return 'low_confidence'
+    return None
+
+
+def apply_filter(items, check, mode='drop'):
+    """Split items by check(item) -> reason
+
+    Returns (kept, dropped_counts) where dropped_counts maps reason to count.
+    In 'flag' mode nothing is removed: unreliable items get 'low_confidence'
+    set to the reason and are counted the same way.
+    """
+    if mode == 'off':
+        return list(items), {}
+    kept = []
+    counts = {}
+    for item in items:
+        reason = check(item)
+        if reason is None:
+            kept.append(item)
+            continue
+        counts[reason] = counts.get(reason, 0) + 1
+        if mode == 'flag':
+            item = dict(item)
+            item['low_confidence'] = reason
+            kept.append(item)
+    return kept, counts
+
+
+def filter_asr_segments(segments, mode='drop', **thresholds):
+    """Drop or flag unreliable Whisper segments, returns (segments, counts)"""
+    return apply_filter(segments, lambda segment: asr_segment_problem(segment, **thresholds), mode)
+
+
+def filter_ocr_lines(lines, mode='drop', min_confidence=DEFAULT_OCR_MIN_CONFIDENCE):
+    """Drop or flag OCR lines with low Tesseract confidence, returns (lines, counts)"""
+    return apply_filter(lines, lambda line: ocr_line_problem(line, min_confidence), mode)
+
+
+def describe_counts(counts):
+    """'3 no_speech, 1 repetition' style summary"""
+    return ", ".join(f"{count} {reason}" for reason, count in sorted(counts.items())) or "none"
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Subtitle Batch - Headless command line batch mode
+Xử lý hàng loạt video không cần giao diện (chạy trên máy render)
+
+Examples:
+    python subtitle_batch.py episodes/ --workers 4 --srt --overlay
+    python subtitle_batch.py a.mp4 b.mkv -o out/ --settings subtitle_tool_settings.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from asr_backends import ASR_BACKENDS
+from ocr_engine import OCR_ENGINES
+from quality_filter import FILTER_MODES
+from translation_backends import TRANSLATION_BACKENDS
+from video_encoder import VIDEO_PRESETS, OVERLAY_ENGINES
+from subtitle_pipeline import SubtitlePipeline, DEFAULT_SETTINGS, VIDEO_EXTENSIONS, missing_dependencies
+
+
+def find_videos(inputs, recursive=False):
+    """Expand files and directories into a sorted list of video files"""
+    videos = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = '**/*' if recursive else '*'
+            videos.extend(p for p in path.glob(pattern) if p.suffix.lower() in VIDEO_EXTENSIONS)
+        elif path.is_file():
+            videos.append(path)
+        else:
+            print(f"⚠️ Skipping missing input: {item}", file=sys.stderr)
+    # Keep order stable and drop duplicates
+    return sorted(set(videos))
+
+
+def init_worker(threads_per_worker):
+    """Limit torch/BLAS threads so parallel workers don't oversubscribe the CPU"""
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+
+def process_video_job(video_file, output_dir, settings):
+    """Run the pipeline for one video inside a worker process"""
+    video_name = Path(video_file).stem
+
+    def log(message):
+        timestamp = time.strftime("%H:%M:%S")
+        print(f"[{timestamp}] [{video_name}] {message}", flush=True)
+
+    pipeline = SubtitlePipeline(settings, log_callback=log)
+    return pipeline.run(video_file, output_dir=output_dir)
+
+
+def build_settings(args):
+    """Merge defaults, an optional settings file and command line overrides"""
+    settings = dict(DEFAULT_SETTINGS)
+    if args.settings:
+        with open(args.settings, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f))
+
+    if args.model:
+        settings['model'] = args.model
+    if args.asr_backend:
+        settings['asr_backend'] = args.asr_backend
+    if args.max_length:
+        settings['max_length'] = str(args.max_length)
+    if args.ocr_interval:
+        settings['ocr_interval'] = str(args.ocr_interval)
+    if args.no_ocr:
+        settings['enable_ocr'] = False
+    if args.ocr_change_threshold is not None:
+        settings['ocr_change_threshold'] = str(args.ocr_change_threshold)
+    if args.ocr_text_threshold is not None:
+        settings['ocr_text_threshold'] = str(args.ocr_text_threshold)
+    if args.ocr_engine:
+        settings['ocr_engine'] = args.ocr_engine
+    if args.ocr_psm:
+        settings['ocr_psm'] = str(args.ocr_psm)
+    if args.ocr_whitelist is not None:
+        settings['ocr_whitelist'] = args.ocr_whitelist
+    if args.ocr_workers:
+        settings['ocr_workers'] = str(args.ocr_workers)
+    if args.ocr_preprocess is not None:
+        settings['ocr_preprocess'] = '' if args.ocr_preprocess == 'none' else args.ocr_preprocess
+    if args.ocr_merge_similarity is not None:
+        settings['ocr_merge_similarity'] = str(args.ocr_merge_similarity)
+    if args.no_ocr_dedup:
+        settings['ocr_dedup'] = False
+    if args.ocr_dedup_similarity is not None:
+        settings['ocr_dedup_similarity'] = str(args.ocr_dedup_similarity)
+    if args.ocr_region:
+        settings['ocr_region_mode'] = args.ocr_region
+    if args.ocr_band:
+        settings['ocr_region_mode'] = 'manual'
+        settings['ocr_region_band'] = args.ocr_band
+    if args.asr_workers:
+        settings['asr_workers'] = str(args.asr_workers)
+    if args.asr_chunk_seconds:
+        settings['asr_chunk_seconds'] = args.asr_chunk_seconds
+    if args.vad:
+        settings['enable_vad'] = True
+    if args.translation_cache:
+        settings['translation_cache_path'] = args.translation_cache
+    if args.no_translation_cache:
+        settings['translation_cache'] = False
+    if args.overlay_engine:
+        settings['overlay_engine'] = args.overlay_engine
+    if args.tesseract_cmd:
+        settings['tesseract_cmd'] = args.tesseract_cmd
+    if args.video_preset:
+        settings['video_preset'] = args.video_preset
+    if args.video_crf is not None:
+        settings['video_crf'] = str(args.video_crf)
+    if args.languages:
+        settings['target_languages'] = args.languages
+    if args.translation_backend:
+        settings['translation_backend'] = args.translation_backend
+    if args.translation_option:
+        options = dict(settings.get('translation_backend_options') or {})
+        for option in args.translation_option:
+            key, _, value = option.partition('=')
+            options[key.strip().replace('-', '_')] = value.strip()
+        settings['translation_backend_options'] = options
+    if args.translation_concurrency:
+        settings['translation_concurrency'] = args.translation_concurrency
+    if args.translation_rate is not None:
+        settings['translation_rate'] = args.translation_rate
+    if args.quality_filter:
+        settings['quality_filter'] = args.quality_filter
+    if args.no_speech_threshold is not None:
+        settings['asr_no_speech_threshold'] = str(args.no_speech_threshold)
+    if args.logprob_threshold is not None:
+        settings['asr_logprob_threshold'] = str(args.logprob_threshold)
+    if args.compression_threshold is not None:
+        settings['asr_compression_threshold'] = str(args.compression_threshold)
+    if args.ocr_min_confidence is not None:
+        settings['ocr_min_confidence'] = str(args.ocr_min_confidence)
+
+    # Explicit export flags replace the saved export selection
+    export_flags = {
+        'export_srt': args.srt,
+        'export_transcript': args.transcript,
+        'export_ocr_only': args.ocr_only,
+        'overlay_video': args.overlay,
+    }
+    if any(export_flags.values()):
+        settings.update(export_flags)
+    return settings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate Vietnamese subtitles for Chinese videos without the GUI"
+    )
+    parser.add_argument('inputs', nargs='+', help="Video files or folders containing videos")
+    parser.add_argument('-o', '--output-dir', help="Output folder (default: each video's folder)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Search folders recursively")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Number of videos processed in parallel")
+    parser.add_argument('--settings', help="JSON settings file (same format as subtitle_tool_settings.json)")
+    parser.add_argument('--model', choices=["tiny", "base", "small", "medium", "large"], help="Whisper model")
+    parser.add_argument('--asr-backend', choices=list(ASR_BACKENDS), help="Speech recognition engine")
+    parser.add_argument('--max-length', type=int, help="Max subtitle line length")
+    parser.add_argument('--asr-workers', type=int, help="Transcribe each video as parallel chunks on N processes")
+    parser.add_argument('--asr-chunk-seconds', type=float, help="Chunk length for parallel transcription")
+    parser.add_argument('--vad', action='store_true', help="Skip silence and music before transcription")
+    parser.add_argument('--translation-cache', help="Translation memory database (default: ./translation_cache.sqlite3)")
+    parser.add_argument('--no-translation-cache', action='store_true', help="Always translate over the network")
+    parser.add_argument('--languages', metavar='vi,en,...',
+                        help="Target languages, comma-separated; ASR/OCR run once for all (default: vi)")
+    parser.add_argument('--translation-backend', choices=list(TRANSLATION_BACKENDS),
+                        help="Translation provider; 'local' is an offline stand-in for load tests (default: google)")
+    parser.add_argument('--translation-option', action='append', metavar='KEY=VALUE',
+                        help="Backend option, repeatable (local: latency, error_rate, rate_limit, max_concurrent, ...)")
+    parser.add_argument('--translation-concurrency', type=int,
+                        help="Translation requests in flight at once (default: backend hint, 4 for google)")
+    parser.add_argument('--translation-rate', type=float,
+                        help="Max translation requests per second, 0 = unlimited (default: backend hint, 5 for google)")
+    parser.add_argument('--quality-filter', choices=list(FILTER_MODES),
+                        help="What to do with low-confidence ASR/OCR items before translation (default: drop)")
+    parser.add_argument('--no-speech-threshold', type=float, help="Whisper no_speech_prob above which silence is assumed")
+    parser.add_argument('--logprob-threshold', type=float, help="Whisper avg_logprob below which a segment is unreliable")
+    parser.add_argument('--compression-threshold', type=float,
+                        help="Whisper compression_ratio above which a segment is a repetition loop")
+    parser.add_argument('--ocr-min-confidence', type=float, help="Minimum Tesseract confidence (0-100) for OCR lines")
+    parser.add_argument('--ocr-interval', type=float, help="OCR interval in seconds")
+    parser.add_argument('--no-ocr', action='store_true', help="Disable OCR")
+    parser.add_argument('--ocr-change-threshold', type=float,
+                        help="Reuse the previous OCR text while the subtitle region differs less than this (0 = off)")
+    parser.add_argument('--ocr-text-threshold', type=float,
+                        help="Skip Tesseract on frames whose text-likelihood score is below this (0 = off)")
+    parser.add_argument('--ocr-engine', choices=list(OCR_ENGINES),
+                        help="Tesseract binding (default: auto, tesserocr when installed)")
+    parser.add_argument('--ocr-psm', type=int, help="Tesseract page segmentation mode (6 = block, 7 = single line)")
+    parser.add_argument('--ocr-whitelist', help="Only recognize these characters")
+    parser.add_argument('--ocr-workers', type=int, help="Run OCR on N processes per video")
+    parser.add_argument('--ocr-preprocess',
+                        help="Comma separated OCR preprocessing steps (colorkey, normalize, adaptive, outline, "
+                             "scale) or 'none'")
+    parser.add_argument('--ocr-merge-similarity', type=float,
+                        help="Merge consecutive OCR readings at least this similar (0-1) into one line")
+    parser.add_argument('--no-ocr-dedup', action='store_true',
+                        help="Keep OCR lines that repeat the audio (translated and shown twice)")
+    parser.add_argument('--ocr-dedup-similarity', type=float,
+                        help="Share of an OCR line's characters found in the audio to count as a duplicate (default: 0.6)")
+    parser.add_argument('--ocr-region', choices=["auto", "full", "manual"],
+                        help="Subtitle region for OCR (default: auto-detect)")
+    parser.add_argument('--ocr-band', help="Manual subtitle band as top-bottom %% of height, e.g. 80-100")
+    parser.add_argument('--srt', action='store_true', help="Export SRT file")
+    parser.add_argument('--transcript', action='store_true', help="Export transcript")
+    parser.add_argument('--ocr-only', action='store_true', help="Export OCR-only text")
+    parser.add_argument('--overlay', action='store_true', help="Create video with burnt-in subtitles")
+    parser.add_argument('--overlay-engine', choices=list(OVERLAY_ENGINES),
+                        help="Burn-in engine: ffmpeg/libass from an ASS file, or the Python renderer "
+                             "(default: auto, ffmpeg when it has libass)")
+    parser.add_argument('--video-preset', choices=list(VIDEO_PRESETS),
+                        help="x264 preset for the burned video, faster = bigger file (default: medium)")
+    parser.add_argument('--video-crf', type=int, help="x264 quality, lower = better (default: 20)")
+    parser.add_argument('--tesseract-cmd', help="Path to the tesseract executable")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    settings = build_settings(args)
+    missing = missing_dependencies(settings)
+    if missing:
+        print(f"❌ Missing for these settings: {', '.join(missing)} (pip install -r requirements.txt)",
+              file=sys.stderr)
+        return 2
+
+    if not any([settings['export_srt'], settings['export_transcript'],
+                settings['export_ocr_only'], settings['overlay_video']]):
+        print("❌ Please select at least one export option!", file=sys.stderr)
+        return 2
+
+    videos = find_videos(args.inputs, args.recursive)
+    if not videos:
+        print("❌ No video files found", file=sys.stderr)
+        return 2
+
+    workers = max(1, min(args.workers, len(videos)))
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🎬 Processing {len(videos)} video(s) with {workers} worker(s), "
+          f"{threads_per_worker} thread(s) each", flush=True)
+
+    start_time = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(threads_per_worker,)) as executor:
+        futures = {
+            executor.submit(process_video_job, str(video), args.output_dir, settings): video
+            for video in videos
+        }
+        for future in as_completed(futures):
+            video = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'video': str(video), 'status': 'failed', 'outputs': [], 'error': str(e)}
+            results.append(result)
+            icon = "✅" if result['status'] == 'completed' else "❌"
+            print(f"{icon} {video.name}: {result['status']} ({len(results)}/{len(videos)})", flush=True)
+
+    failed = [r for r in results if r['status'] != 'completed']
+    print(f"🎉 Done: {len(results) - len(failed)} completed, {len(failed)} failed "
+          f"in {time.time() - start_time:.1f}s", flush=True)
+    for result in failed:
+        print(f"   ❌ {result['video']}: {result.get('error')}", flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
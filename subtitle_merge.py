@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Subtitle Merge - Cross-source deduplication of audio and OCR lines
+Bỏ câu OCR trùng với câu Whisper đã nhận dạng (phụ đề cứng đọc lại lời thoại)
+
+When a video has burned-in Chinese subtitles, most OCR lines repeat what
+Whisper transcribed. An OCR line is a duplicate when the audio segments
+around it in time contain (almost) all of its character n-grams; the audio
+segment stays as the canonical line for that utterance. OCR lines with text
+nobody said (signs, captions, titles) are kept.
+"""
+
+import unicodedata
+from collections import Counter
+
+DEFAULT_NGRAM = 2
+DEFAULT_DEDUP_SIMILARITY = 0.6
+# OCR spans start at a sample, so their timing is only as good as the sample interval
+DEFAULT_TIME_TOLERANCE = 1.0
+
+
+def ngram_counts(text, n=DEFAULT_NGRAM):
+    """Character n-grams of text with whitespace and punctuation removed"""
+    chars = [c for c in unicodedata.normalize('NFKC', text).lower() if c.isalnum()]
+    if len(chars) < n:
+        return Counter(chars)
+    return Counter(''.join(chars[i:i + n]) for i in range(len(chars) - n + 1))
+
+
+class NGramIndex:
+    """Inverted index from character n-grams to the timed items containing them"""
+
+    def __init__(self, n=DEFAULT_NGRAM):
+        self.n = n
+        self.items = []
+        self.postings = {}
+
+    def add(self, start, end, text):
+        """Index one item, returns its id"""
+        item_id = len(self.items)
+        grams = ngram_counts(text, self.n)
+        self.items.append((start, end, grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(item_id)
+        return item_id
+
+    def candidates(self, grams, start, end):
+        """Ids of items sharing at least one n-gram and overlapping [start, end]"""
+        found = set()
+        for gram in grams:
+            found.update(self.postings.get(gram, ()))
+        return sorted(i for i in found if self.items[i][0] <= end and self.items[i][1] >= start)
+
+    def containment(self, text, start, end):
+        """Share of text's n-grams found in the items overlapping [start, end], and their ids"""
+        grams = ngram_counts(text, self.n)
+        total = sum(grams.values())
+        if not total:
+            return 0.0, []
+        ids = self.candidates(grams, start, end)
+        around = Counter()
+        for i in ids:
+            around.update(self.items[i][2])
+        shared = sum((grams & around).values())
+        return shared / total, ids
+
+
+def dedupe_ocr_against_audio(segments, ocr_lines, min_similarity=DEFAULT_DEDUP_SIMILARITY,
+                             tolerance=DEFAULT_TIME_TOLERANCE, n=DEFAULT_NGRAM):
+    """Split OCR lines into (ocr_only, duplicates)
+
+    segments are Whisper segments and ocr_lines coalesced OCR spans, both
+    with 'start', 'end' and 'text'. An OCR line is a duplicate when at least
+    min_similarity of its n-grams appear in the audio segments overlapping
+    its span (widened by tolerance seconds). Duplicates are returned as
+    (ocr_line, [segment indexes]) pairs.
+    """
+    index = NGramIndex(n)
+    for segment in segments:
+        index.add(segment['start'], segment['end'], segment['text'])
+
+    ocr_only = []
+    duplicates = []
+    for line in ocr_lines:
+        similarity, ids = index.containment(line['text'], line['start'] - tolerance, line['end'] + tolerance)
+        if similarity >= min_similarity:
+            duplicates.append((line, ids))
+        else:
+            ocr_only.append(line)
+    return ocr_only, duplicates
@@ -0,0 +1,939 @@
+#!/usr/bin/env python3
+"""
+Subtitle Pipeline - Headless processing engine
+Bộ xử lý phụ đề không cần giao diện, dùng chung cho GUI và CLI
+"""
+
+import time
+import threading
+import importlib.util
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
+import cv2
+import numpy as np
+
+from asr_backends import get_backend, available_backends, DEFAULT_BACKEND
+from asr_worker import get_shared_cache, DEFAULT_MEMORY_BUDGET_MB
+from asr_parallel import get_parallel_transcriber, DEFAULT_CHUNK_SECONDS, DEFAULT_OVERLAP_SECONDS
+from video_frames import FrameSampler, get_video_info
+from ocr_parallel import get_ocr_pool
+from ocr_processing import (calibrate_subtitle_region, band_to_region, text_likelihood, RegionChangeCache,
+                            OCRPreprocessor, DEFAULT_PREPROCESS, coalesce_detections)
+from translation_cache import TranslationCache, DEFAULT_CACHE_FILE, DEFAULT_MAX_ENTRIES
+from translation_scheduler import TranslationScheduler, DEFAULT_RETRIES
+from translation_backends import (create_translation_backend, TRANSLATION_BACKENDS, DEFAULT_TRANSLATION_BACKEND,
+                                  SOURCE_LANGUAGE)
+from quality_filter import filter_asr_segments, filter_ocr_lines, describe_counts
+from subtitle_merge import dedupe_ocr_against_audio, DEFAULT_DEDUP_SIMILARITY, DEFAULT_TIME_TOLERANCE
+from subtitle_render import SubtitleTimeline, SubtitleRenderer, EMPTY_SET
+from text_layout import break_text
+from video_encoder import (DEFAULT_PRESET, DEFAULT_CRF, OVERLAY_ENGINES, VideoEncoder, burn_ass_subtitles,
+                           libass_available)
+from ass_subtitles import write_ass
+from audio_processing import (load_audio, release_audio, audio_duration, detect_speech, compact_speech,
+                              remap_transcription, DEFAULT_MAX_MEMORY_MB)
+
+# Default settings, same keys as subtitle_tool_settings.json
+DEFAULT_SETTINGS = {
+    'model': 'base',
+    'asr_backend': DEFAULT_BACKEND,
+    'max_length': '80',
+    'enable_ocr': True,
+    'ocr_interval': '2.0',
+    'overlay_video': False,
+    'overlay_engine': 'auto',
+    'video_preset': DEFAULT_PRESET,
+    'video_crf': str(DEFAULT_CRF),
+    'export_srt': True,
+    'export_transcript': True,
+    'export_ocr_only': False,
+    'auto_output_folder': True,
+    'output_folder': str(Path.cwd()),
+    'model_memory_mb': DEFAULT_MEMORY_BUDGET_MB,
+    'audio_memory_mb': DEFAULT_MAX_MEMORY_MB,
+    'asr_workers': '1',
+    'asr_chunk_seconds': DEFAULT_CHUNK_SECONDS,
+    'asr_overlap_seconds': DEFAULT_OVERLAP_SECONDS,
+    'enable_vad': False,
+    'ocr_grayscale': True,
+    'ocr_region_mode': 'auto',
+    'ocr_region_band': '80-100',
+    'ocr_change_threshold': '4.0',
+    'ocr_text_threshold': '0.005',
+    'ocr_engine': 'auto',
+    'ocr_psm': '6',
+    'ocr_whitelist': '',
+    'tesseract_cmd': '',
+    'ocr_workers': '1',
+    'ocr_preprocess': DEFAULT_PREPROCESS,
+    'ocr_merge_similarity': '0.7',
+    'ocr_dedup': True,
+    'ocr_dedup_similarity': str(DEFAULT_DEDUP_SIMILARITY),
+    'quality_filter': 'drop',
+    'asr_no_speech_threshold': '0.6',
+    'asr_logprob_threshold': '-1.0',
+    'asr_compression_threshold': '2.4',
+    'ocr_min_confidence': '60',
+    'translation_cache': True,
+    'translation_cache_path': str(Path.cwd() / DEFAULT_CACHE_FILE),
+    'translation_cache_max_entries': DEFAULT_MAX_ENTRIES,
+    # Comma-separated; ASR and OCR run once, translation and outputs once per language
+    'target_languages': 'vi',
+    'translation_backend': DEFAULT_TRANSLATION_BACKEND,
+    'translation_backend_options': {},
+    # Empty = the backend's own hint
+    'translation_concurrency': '',
+    'translation_rate': '',
+    'translation_retries': DEFAULT_RETRIES,
+}
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv')
+
+
+def parse_target_languages(value):
+    """['vi', 'en'] from 'vi, en' (or a list), without duplicates; defaults to Vietnamese"""
+    if isinstance(value, str):
+        value = value.split(',')
+    languages = []
+    for language in value or ():
+        language = language.strip()
+        if language and language not in languages:
+            languages.append(language)
+    return languages or ['vi']
+
+
+def output_suffix(target):
+    """File name suffix for a target language; Vietnamese keeps the original names"""
+    return '' if target == 'vi' else f"_{target}"
+
+
+def module_installed(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def missing_dependencies(settings=None):
+    """What the selected settings need but is not installed, as short descriptions"""
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    missing = []
+    backend = get_backend(settings['asr_backend'])
+    if backend.name not in available_backends():
+        missing.append(f"ASR engine {backend.label}")
+    translation = TRANSLATION_BACKENDS.get(settings['translation_backend'])
+    if translation is not None and not translation().is_available():
+        missing.append(f"translation backend {translation.label}")
+    if settings['export_srt'] and not module_installed('pysrt'):
+        missing.append("pysrt")
+    if settings['enable_ocr']:
+        engine = settings['ocr_engine']
+        # 'auto' takes whichever binding is installed
+        engines = [engine] if engine in ('tesserocr', 'pytesseract') else ['tesserocr', 'pytesseract']
+        if not any(module_installed(engine) for engine in engines):
+            missing.append(" or ".join(engines))
+    return missing
+
+
+def check_dependencies_available(settings=None):
+    """Check if everything the selected settings need is installed"""
+    return not missing_dependencies(settings)
+
+
+class SubtitlePipeline:
+    """Audio extraction → transcription → OCR → translation → export/overlay
+
+    Settings are a plain dict (see DEFAULT_SETTINGS). Logging, status and
+    stop requests go through optional callbacks so the same engine can be
+    driven by the Tk GUI, the batch CLI or any script. When an ASRWorker is
+    given, transcription runs in that persistent process; otherwise models are
+    cached in the current process.
+    """
+
+    def __init__(self, settings=None, log_callback=None, status_callback=None, stop_callback=None,
+                 asr_worker=None):
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.asr_worker = asr_worker
+        self.log_callback = log_callback
+        self.status_callback = status_callback
+        self.stop_callback = stop_callback
+
+    @property
+    def should_stop(self):
+        """Whether the caller asked to stop processing"""
+        return bool(self.stop_callback and self.stop_callback())
+
+    def log_message(self, message):
+        """Add message to log"""
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            timestamp = time.strftime("%H:%M:%S")
+            print(f"[{timestamp}] {message}", flush=True)
+
+    def update_status(self, status, progress=None):
+        """Update status and progress"""
+        if self.status_callback:
+            self.status_callback(status, progress)
+
+    def run(self, video_file, output_dir=None, video_name=None):
+        """Process one video file, returns a result dict with status and outputs"""
+        video_file = str(video_file)
+        if output_dir is None:
+            if self.settings.get('auto_output_folder', True):
+                output_dir = Path(video_file).parent
+            else:
+                output_dir = self.settings.get('output_folder') or Path.cwd()
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        result = {'video': video_file, 'status': 'stopped', 'outputs': [], 'error': None}
+        start_time = time.time()
+        audio = None
+        spill_file = None
+        try:
+            # Use custom filename if provided, otherwise use video filename
+            if video_name:
+                self.log_message(f"📝 Using custom filename: {video_name}")
+            else:
+                video_name = Path(video_file).stem
+                self.log_message(f"📝 Using auto filename: {video_name}")
+
+            self.log_message("🎬 Starting enhanced video processing...")
+
+            # Step 1: Extract audio
+            if self.should_stop:
+                return result
+            self.update_status("Extracting audio from video...", 10)
+            spill_file = output_dir / f"{video_name}_audio.f32"
+            audio = self.extract_audio(video_file, spill_file)
+
+            # Step 2: Transcribe audio
+            if self.should_stop:
+                return result
+            speech_audio, time_map = self.apply_vad(audio, result)
+            if self.should_stop:
+                return result
+            self.update_status("Transcribing Chinese audio...", 25)
+            if len(speech_audio):
+                transcription = self.transcribe_audio(speech_audio)
+            else:
+                transcription = {'text': '', 'segments': [], 'language': 'zh'}
+            transcription = remap_transcription(transcription, time_map)
+            speech_audio = None
+            release_audio(audio, spill_file)
+            audio = None
+
+            # Step 3: OCR processing (if enabled)
+            if self.should_stop:
+                return result
+            ocr_results = []
+            if self.settings['enable_ocr']:
+                self.update_status("Processing OCR from video frames...", 45)
+                ocr_results = self.extract_ocr_from_video(video_file)
+                if self.should_stop:
+                    return result
+
+            # Step 4: Translate content
+            if self.should_stop:
+                return result
+            transcription, ocr_results = self.filter_low_quality(transcription, ocr_results, result)
+            ocr_results = self.dedupe_sources(transcription, ocr_results, result)
+            targets = parse_target_languages(self.settings['target_languages'])
+            result['languages'] = targets
+            self.update_status(f"Translating to {', '.join(targets)}...", 65)
+            # Audio and OCR lines go out together so duplicates between them are translated once
+            texts = [segment['text'].strip() for segment in transcription['segments']]
+            texts += [item['text'] for item in ocr_results]
+            translations = self.translate_texts(texts, targets)
+            if self.should_stop:
+                return result
+
+            # Step 5: Export files, one set per language
+            for target in targets:
+                audio_subtitles = self.create_subtitles_from_audio(transcription, translations[target], target)
+                ocr_subtitles = []
+                if ocr_results:
+                    ocr_subtitles = self.create_subtitles_from_ocr(ocr_results, translations[target], target)
+
+                if self.should_stop:
+                    return result
+                self.update_status(f"Saving output files ({target})...", 85)
+                self.export_outputs(video_file, output_dir, video_name, audio_subtitles,
+                                    ocr_subtitles, result['outputs'], target)
+                if self.should_stop:
+                    return result
+
+            self.update_status("✅ Processing complete!", 100)
+            self.log_message("🎉 Enhanced subtitle generation completed successfully!")
+            result['status'] = 'completed'
+
+        except Exception as e:
+            if not self.should_stop:
+                self.log_message(f"❌ Error: {e}")
+                self.update_status("❌ Processing failed", 0)
+                result['status'] = 'failed'
+                result['error'] = str(e)
+        finally:
+            # Clean up
+            if spill_file is not None:
+                release_audio(audio, spill_file)
+            result['elapsed'] = time.time() - start_time
+
+        return result
+
+    def export_outputs(self, video_file, output_dir, video_name, audio_subtitles, ocr_subtitles, outputs,
+                       target='vi'):
+        """Write the selected output files for one target language, appending their paths to outputs"""
+        suffix = output_suffix(target)
+        if self.settings['export_srt']:
+            if self.should_stop:
+                return
+            # Save combined SRT
+            combined_subtitles = self.merge_subtitles(audio_subtitles, ocr_subtitles)
+            language = 'vietnamese' if target == 'vi' else target
+            srt_file = output_dir / f"{video_name}_enhanced_{language}.srt"
+            self.save_subtitles(combined_subtitles, str(srt_file))
+            outputs.append(str(srt_file))
+            self.log_message(f"✅ SRT file saved: {srt_file}")
+
+        if self.settings['export_transcript']:
+            if self.should_stop:
+                return
+            # Save transcript
+            transcript_file = output_dir / f"{video_name}_transcript{suffix}.txt"
+            self.save_transcript(audio_subtitles, ocr_subtitles, str(transcript_file))
+            outputs.append(str(transcript_file))
+            self.log_message(f"✅ Transcript saved: {transcript_file}")
+
+        if self.settings['export_ocr_only'] and ocr_subtitles:
+            if self.should_stop:
+                return
+            # Save OCR only
+            ocr_file = output_dir / f"{video_name}_ocr_only{suffix}.txt"
+            self.save_ocr_text(ocr_subtitles, str(ocr_file))
+            outputs.append(str(ocr_file))
+            self.log_message(f"✅ OCR text saved: {ocr_file}")
+
+        # Create video with burnt-in subtitles if requested
+        if self.settings['overlay_video']:
+            if self.should_stop:
+                return
+            self.update_status(f"Creating video with burnt-in subtitles ({target})...", 90)
+            combined_subtitles = self.merge_subtitles(audio_subtitles, ocr_subtitles)
+            output_video = output_dir / f"{video_name}_with_subtitles{suffix}.mp4"
+            self.create_video_with_subtitles(video_file, combined_subtitles, str(output_video))
+            if self.should_stop:
+                return
+            outputs.append(str(output_video))
+            self.log_message(f"✅ Video with subtitles saved: {output_video}")
+
+    def extract_audio(self, video_file, spill_file=None):
+        """Extract 16 kHz mono audio from video into a NumPy array"""
+        self.log_message("🎵 Extracting audio...")
+        audio = load_audio(
+            video_file,
+            spill_path=spill_file,
+            max_memory_mb=float(self.settings['audio_memory_mb']),
+            should_stop=lambda: self.should_stop
+        )
+        if audio is None:
+            return None
+        mapped = " (memory-mapped)" if isinstance(audio, np.memmap) else ""
+        self.log_message(f"✅ Audio extracted successfully: {audio_duration(audio):.1f}s{mapped}")
+        return audio
+
+    def apply_vad(self, audio, result):
+        """Keep only speech islands when VAD is enabled, returns (audio, time_map)"""
+        if not self.settings['enable_vad']:
+            return audio, None
+
+        self.update_status("Detecting speech (VAD)...", 20)
+        start_time = time.time()
+        islands = detect_speech(audio)
+        speech_audio, time_map = compact_speech(audio, islands)
+        total = audio_duration(audio)
+        skipped = total - audio_duration(speech_audio)
+        result['vad_skipped_seconds'] = skipped
+        percent = skipped * 100 / total if total else 0
+        self.log_message(
+            f"🔇 VAD skipped {skipped:.1f}s of {total:.1f}s ({percent:.0f}%), "
+            f"{len(islands)} speech islands in {time.time() - start_time:.2f}s"
+        )
+        return speech_audio, time_map
+
+    def filter_low_quality(self, transcription, ocr_results, result):
+        """Drop (or flag) hallucinated ASR segments and OCR garbage before translation"""
+        mode = self.settings['quality_filter']
+        if mode == 'off':
+            return transcription, ocr_results
+
+        segments, audio_counts = filter_asr_segments(
+            transcription['segments'], mode,
+            no_speech_threshold=float(self.settings['asr_no_speech_threshold']),
+            logprob_threshold=float(self.settings['asr_logprob_threshold']),
+            compression_threshold=float(self.settings['asr_compression_threshold'])
+        )
+        ocr_results, ocr_counts = filter_ocr_lines(ocr_results, mode, float(self.settings['ocr_min_confidence']))
+
+        action = "Dropped" if mode == 'drop' else "Flagged"
+        self.log_message(f"🧹 {action} low-confidence audio segments: {describe_counts(audio_counts)}")
+        if self.settings['enable_ocr']:
+            self.log_message(f"🧹 {action} low-confidence OCR lines: {describe_counts(ocr_counts)}")
+        result['low_confidence_items'] = sum(audio_counts.values()) + sum(ocr_counts.values())
+        return dict(transcription, segments=segments), ocr_results
+
+    def dedupe_sources(self, transcription, ocr_results, result):
+        """Drop OCR lines that repeat an audio segment, keep OCR-only text (signs, captions)"""
+        if not self.settings['ocr_dedup'] or not ocr_results or not transcription['segments']:
+            return ocr_results
+
+        tolerance = max(DEFAULT_TIME_TOLERANCE, float(self.settings['ocr_interval']))
+        ocr_only, duplicates = dedupe_ocr_against_audio(
+            transcription['segments'], ocr_results,
+            min_similarity=float(self.settings['ocr_dedup_similarity']),
+            tolerance=tolerance
+        )
+        result['ocr_duplicates'] = len(duplicates)
+        self.log_message(
+            f"🔗 {len(duplicates)} of {len(ocr_results)} OCR lines repeat the audio and were dropped, "
+            f"{len(ocr_only)} OCR-only lines kept"
+        )
+        return ocr_only
+
+    def transcribe_audio(self, audio):
+        """Transcribe Chinese audio with the selected ASR backend, reusing already loaded models"""
+        model_name = self.settings['model']
+        backend = self.settings['asr_backend']
+        asr_workers = int(self.settings['asr_workers'])
+        if asr_workers > 1:
+            return self.transcribe_audio_parallel(audio, model_name, backend, asr_workers)
+
+        if self.asr_worker is not None:
+            job = self.asr_worker.transcribe(
+                audio, model_name, backend,
+                stop_callback=lambda: self.should_stop,
+                language="zh"
+            )
+            if job is None:
+                return None
+            timing = job['timing']
+            source = "cached" if job['cache_hit'] else "loaded"
+            self.log_message(
+                f"⏱️ ASR job {job['job_id']}: {backend} model {model_name} {source} in {timing['model_load']:.1f}s, "
+                f"waited {timing['queue_wait']:.1f}s, transcribed in {timing['transcribe']:.1f}s "
+                f"({len(job['cached_models'])} model(s) kept loaded)"
+            )
+            return job['result']
+
+        cache = get_shared_cache(float(self.settings['model_memory_mb']))
+        load_start = time.time()
+        model, cache_hit = cache.get(model_name, backend)
+        if not cache_hit:
+            self.log_message(
+                f"🤖 Loaded {get_backend(backend).label} model {model_name} in {time.time() - load_start:.1f}s"
+            )
+        return model.transcribe(audio, language="zh")
+
+    def transcribe_audio_parallel(self, audio, model_name, backend, asr_workers):
+        """Transcribe overlapping audio chunks on a pool of ASR processes"""
+        transcriber = get_parallel_transcriber(
+            asr_workers,
+            chunk_seconds=float(self.settings['asr_chunk_seconds']),
+            overlap_seconds=float(self.settings['asr_overlap_seconds']),
+            max_memory_mb=float(self.settings['model_memory_mb'])
+        )
+
+        def progress(done, total):
+            self.update_status(f"Transcribing Chinese audio... chunk {done}/{total}", 25 + done * 20 / total)
+
+        start_time = time.time()
+        result = transcriber.transcribe(
+            audio, model_name, backend,
+            stop_callback=lambda: self.should_stop,
+            progress_callback=progress,
+            language="zh"
+        )
+        if result is not None:
+            self.log_message(
+                f"⏱️ Parallel ASR: {result['windows']} chunks on {asr_workers} workers in "
+                f"{time.time() - start_time:.1f}s ({result['window_seconds']:.1f}s of worker time)"
+            )
+        return result
+
+    def extract_ocr_from_video(self, video_file):
+        """Extract text from video frames using OCR"""
+        self.log_message("👁️ Starting OCR processing...")
+        ocr_results = []
+        interval = float(self.settings['ocr_interval'])
+        pool = None
+
+        try:
+            region = self.resolve_ocr_region(video_file)
+            if self.should_stop:
+                return ocr_results
+
+            # Initialised Tesseract engines live in the pool for the whole session, one per worker
+            ocr_workers = max(1, int(self.settings['ocr_workers']))
+            engine_options = {
+                'psm': self.settings['ocr_psm'],
+                'whitelist': self.settings['ocr_whitelist'],
+                'engine': self.settings['ocr_engine']
+            }
+            # Pool workers are fresh processes: the tesseract path has to travel with the options
+            if self.settings.get('tesseract_cmd'):
+                engine_options['tesseract_cmd'] = self.settings['tesseract_cmd']
+            pool = get_ocr_pool(ocr_workers, engine_options)
+            preprocessor = OCRPreprocessor(self.settings['ocr_preprocess']) if self.settings['ocr_preprocess'] else None
+            pool.begin(preprocessor)
+            self.log_message(f"🔤 OCR engine: {pool.label}")
+
+            # Only the sampled frames are decoded and delivered, cropped to the subtitle region
+            # Colour keying needs the subtitle colours, everything else works on gray frames
+            gray = self.settings['ocr_grayscale'] and not (preprocessor and preprocessor.needs_color)
+            sampler = FrameSampler(video_file, interval, gray=gray, crop=region)
+            expected_samples = sampler.expected_samples
+            # Subtitles stay on screen for several samples; skip Tesseract while the region is unchanged
+            change_cache = RegionChangeCache(float(self.settings['ocr_change_threshold']))
+            text_threshold = float(self.settings['ocr_text_threshold'])
+            gated_frames = 0
+            # (timestamp, ticket) per sample; ticket is None when the frame had no text
+            samples = []
+
+            for timestamp, frame in sampler:
+                if self.should_stop:
+                    sampler.close()
+                    break
+
+                cache_hit, ticket, signature = change_cache.lookup(frame)
+                if not cache_hit:
+                    # Frames without text-like blobs never reach Tesseract
+                    if text_threshold > 0 and text_likelihood(frame) < text_threshold:
+                        gated_frames += 1
+                        ticket = None
+                    else:
+                        ticket = pool.submit(frame)
+                    change_cache.store(signature, ticket)
+                samples.append((timestamp, ticket))
+
+                # Update progress
+                progress = 45 + (len(samples) * 20 / expected_samples)
+                self.update_status(f"OCR processing... {len(samples)} frames", min(progress, 64))
+
+            self.update_status("Waiting for OCR workers...", 64)
+            readings = pool.finish(stop_callback=lambda: self.should_stop) or {}
+
+            # Reassemble in timestamp order
+            detections = []
+            logged = set()
+            for timestamp, ticket in samples:
+                if ticket is None:
+                    continue
+                if ticket in pool.errors:
+                    if ticket not in logged:
+                        logged.add(ticket)
+                        self.log_message(f"⚠️ OCR error at {timestamp:.1f}s: {pool.errors[ticket]}")
+                    continue
+                text, confidence = readings.get(ticket, ('', 0.0))
+                if text and len(text) > 2:  # Only keep meaningful text
+                    detections.append({
+                        'timestamp': timestamp,
+                        'text': text,
+                        'confidence': confidence
+                    })
+                    if ticket not in logged:
+                        logged.add(ticket)
+                        self.log_message(f"OCR at {timestamp:.1f}s: {text[:50]}...")
+
+            self.log_message(
+                f"♻️ OCR change cache: {change_cache.hits} unchanged frames reused, "
+                f"{change_cache.misses} new ({change_cache.hit_rate:.0%} reused)"
+            )
+            self.log_message(
+                f"🚦 Text gate: {gated_frames} of {change_cache.misses} new frames had no text, "
+                f"{change_cache.misses - gated_frames} sent to Tesseract"
+            )
+            if preprocessor is not None and preprocessor.frames:
+                steps = ", ".join(
+                    f"{step} {seconds * 1000 / preprocessor.frames:.2f}"
+                    for step, seconds in preprocessor.timings.items() if seconds
+                )
+                self.log_message(f"🧪 OCR preprocessing (ms per frame): {steps}")
+            if pool.calls:
+                self.log_message(
+                    f"⏱️ Tesseract: {pool.calls} calls, {pool.busy_seconds * 1000 / pool.calls:.0f} ms per frame"
+                    f" on {ocr_workers} worker(s)"
+                )
+
+            # One span per on-screen line instead of one entry per sample
+            ocr_results = coalesce_detections(detections, interval, float(self.settings['ocr_merge_similarity']))
+            self.log_message(f"🧩 Coalesced {len(detections)} OCR detections into {len(ocr_results)} timed lines")
+            if not self.should_stop:
+                self.log_message(f"✅ OCR completed. Found {len(ocr_results)} text segments")
+            else:
+                self.log_message(f"🛑 OCR stopped. Processed {len(ocr_results)} text segments")
+
+        except Exception as e:
+            self.log_message(f"❌ OCR processing failed: {e}")
+        finally:
+            if pool is not None:
+                pool.release()
+
+        return ocr_results
+
+    def resolve_ocr_region(self, video_file):
+        """Crop (x, y, w, h) that OCR should read, or None for the full frame"""
+        mode = self.settings['ocr_region_mode']
+        if mode == 'full':
+            return None
+
+        info = get_video_info(video_file)
+        if mode == 'manual':
+            region = band_to_region(self.settings['ocr_region_band'], info['width'], info['height'])
+        else:
+            self.update_status("Detecting subtitle region...", 45)
+            region = calibrate_subtitle_region(video_file)
+            if region is None:
+                self.log_message("⚠️ No stable subtitle band found, OCR will read the full frame")
+                return None
+
+        _, top, _, band_height = region
+        self.log_message(
+            f"📐 Subtitle region ({mode}): rows {top}-{top + band_height} "
+            f"({band_height * 100 / info['height']:.0f}% of frame)"
+        )
+        return region
+
+    def create_scheduler(self, target, cache=None):
+        """Translation backend and scheduler for one target language"""
+        backend = create_translation_backend(
+            self.settings['translation_backend'], SOURCE_LANGUAGE, target,
+            **(self.settings['translation_backend_options'] or {})
+        )
+        concurrency = self.settings['translation_concurrency']
+        rate = self.settings['translation_rate']
+        scheduler = TranslationScheduler.for_backend(
+            backend,
+            concurrency=int(concurrency) if str(concurrency).strip() else None,
+            requests_per_second=float(rate) if str(rate).strip() else None,
+            retries=int(self.settings['translation_retries']),
+            cache=cache
+        )
+        return backend, scheduler
+
+    def translate_texts(self, texts, targets=('vi',)):
+        """Translate Chinese texts to every target language at once, returns {target: {text: translation or None}}"""
+        cache = None
+        if self.settings['translation_cache']:
+            cache = TranslationCache(self.settings['translation_cache_path'],
+                                     self.settings['translation_cache_max_entries'])
+        backends = {}
+        schedulers = {}
+        for target in targets:
+            backends[target], schedulers[target] = self.create_scheduler(target, cache)
+        # One provider quota, however many languages are in flight
+        bucket = schedulers[targets[0]].bucket
+        for scheduler in schedulers.values():
+            scheduler.bucket = bucket
+        limit = f", max {bucket.rate:g} requests/s" if bucket.rate > 0 else ""
+        labels = ', '.join(sorted({backend.label for backend in backends.values()}))
+        self.log_message(
+            f"🌐 Translating to {', '.join(targets)} with {labels}: "
+            f"{schedulers[targets[0]].concurrency} concurrent requests per language{limit}"
+        )
+
+        # Language threads only record their progress; status updates (which drive the GUI)
+        # stay on this thread
+        done = {target: 0 for target in targets}
+        done_lock = threading.Lock()
+
+        def progress(target, count, total):
+            with done_lock:
+                done[target] = count / total
+
+        def translate(target):
+            return schedulers[target].translate_all(
+                texts, stop_callback=lambda: self.should_stop,
+                progress_callback=lambda count, total: progress(target, count, total)
+            )
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+                futures = {executor.submit(translate, target): target for target in targets}
+                pending = set(futures)
+                reported = None
+                while pending:
+                    _, pending = wait(pending, timeout=0.5)
+                    with done_lock:
+                        fraction = sum(done.values()) / len(targets)
+                    if fraction != reported:
+                        reported = fraction
+                        self.update_status(f"Translating to {', '.join(targets)}...", 65 + fraction * 20)
+                outcomes = {target: future.result() for future, target in futures.items()}
+        finally:
+            if cache is not None:
+                self.log_message(
+                    f"📚 Translation cache: {cache.hits} hits, {cache.misses} misses "
+                    f"({cache.hit_rate:.0%}), {len(cache)} entries"
+                )
+                cache.close()
+
+        results = {}
+        for target in targets:
+            translations, errors = outcomes[target]
+            stats = schedulers[target].stats
+            self.log_message(
+                f"🌐 Translation ({target}, {backends[target].label}): {stats['texts']} texts, {stats['unique']} unique, "
+                f"{stats['cached']} from cache, {stats['requests']} requests ({stats['retries']} retries) "
+                f"in {stats['elapsed']:.1f}s"
+            )
+            for error in errors:
+                self.log_message(f"⚠️ Translation batch ({target}) failed after retries: {error}")
+            results[target] = dict(zip(texts, translations))
+        return results
+
+    def create_subtitles_from_audio(self, transcription_result, translations, target='vi'):
+        """Create subtitles from audio transcription"""
+        subtitles = []
+        max_length = int(self.settings['max_length'])
+
+        for i, segment in enumerate(transcription_result['segments']):
+            chinese_text = segment['text'].strip()
+            if not chinese_text:
+                continue
+
+            translated_text = translations.get(chinese_text)
+            if translated_text is None:
+                self.log_message(f"⚠️ Translation error for audio segment {i+1} ({target}), keeping Chinese text")
+                text = chinese_text
+            else:
+                text = translated_text
+
+            # Break long lines
+            subtitle = {
+                'start': segment['start'],
+                'end': segment['end'],
+                'text': self.break_long_lines(text, max_length),
+                'source': 'audio'
+            }
+            # The quality filter's flag holds whether or not the line was translated
+            if segment.get('low_confidence'):
+                subtitle['low_confidence'] = segment['low_confidence']
+            subtitles.append(subtitle)
+
+            if translated_text is not None:
+                self.log_message(f"Audio CN: {chinese_text}")
+                self.log_message(f"Audio {target.upper()}: {subtitle['text']}")
+
+        return subtitles
+
+    def create_subtitles_from_ocr(self, ocr_results, translations, target='vi'):
+        """Create subtitles from OCR results"""
+        subtitles = []
+
+        for i, ocr_item in enumerate(ocr_results):
+            chinese_text = ocr_item['text']
+
+            translated_text = translations.get(chinese_text)
+            if translated_text is None:
+                self.log_message(f"⚠️ Translation error for OCR {i+1} ({target}), skipped")
+                continue
+
+            subtitle = {
+                'start': ocr_item['start'],
+                'end': ocr_item['end'],
+                'text': translated_text,
+                'source': 'ocr'
+            }
+            if ocr_item.get('low_confidence'):
+                subtitle['low_confidence'] = ocr_item['low_confidence']
+            subtitles.append(subtitle)
+
+            self.log_message(f"OCR CN: {chinese_text}")
+            self.log_message(f"OCR {target.upper()}: {translated_text}")
+
+        return subtitles
+
+    def merge_subtitles(self, audio_subs, ocr_subs):
+        """Merge audio and OCR subtitles"""
+        # Simple merge - you could implement more sophisticated logic
+        all_subs = audio_subs + ocr_subs
+        # Sort by start time
+        all_subs.sort(key=lambda x: x['start'])
+        return all_subs
+
+    def break_long_lines(self, text, max_length):
+        """Break long lines into multiple lines (CJK text may break between characters)"""
+        return break_text(text, max_length)
+
+    def save_subtitles(self, subtitles, output_file):
+        """Save subtitles to SRT file"""
+        import pysrt
+        subs = pysrt.SubRipFile()
+
+        for i, subtitle in enumerate(subtitles):
+            start_time = pysrt.SubRipTime(seconds=subtitle['start'])
+            end_time = pysrt.SubRipTime(seconds=subtitle['end'])
+
+            sub = pysrt.SubRipItem(
+                index=i+1,
+                start=start_time,
+                end=end_time,
+                text=subtitle['text']
+            )
+            subs.append(sub)
+
+        subs.save(output_file, encoding='utf-8')
+
+    def save_transcript(self, audio_subs, ocr_subs, output_file):
+        """Save combined transcript"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("=== ENHANCED VIDEO TRANSCRIPT ===\n\n")
+
+            if audio_subs:
+                f.write("--- AUDIO TRANSCRIPTION ---\n")
+                for sub in audio_subs:
+                    flag = "(?) " if sub.get('low_confidence') else ""
+                    f.write(f"[{sub['start']:.1f}s - {sub['end']:.1f}s] {flag}{sub['text']}\n")
+                f.write("\n")
+
+            if ocr_subs:
+                f.write("--- OCR TEXT ---\n")
+                for sub in ocr_subs:
+                    flag = "(?) " if sub.get('low_confidence') else ""
+                    f.write(f"[{sub['start']:.1f}s] {flag}{sub['text']}\n")
+
+    def save_ocr_text(self, ocr_subs, output_file):
+        """Save OCR-only text"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("=== OCR EXTRACTED TEXT ===\n\n")
+            for sub in ocr_subs:
+                f.write(f"[{sub['start']:.1f}s] {sub['text']}\n")
+
+    def overlay_engine(self):
+        """'ffmpeg' or 'python' for this job; 'auto' prefers libass when ffmpeg has it"""
+        engine = self.settings.get('overlay_engine') or 'auto'
+        if engine not in OVERLAY_ENGINES:
+            raise ValueError(f"Unknown overlay engine: {engine}. Choose from {', '.join(OVERLAY_ENGINES)}")
+        if engine == 'auto':
+            return 'ffmpeg' if libass_available() else 'python'
+        if engine == 'ffmpeg' and not libass_available():
+            raise RuntimeError("The ffmpeg overlay engine needs an ffmpeg build with libass")
+        return engine
+
+    def create_video_with_subtitles(self, video_file, subtitles, output_file):
+        """Create video with burnt-in subtitles using the job's overlay engine"""
+        if self.overlay_engine() == 'ffmpeg':
+            self.burn_subtitles_with_ffmpeg(video_file, subtitles, output_file)
+        else:
+            self.render_video_with_subtitles(video_file, subtitles, output_file)
+
+    def burn_subtitles_with_ffmpeg(self, video_file, subtitles, output_file):
+        """Burn subtitles with ffmpeg's libass filter from a generated ASS file"""
+        ass_file = Path(output_file).with_suffix('.ass')
+        try:
+            self.log_message("🎬 Creating video with burnt-in subtitles (ffmpeg/libass)...")
+            start_time = time.time()
+
+            info = get_video_info(video_file)
+            duration = max(info['duration'], 1e-6)
+            # Same style as SubtitleRenderer, sized in video pixels
+            write_ass(subtitles, str(ass_file), info['width'], info['height'])
+
+            def progress(seconds):
+                self.update_status(f"Burning subtitles {seconds:.0f}/{duration:.0f}s",
+                                   90 + min(1.0, seconds / duration) * 9)
+
+            finished = burn_ass_subtitles(
+                video_file, ass_file, output_file,
+                preset=self.settings['video_preset'],
+                crf=int(self.settings['video_crf']),
+                progress_callback=progress,
+                stop_callback=lambda: self.should_stop
+            )
+            if finished:
+                self.log_message(
+                    f"✅ Video with subtitles created successfully! "
+                    f"({len(subtitles)} subtitles in {time.time() - start_time:.1f}s, "
+                    f"x264 {self.settings['video_preset']}, CRF {self.settings['video_crf']})"
+                )
+
+        except Exception as e:
+            self.log_message(f"❌ Video creation failed: {e}")
+            raise e
+        finally:
+            ass_file.unlink(missing_ok=True)
+
+    def render_video_with_subtitles(self, video_file, subtitles, output_file):
+        """Draw subtitles on every frame in Python (SubtitleRenderer) and pipe them to ffmpeg"""
+        cap = None
+        encoder = None
+        try:
+            self.log_message("🎬 Creating video with burnt-in subtitles...")
+            start_time = time.time()
+
+            # Open input video
+            cap = cv2.VideoCapture(video_file)
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            total_frames = max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+
+            # Frames go straight into the H.264 encoder, which also copies the audio track
+            encoder = VideoEncoder(
+                output_file, width, height, fps,
+                audio_source=video_file,
+                preset=self.settings['video_preset'],
+                crf=int(self.settings['video_crf'])
+            )
+
+            timeline = SubtitleTimeline(subtitles, fps)
+            renderer = SubtitleRenderer(width, height)
+            self.log_message(
+                f"🎞️ {len(subtitles)} subtitles, {timeline.distinct_sets} distinct on-screen combinations"
+            )
+            frame_count = 0
+
+            while True:
+                if self.should_stop:
+                    encoder.abort()
+                    return
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                # Add subtitles to frame
+                set_id = timeline.set_at(frame_count)
+                if set_id != EMPTY_SET:
+                    try:
+                        renderer.draw(frame, timeline.texts(set_id))
+                    except Exception as e:
+                        self.log_message(f"⚠️ Subtitle overlay error: {e}")
+
+                # Write frame
+                encoder.write(frame)
+                frame_count += 1
+
+                # Update progress occasionally
+                if frame_count % int(fps * 2) == 0:  # Every 2 seconds
+                    progress = 90 + (frame_count / total_frames) * 9
+                    self.update_status(f"Processing video frame {frame_count}/{total_frames}", progress)
+
+            encoder.close()
+            self.log_message(
+                f"🖌️ Rendered {renderer.misses} subtitle sprites, reused them on {renderer.hits} frames"
+            )
+            self.log_message(
+                f"✅ Video with subtitles created successfully! "
+                f"({frame_count} frames in {time.time() - start_time:.1f}s, x264 {self.settings['video_preset']}, "
+                f"CRF {self.settings['video_crf']})"
+            )
+
+        except Exception as e:
+            if encoder is not None:
+                encoder.abort()
+            self.log_message(f"❌ Video creation failed: {e}")
+            raise e
+        finally:
+            if cap is not None:
+                cap.release()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Subtitle Render - Timeline and cached sprites for the video overlay
+Tra cứu phụ đề theo frame và vẽ sẵn phụ đề thành sprite, chỉ trộn vùng chữ
+
+Subtitles are turned into a sorted list of frame boundaries where the set
+of visible lines changes. Every stretch between two boundaries has the id of
+its active set, so the renderer looks up a frame with one comparison when
+it walks the video in order, and identical sets (the same line over ~100
+frames) share an id.
+
+Each distinct set of lines is rasterised once into an RGBA sprite (kept in
+an LRU cache) and alpha-blended onto just the rows and columns it covers, so
+the per-frame cost no longer depends on font loading, wrapping or text
+drawing.
+"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from text_layout import font_metrics, layout_lines
+
+# Set id of frames without subtitles
+EMPTY_SET = 0
+FONT_CANDIDATES = ("arial.ttf", "C:/Windows/Fonts/arial.ttf")
+DEFAULT_SPRITE_CACHE = 64
+
+
+class SubtitleTimeline:
+    """Active-subtitle sets per frame for subtitles with 'start', 'end' (seconds, inclusive) and 'text'
+
+    sets[set_id] is a tuple of subtitle indexes in list order; set 0 is empty.
+    boundaries[k] is the first frame of segment k, whose set is segment_sets[k].
+    """
+
+    def __init__(self, subtitles, fps):
+        self.subtitles = list(subtitles)
+        self.fps = float(fps)
+        # Frames whose timestamp frame / fps falls inside [start, end]
+        changes = {}
+        for i, sub in enumerate(self.subtitles):
+            first = math.ceil(sub['start'] * self.fps - 1e-6)
+            last = math.floor(sub['end'] * self.fps + 1e-6)
+            if last < max(first, 0):
+                continue
+            changes.setdefault(max(first, 0), []).append((1, i))
+            changes.setdefault(last + 1, []).append((-1, i))
+
+        self.sets = [()]
+        set_ids = {(): EMPTY_SET}
+        self.boundaries = [0]
+        self.segment_sets = [EMPTY_SET]
+        active = set()
+        for frame in sorted(changes):
+            for delta, i in changes[frame]:
+                if delta > 0:
+                    active.add(i)
+                else:
+                    active.discard(i)
+            key = tuple(sorted(active))
+            set_id = set_ids.get(key)
+            if set_id is None:
+                set_id = set_ids[key] = len(self.sets)
+                self.sets.append(key)
+            if set_id == self.segment_sets[-1]:
+                continue
+            if frame == self.boundaries[-1]:
+                self.segment_sets[-1] = set_id
+            else:
+                self.boundaries.append(frame)
+                self.segment_sets.append(set_id)
+        self.cursor = 0
+
+    @property
+    def distinct_sets(self):
+        """Number of different non-empty subtitle combinations on screen"""
+        return len(self.sets) - 1
+
+    def set_at(self, frame):
+        """Active set id of a frame; O(1) amortised when frames are asked for in order"""
+        boundaries = self.boundaries
+        cursor = self.cursor
+        if frame < boundaries[cursor]:
+            cursor = bisect_right(boundaries, frame) - 1
+        else:
+            while cursor + 1 < len(boundaries) and frame >= boundaries[cursor + 1]:
+                cursor += 1
+        self.cursor = cursor
+        return self.segment_sets[cursor]
+
+    def set_ids(self, frame_count):
+        """NumPy array with the active set id of every frame in range(frame_count)"""
+        starts = np.asarray(self.boundaries)
+        segment = np.searchsorted(starts, np.arange(frame_count), side='right') - 1
+        return np.asarray(self.segment_sets, dtype=np.int32)[segment]
+
+    def texts(self, set_id):
+        """Texts of an active set, in subtitle order"""
+        return [self.subtitles[i]['text'] for i in self.sets[set_id]]
+
+
+def load_font(size, candidates=FONT_CANDIDATES):
+    """First TrueType font that loads, else PIL's bitmap default"""
+    for path in candidates:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+class SubtitleSprite:
+    """A rendered subtitle block: premultiplied BGR and inverse alpha, placed at (x, y)"""
+
+    def __init__(self, rgba, x, y):
+        alpha = rgba[:, :, 3:4].astype(np.uint16)
+        bgr = rgba[:, :, 2::-1].astype(np.uint16)
+        self.x = x
+        self.y = y
+        self.height, self.width = rgba.shape[:2]
+        self.premultiplied = bgr * alpha
+        self.inverse_alpha = 255 - alpha
+
+    def blend(self, frame):
+        """Composite onto the covered region of a BGR frame, in place"""
+        roi = frame[self.y:self.y + self.height, self.x:self.x + self.width]
+        blended = roi * self.inverse_alpha
+        blended += self.premultiplied
+        blended += 127
+        roi[:] = blended // 255
+        return frame
+
+
+class SubtitleRenderer:
+    """Draw subtitle lines at the bottom of width x height frames
+
+    Layout follows the original overlay: font at 2.5% of the frame height,
+    5% side margins, lines centred and stacked up from 30 px above the
+    bottom, white text with a 1 px black stroke.
+    """
+
+    def __init__(self, width, height, cache_size=DEFAULT_SPRITE_CACHE):
+        self.width = width
+        self.height = height
+        self.font_size = max(14, int(height * 0.025))
+        self.font = load_font(self.font_size)
+        self.margin_x = int(width * 0.05)
+        self.margin_y = 30
+        self.line_height = self.font_size + 8
+        self.outline_width = 1
+        self.metrics = font_metrics(self.font)
+        self.cache = OrderedDict()
+        self.cache_size = max(1, int(cache_size))
+        self.hits = 0
+        self.misses = 0
+
+    def layout(self, texts):
+        """[(line, x, y)] in frame coordinates"""
+        usable_width = self.width - 2 * self.margin_x
+        lines = []
+        for text in texts:
+            lines.extend(layout_lines(text, usable_width, self.metrics))
+
+        y_start = self.height - self.margin_y - len(lines) * self.line_height
+        # Ensure subtitles don't go off-screen at top
+        y_start = max(y_start, self.margin_y)
+
+        placed = []
+        for i, line in enumerate(lines):
+            text_width = int(round(self.metrics.width(line)))
+            x_pos = (self.width - text_width) // 2
+            # Ensure text doesn't go off-screen horizontally
+            x_pos = min(max(x_pos, self.margin_x), self.width - self.margin_x - text_width)
+            placed.append((line, x_pos, y_start + i * self.line_height))
+        return placed
+
+    def rasterize(self, texts):
+        """Render texts once into a sprite cropped to the pixels they touch"""
+        placed = self.layout(texts)
+        if not placed:
+            return None
+        pad = self.outline_width + 2
+        top = max(0, placed[0][2] - pad)
+        bottom = min(self.height, placed[-1][2] + self.line_height + pad)
+        canvas = Image.new('RGBA', (self.width, bottom - top), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(canvas)
+        for line, x_pos, y_pos in placed:
+            draw.text((x_pos, y_pos - top), line, font=self.font, fill=(255, 255, 255, 255),
+                      stroke_width=self.outline_width, stroke_fill=(0, 0, 0, 255))
+
+        rgba = np.asarray(canvas)
+        rows = np.flatnonzero(rgba[:, :, 3].any(axis=1))
+        cols = np.flatnonzero(rgba[:, :, 3].any(axis=0))
+        if not len(rows):
+            return None
+        rgba = rgba[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        return SubtitleSprite(rgba, int(cols[0]), int(top + rows[0]))
+
+    def sprite(self, texts):
+        """Cached sprite for a set of lines (None when nothing is drawn)"""
+        key = tuple(texts)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        self.misses += 1
+        sprite = self.rasterize(key)
+        self.cache[key] = sprite
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return sprite
+
+    def draw(self, frame, texts):
+        """Overlay texts on a BGR frame in place, returns the frame"""
+        sprite = self.sprite(texts)
+        if sprite is not None:
+            sprite.blend(frame)
+        return frame
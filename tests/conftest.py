@@ -0,0 +1,8 @@
+"""Make the flat top-level modules importable from the tests
+Cho phép import các module ở thư mục gốc trong tests
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
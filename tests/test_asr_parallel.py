@@ -0,0 +1,63 @@
+"""Tests for window planning and seam stitching of chunked ASR
+Kiểm thử chia cửa sổ và ghép đường nối khi nhận dạng song song
+"""
+
+from asr_parallel import plan_windows, stitch_windows
+
+
+def window(start, end, *segments):
+    return {
+        'start': start, 'end': end, 'language': 'zh', 'elapsed': 0.0,
+        'segments': [{'start': s, 'end': e, 'text': t} for s, e, t in segments]
+    }
+
+
+def test_plan_windows_covers_everything_with_overlap():
+    windows = plan_windows(35, chunk_seconds=10, overlap_seconds=2, sample_rate=1)
+    assert windows == [(0, 10), (8, 18), (16, 26), (24, 34), (32, 35)]
+
+
+def test_plan_windows_short_audio_is_one_window():
+    assert plan_windows(5, chunk_seconds=10, overlap_seconds=2, sample_rate=1) == [(0, 5)]
+    assert plan_windows(0, chunk_seconds=10, sample_rate=1) == []
+
+
+def test_plan_windows_overlap_capped_at_half_a_chunk():
+    windows = plan_windows(30, chunk_seconds=10, overlap_seconds=8, sample_rate=1)
+    assert windows[1][0] == 5
+
+
+def test_stitch_keeps_each_segment_on_its_side_of_the_seam():
+    # Overlap is 8-10, so the seam is at 9
+    segments = stitch_windows([
+        window(0, 10, (0, 4, 'one'), (5, 8.5, 'two'), (9.2, 10, 'cut off')),
+        window(8, 18, (8, 8.6, 'two'), (9.5, 12, 'three'), (13, 17, 'four')),
+    ])
+    assert [s['text'] for s in segments] == ['one', 'two', 'three', 'four']
+    assert [s['id'] for s in segments] == [0, 1, 2, 3]
+
+
+def test_stitch_merges_duplicate_straddling_the_seam():
+    # Both windows read the line across the seam; the longer reading wins
+    segments = stitch_windows([
+        window(0, 10, (0, 4, 'one'), (7, 8.9, 'hello there')),
+        window(8, 18, (8.8, 10, 'hello there friend'), (11, 12, 'next')),
+    ])
+    assert [s['text'] for s in segments] == ['one', 'hello there friend', 'next']
+
+
+def test_stitch_trims_overlapping_distinct_segment():
+    segments = stitch_windows([
+        window(0, 10, (6, 8.9, 'first line')),
+        window(8, 18, (8.5, 11, 'something else')),
+    ])
+    assert [s['text'] for s in segments] == ['first line', 'something else']
+    assert segments[1]['start'] == segments[0]['end'] == 8.9
+
+
+def test_stitch_sorts_windows_by_start():
+    segments = stitch_windows([
+        window(8, 18, (12, 13, 'b')),
+        window(0, 10, (1, 2, 'a')),
+    ])
+    assert [s['text'] for s in segments] == ['a', 'b']
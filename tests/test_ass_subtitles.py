@@ -0,0 +1,47 @@
+"""Tests for ASS document generation and filtergraph escaping
+Kiểm thử tạo tệp ASS và thoát ký tự trong filtergraph
+"""
+
+from ass_subtitles import ass_timestamp, build_ass, escape_ass_text
+from video_encoder import escape_filter_value
+
+
+def test_ass_timestamp():
+    assert ass_timestamp(0) == '0:00:00.00'
+    assert ass_timestamp(3725.456) == '1:02:05.46'
+    assert ass_timestamp(-1) == '0:00:00.00'
+
+
+def test_escape_ass_text():
+    assert escape_ass_text('line one\nline two ') == 'line one\\Nline two'
+    assert escape_ass_text('{\\b1}bold') == '\\{\\\u2060b1\\}bold'
+
+
+def test_build_ass():
+    document = build_ass([
+        {'start': 2.0, 'end': 3.0, 'text': 'second'},
+        {'start': 0.0, 'end': 1.5, 'text': 'first\nline'},
+        {'start': 4.0, 'end': 4.0, 'text': 'zero length'},
+        {'start': 5.0, 'end': 6.0, 'text': '   '},
+    ], 1920, 1080, font_name='Noto Sans')
+    lines = document.splitlines()
+    assert 'PlayResX: 1920' in lines
+    assert 'PlayResY: 1080' in lines
+    style = next(line for line in lines if line.startswith('Style: Default,'))
+    fields = style[len('Style: '):].split(',')
+    assert fields[1] == 'Noto Sans'
+    assert int(fields[2]) >= 27
+    assert fields[-4:] == ['96', '96', '30', '1']
+    events = [line for line in lines if line.startswith('Dialogue:')]
+    assert events == [
+        'Dialogue: 0,0:00:00.00,0:00:01.50,Default,,0,0,0,,first\\Nline',
+        'Dialogue: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,second',
+    ]
+
+
+def test_escape_filter_value():
+    assert escape_filter_value('/tmp/subs.ass') == '/tmp/subs.ass'
+    # ' and : are escaped for the option value, then backslashes, quotes and
+    # graph separators again for the filtergraph
+    assert escape_filter_value("C:/it's.ass") == r"C\\:/it\\\'s.ass"
+    assert escape_filter_value('a[1],b;c') == r'a\[1\]\,b\;c'
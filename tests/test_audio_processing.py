@@ -0,0 +1,49 @@
+"""Tests for mapping transcripts of compacted speech back to the original timeline
+Kiểm thử ánh xạ thời gian từ âm thanh đã cắt khoảng lặng về thời gian gốc
+"""
+
+import numpy as np
+import pytest
+
+from audio_processing import compact_speech, map_times, remap_transcription
+
+
+@pytest.fixture
+def time_map():
+    # Speech at 1-3 s and 10-12 s of a 1 Hz "recording"
+    audio = np.arange(20, dtype=np.float32)
+    compact, time_map = compact_speech(audio, [(1, 3), (10, 12)], sample_rate=1)
+    assert compact.tolist() == [1, 2, 10, 11]
+    return time_map
+
+
+def test_map_times(time_map):
+    assert map_times([0, 1.5, 2, 3.5], time_map).tolist() == [1, 2.5, 10, 11.5]
+
+
+def test_remap_keeps_segment_end_in_the_island_it_closes(time_map):
+    result = {'segments': [
+        {'start': 0.0, 'end': 2.0, 'text': 'a'},
+        {'start': 2.0, 'end': 4.0, 'text': 'b'},
+    ]}
+    segments = remap_transcription(result, time_map)['segments']
+    assert segments[0]['start'] == 1.0
+    assert segments[0]['end'] == pytest.approx(3.0)
+    assert segments[1]['start'] == 10.0
+    assert segments[1]['end'] == pytest.approx(12.0)
+
+
+def test_remap_moves_words_too(time_map):
+    result = {'segments': [{'start': 1.0, 'end': 3.0, 'text': 'ab', 'words': [
+        {'start': 1.0, 'end': 2.0, 'word': 'a'},
+        {'start': 2.0, 'end': 3.0, 'word': 'b'},
+    ]}]}
+    words = remap_transcription(result, time_map)['segments'][0]['words']
+    assert [w['start'] for w in words] == [2.0, 10.0]
+    assert [w['end'] for w in words] == pytest.approx([3.0, 11.0])
+
+
+def test_remap_without_time_map_is_a_no_op():
+    result = {'segments': [{'start': 1.0, 'end': 2.0, 'text': 'a'}]}
+    assert remap_transcription(result, None) == {'segments': [{'start': 1.0, 'end': 2.0, 'text': 'a'}]}
+    assert remap_transcription(result, np.zeros((0, 3)))['segments'][0]['end'] == 2.0
@@ -0,0 +1,61 @@
+"""Tests for OCR text comparison and coalescing readings into spans
+Kiểm thử so sánh văn bản OCR và gộp các lần đọc thành đoạn phụ đề
+"""
+
+import pytest
+
+from ocr_processing import coalesce_detections, edit_distance, text_similarity
+
+
+@pytest.mark.parametrize('a, b, distance', [
+    ('', '', 0),
+    ('abc', '', 3),
+    ('kitten', 'sitting', 3),
+    ('你好世界', '你好世', 1),
+    ('flaw', 'lawn', 2),
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b) == distance
+    assert edit_distance(b, a) == distance
+
+
+def test_text_similarity_ignores_whitespace():
+    assert text_similarity('你 好 世 界', '你好世界') == 1.0
+    assert text_similarity('', '你好') == 0.0
+
+
+def reading(timestamp, text, confidence=90.0):
+    return {'timestamp': timestamp, 'text': text, 'confidence': confidence}
+
+
+def test_coalesce_joins_consecutive_similar_readings():
+    spans = coalesce_detections([
+        reading(1.0, '今天天气很好'),
+        reading(1.5, '今天天气很好'),
+        reading(2.0, '今天天气很奸', 40.0),
+        reading(2.5, '我们去公园吧'),
+    ], interval=0.5)
+    assert [(s['start'], s['end'], s['text'], s['samples']) for s in spans] == [
+        (1.0, 2.5, '今天天气很好', 3),
+        (2.5, 3.0, '我们去公园吧', 1),
+    ]
+
+
+def test_coalesce_prefers_the_reading_seen_most():
+    # One confident misread loses to a line read the same way twice
+    spans = coalesce_detections([
+        reading(0.0, '你好世界', 60.0),
+        reading(0.5, '你好世果', 95.0),
+        reading(1.0, '你好世界', 60.0),
+    ], interval=0.5)
+    assert len(spans) == 1
+    assert spans[0]['text'] == '你好世界'
+
+
+def test_coalesce_splits_on_a_gap():
+    spans = coalesce_detections([reading(0.0, '你好'), reading(2.0, '你好')], interval=0.5)
+    assert [(s['start'], s['end']) for s in spans] == [(0.0, 0.5), (2.0, 2.5)]
+
+
+def test_coalesce_nothing():
+    assert coalesce_detections([], interval=0.5) == []
@@ -0,0 +1,53 @@
+"""Tests for the per-frame subtitle timeline
+Kiểm thử dòng thời gian phụ đề theo từng khung hình
+"""
+
+import math
+
+from subtitle_render import EMPTY_SET, SubtitleTimeline
+
+SUBTITLES = [
+    {'start': 0.5, 'end': 2.0, 'text': 'one'},
+    {'start': 1.5, 'end': 3.0, 'text': 'two'},
+    {'start': 3.0, 'end': 3.0, 'text': 'flash'},
+    {'start': 5.0, 'end': 4.0, 'text': 'backwards'},
+    {'start': 6.04, 'end': 6.06, 'text': 'between frames'},
+]
+
+
+def naive_texts(subtitles, frame, fps):
+    time = frame / fps
+    return [s['text'] for s in subtitles if s['start'] <= time <= s['end']]
+
+
+def test_timeline_matches_a_naive_scan():
+    fps = 10
+    timeline = SubtitleTimeline(SUBTITLES, fps)
+    ids = timeline.set_ids(80)
+    for frame in range(80):
+        expected = naive_texts(SUBTITLES, frame, fps)
+        assert timeline.texts(timeline.set_at(frame)) == expected
+        assert timeline.texts(ids[frame]) == expected
+
+
+def test_set_at_handles_frames_out_of_order():
+    timeline = SubtitleTimeline(SUBTITLES, 10)
+    assert timeline.texts(timeline.set_at(25)) == ['two']
+    assert timeline.texts(timeline.set_at(5)) == ['one']
+    assert timeline.texts(timeline.set_at(17)) == ['one', 'two']
+    assert timeline.set_at(0) == EMPTY_SET
+
+
+def test_inclusive_end_on_a_frame_boundary():
+    fps = 23.976
+    subtitles = [{'start': 1001 / fps, 'end': 1003 / fps, 'text': 'x'}]
+    timeline = SubtitleTimeline(subtitles, fps)
+    assert [timeline.set_at(f) != EMPTY_SET for f in range(1000, 1005)] == [False, True, True, True, False]
+    assert math.isclose(subtitles[0]['start'] * fps, 1001)
+
+
+def test_distinct_sets():
+    timeline = SubtitleTimeline(SUBTITLES, 10)
+    # {one}, {one, two}, {two}, {two, flash}
+    assert timeline.distinct_sets == 4
+    assert SubtitleTimeline([], 25).set_ids(3).tolist() == [EMPTY_SET] * 3
@@ -0,0 +1,46 @@
+"""Tests for subtitle line breaking
+Kiểm thử ngắt dòng phụ đề
+"""
+
+import pytest
+
+from text_layout import CELL_METRICS, NO_LINE_END, NO_LINE_START, break_text, layout_lines
+
+
+def test_latin_breaks_between_words():
+    assert layout_lines('the quick brown fox', 10) == ('the quick', 'brown fox')
+
+
+def test_cjk_counts_two_cells_per_character():
+    assert CELL_METRICS.width('你好') == 4
+    assert layout_lines('你好世界再见', 8) == ('你好世界', '再见')
+
+
+def test_overlong_word_is_cut():
+    assert layout_lines('abcdefghij', 4) == ('abcd', 'efgh', 'ij')
+
+
+@pytest.mark.parametrize('text', [
+    '我们今天去公园，然后回家。',
+    '他说：“你好！”我们（一起）走吧？',
+    '「今天」「明天」「后天」「大后天」',
+    '一二三四五六七，八九十。',
+])
+@pytest.mark.parametrize('width', [6, 8, 10, 12])
+def test_kinsoku(text, width):
+    lines = layout_lines(text, width)
+    assert ''.join(lines) == text
+    for line in lines[1:]:
+        assert line[0] not in NO_LINE_START
+    for line in lines[:-1]:
+        assert line[-1] not in NO_LINE_END
+
+
+def test_comma_stays_with_the_previous_character():
+    # A plain greedy break would start the second line with '，'
+    assert layout_lines('一二三四，五六', 8) == ('一二三', '四，五六')
+
+
+def test_break_text_leaves_short_text_alone():
+    assert break_text('hello\nworld', 20) == 'hello\nworld'
+    assert break_text('hello world', 6) == 'hello\nworld'
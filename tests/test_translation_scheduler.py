@@ -0,0 +1,76 @@
+"""Tests for batch planning and mismatch splitting of the translation scheduler
+Kiểm thử chia lô và tách lô lệch dòng khi dịch
+"""
+
+import pytest
+
+from translation_backends import BatchMismatchError
+from translation_scheduler import TranslationScheduler, plan_batches
+
+
+def test_plan_batches_respects_chars_and_items():
+    texts = ['aaaa', 'bbbb', 'cc', 'd', 'e']
+    # 'aaaa\nbbbb' is 9 chars, adding '\ncc' would make 12
+    assert plan_batches(texts, max_chars=10, max_items=10) == [['aaaa', 'bbbb'], ['cc', 'd', 'e']]
+    assert plan_batches(texts, max_chars=100, max_items=2) == [['aaaa', 'bbbb'], ['cc', 'd'], ['e']]
+
+
+def test_plan_batches_oversized_text_gets_its_own_batch():
+    assert plan_batches(['x' * 20, 'y'], max_chars=10) == [['x' * 20], ['y']]
+    assert plan_batches([]) == []
+
+
+def make_scheduler(translate_batch, **options):
+    options.setdefault('concurrency', 1)
+    return TranslationScheduler(translate_batch, requests_per_second=0, backoff_seconds=0, **options)
+
+
+def test_run_batch_splits_mismatched_batch_into_single_requests():
+    calls = []
+
+    def translate_batch(texts):
+        calls.append(list(texts))
+        if len(texts) > 1:
+            raise BatchMismatchError("line count differs")
+        return [text.upper() for text in texts]
+
+    scheduler = make_scheduler(translate_batch)
+    assert scheduler.run_batch(['a', 'b', 'c']) == ['A', 'B', 'C']
+    assert calls == [['a', 'b', 'c'], ['a'], ['b'], ['c']]
+    assert scheduler.stats['requests'] == 4
+    assert scheduler.stats['retries'] == 0
+
+
+def test_run_batch_mismatch_on_single_text_is_raised():
+    def translate_batch(texts):
+        raise BatchMismatchError("empty reply")
+
+    with pytest.raises(BatchMismatchError):
+        make_scheduler(translate_batch, retries=3).run_batch(['a'])
+
+
+def test_run_batch_split_stops_when_asked():
+    calls = []
+
+    def translate_batch(texts):
+        calls.append(list(texts))
+        if len(texts) > 1:
+            raise BatchMismatchError("line count differs")
+        return texts
+
+    stop = iter([False, False, True, True])
+    assert make_scheduler(translate_batch).run_batch(['a', 'b', 'c'], lambda: next(stop)) is None
+    assert calls == [['a', 'b', 'c'], ['a']]
+
+
+def test_translate_all_keeps_input_order():
+    def translate_batch(texts):
+        if len(texts) > 1:
+            raise BatchMismatchError("line count differs")
+        return [f"<{text}>" for text in texts]
+
+    texts = [f"line {i}" for i in range(7)]
+    scheduler = make_scheduler(translate_batch, concurrency=3, max_batch_items=3)
+    translations, errors = scheduler.translate_all(texts)
+    assert translations == [f"<{text}>" for text in texts]
+    assert errors == []
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Text Layout - Glyph width cache and line breaking for subtitles
+Đo độ rộng ký tự (có cache) và ngắt dòng đúng cho tiếng Việt và chữ Hán
+
+Text is measured as the sum of cached per-character advances, so wrapping
+a line costs one dictionary lookup per character instead of one font
+measurement per candidate prefix. Latin and Vietnamese text breaks at
+spaces; CJK text can break between any two ideographs, except that closing
+punctuation never starts a line and opening punctuation never ends one.
+Layouts are memoised per (text, metrics, width), and the same engine serves
+the SRT line length limit (CELL_METRICS, in characters) and the burn-in
+renderer (FontMetrics, in pixels).
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+LAYOUT_CACHE_SIZE = 4096
+
+# Ideographs, kana, hangul and full-width forms: each is a breakable unit
+CJK_PATTERN = (
+    '\u2e80-\u2fff\u3000-\u30ff\u3100-\u31ff\u3400-\u4dbf\u4e00-\u9fff'
+    '\uac00-\ud7af\uf900-\ufaff\ufe30-\ufe4f\uff00-\uffef'
+)
+TOKEN_RE = re.compile(f'\\s+|[{CJK_PATTERN}]|[^\\s{CJK_PATTERN}]+')
+# Kinsoku: characters that must not start / end a line
+NO_LINE_START = set('，。、；：！？）」』》〉】〕”’…‥・ー〜,.;:!?)]}%')
+NO_LINE_END = set('（「『《〈【〔“‘([{')
+
+
+class CellMetrics:
+    """Width in character cells: combining marks take none, wide (CJK) characters two"""
+
+    def __init__(self):
+        self.advances = {}
+
+    def advance(self, char):
+        width = self.advances.get(char)
+        if width is None:
+            if unicodedata.combining(char):
+                width = 0
+            elif unicodedata.east_asian_width(char) in ('W', 'F'):
+                width = 2
+            else:
+                width = 1
+            self.advances[char] = width
+        return width
+
+    def width(self, text):
+        advance = self.advance
+        return sum(advance(char) for char in text)
+
+
+class FontMetrics(CellMetrics):
+    """Width in pixels from a PIL font, one measurement per distinct character"""
+
+    def __init__(self, font):
+        super().__init__()
+        self.font = font
+
+    def advance(self, char):
+        width = self.advances.get(char)
+        if width is None:
+            # Diacritics are drawn over the previous letter
+            width = 0 if unicodedata.combining(char) else self.font.getlength(char)
+            self.advances[char] = width
+        return width
+
+
+CELL_METRICS = CellMetrics()
+_font_metrics = {}
+
+
+def font_metrics(font):
+    """Shared FontMetrics for a font object, so its glyph widths are measured once"""
+    metrics = _font_metrics.get(id(font))
+    if metrics is None or metrics.font is not font:
+        metrics = _font_metrics[id(font)] = FontMetrics(font)
+    return metrics
+
+
+def tokenize(text):
+    """[(token, space_before)] with kinsoku punctuation glued to its neighbour"""
+    tokens = []
+    space = False
+    glue_next = False
+    for match in TOKEN_RE.finditer(unicodedata.normalize('NFC', text)):
+        token = match.group()
+        if token.isspace():
+            space = True
+            continue
+        if tokens and (glue_next or token[0] in NO_LINE_START):
+            previous, previous_space = tokens[-1]
+            tokens[-1] = (previous + (' ' if space else '') + token, previous_space)
+        else:
+            tokens.append((token, space))
+        glue_next = token[-1] in NO_LINE_END
+        space = False
+    return tokens
+
+
+def split_token(token, max_width, metrics):
+    """Cut a token wider than max_width into pieces that fit (at least one character each)"""
+    pieces = []
+    current = ''
+    current_width = 0
+    for char in token:
+        width = metrics.advance(char)
+        if current and current_width + width > max_width and width:
+            pieces.append(current)
+            current = ''
+            current_width = 0
+        current += char
+        current_width += width
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def layout_lines(text, max_width, metrics=CELL_METRICS):
+    """Greedy line breaks of text within max_width, returns a tuple of lines
+
+    Runs in time linear in the length of text. Newlines in text are treated
+    as spaces.
+    """
+    space_width = metrics.advance(' ')
+    lines = []
+    current = ''
+    current_width = 0
+    for token, space in tokenize(text):
+        width = metrics.width(token)
+        glue = space_width if (space and current) else 0
+        if current and current_width + glue + width <= max_width:
+            current += (' ' if space else '') + token
+            current_width += glue + width
+            continue
+        if current:
+            lines.append(current)
+        if width > max_width:
+            pieces = split_token(token, max_width, metrics)
+            lines.extend(pieces[:-1])
+            token = pieces[-1]
+            width = metrics.width(token)
+        current = token
+        current_width = width
+    if current:
+        lines.append(current)
+    return tuple(lines)
+
+
+def break_text(text, max_width, metrics=CELL_METRICS):
+    """text with newlines inserted so no line is wider than max_width"""
+    if metrics.width(text) <= max_width:
+        return text
+    return '\n'.join(layout_lines(text, max_width, metrics))
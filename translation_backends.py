@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Translation Backends - Pluggable translation providers
+Các engine dịch có thể thay thế (Google, bản giả lập offline để đo hiệu năng)
+
+Every backend translates a batch: translate_batch(texts) returns one
+translation per text, in order, and raises on failure. The class attributes
+are hints for the scheduler: how many texts and characters fit in one
+request, how many requests may be in flight and how many requests per second
+the provider accepts.
+"""
+
+import time
+import random
+import threading
+
+SOURCE_LANGUAGE = 'zh-CN'
+TARGET_LANGUAGE = 'vi'
+DEFAULT_TRANSLATION_BACKEND = 'google'
+# Lines of a batch are sent as one newline-separated text
+BATCH_SEPARATOR = '\n'
+
+
+class TranslationError(Exception):
+    """A translation request failed; retry_after (seconds) is set when the provider asked to slow down"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BatchMismatchError(TranslationError):
+    """The provider merged or split the lines of a joined batch; send the texts one by one"""
+
+
+class TranslationBackend:
+    """Base class for translation backends"""
+
+    name = None
+    label = None
+    max_batch_items = 50
+    max_batch_chars = 4500
+    concurrency = 4
+    requests_per_second = 5.0
+
+    def __init__(self, source=SOURCE_LANGUAGE, target=TARGET_LANGUAGE):
+        self.source = source
+        self.target = target
+
+    def is_available(self):
+        """Whether the packages this backend needs are installed"""
+        return True
+
+    def translate_batch(self, texts):
+        """List of translations for texts, in order"""
+        raise NotImplementedError
+
+    @property
+    def cache_key(self):
+        """(source_lang, target_lang, backend) for the translation memory"""
+        return (self.source, self.target, self.name)
+
+
+def joined_translate_batch(translate, texts):
+    """Translate texts in one request by joining them with newlines
+
+    Raises BatchMismatchError when the provider merges or splits lines; the
+    scheduler then sends the texts one per request, under its rate limit.
+    """
+    if len(texts) == 1:
+        return [translate(texts[0])]
+    # Multi-line OCR text would shift the lines of the batch
+    joined = translate(BATCH_SEPARATOR.join(' '.join(text.split()) for text in texts))
+    lines = [line.strip() for line in (joined or '').split(BATCH_SEPARATOR)]
+    if len(lines) != len(texts):
+        raise BatchMismatchError(f"Got {len(lines)} lines back for {len(texts)} texts")
+    return lines
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate through deep-translator (needs internet)"""
+
+    name = 'google'
+    label = "Google Translate"
+    # The free endpoint rejects texts over 5000 characters
+    max_batch_chars = 4500
+
+    def __init__(self, source=SOURCE_LANGUAGE, target=TARGET_LANGUAGE):
+        super().__init__(source, target)
+        # GoogleTranslator keeps the query in instance state, so scheduler threads can't share one
+        self.local = threading.local()
+
+    def is_available(self):
+        try:
+            import deep_translator
+            return True
+        except ImportError:
+            return False
+
+    def translate_batch(self, texts):
+        # deep-translator's translate_batch sends one request per text
+        translator = getattr(self.local, 'translator', None)
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = self.local.translator = GoogleTranslator(source=self.source, target=self.target)
+        return joined_translate_batch(translator.translate, texts)
+
+
+class LocalBackend(TranslationBackend):
+    """Offline stand-in that simulates a translation service
+
+    Nothing is translated: every text comes back tagged with the target
+    language. Each request takes latency + latency_per_char * characters
+    seconds (+/- jitter), fails with probability error_rate, and is rejected
+    with a retry_after hint when more than rate_limit requests arrive within
+    one second or more than max_concurrent are already running. Use it to
+    measure and tune batching, concurrency and retries without a network.
+    """
+
+    name = 'local'
+    label = "Local stand-in (offline)"
+    concurrency = 8
+    requests_per_second = 0.0
+
+    def __init__(self, source=SOURCE_LANGUAGE, target=TARGET_LANGUAGE, latency=0.2, latency_per_char=0.0002,
+                 jitter=0.1, error_rate=0.0, rate_limit=0.0, max_concurrent=0, seed=None):
+        super().__init__(source, target)
+        self.latency = float(latency)
+        self.latency_per_char = float(latency_per_char)
+        self.jitter = float(jitter)
+        self.error_rate = float(error_rate)
+        self.rate_limit = float(rate_limit)
+        self.max_concurrent = int(max_concurrent)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = []
+        self.running = 0
+        self.stats = {'requests': 0, 'texts': 0, 'chars': 0, 'rejected': 0, 'failed': 0}
+
+    def admit(self, texts):
+        """Count the request and apply the simulated limits"""
+        with self.lock:
+            now = time.monotonic()
+            self.stats['requests'] += 1
+            self.recent = [t for t in self.recent if now - t < 1.0]
+            if self.rate_limit > 0 and len(self.recent) >= self.rate_limit:
+                self.stats['rejected'] += 1
+                raise TranslationError("429 Too Many Requests", retry_after=1.0 - (now - self.recent[0]))
+            if self.max_concurrent > 0 and self.running >= self.max_concurrent:
+                self.stats['rejected'] += 1
+                raise TranslationError("503 Service Unavailable", retry_after=self.latency)
+            self.recent.append(now)
+            self.running += 1
+            failed = self.random.random() < self.error_rate
+            delay = self.latency + self.latency_per_char * sum(len(text) for text in texts)
+            delay *= 1 + self.random.uniform(-self.jitter, self.jitter)
+        return failed, max(0.0, delay)
+
+    def translate_batch(self, texts):
+        failed, delay = self.admit(texts)
+        try:
+            time.sleep(delay)
+        finally:
+            with self.lock:
+                self.running -= 1
+        if failed:
+            with self.lock:
+                self.stats['failed'] += 1
+            raise TranslationError("500 Simulated server error")
+        with self.lock:
+            self.stats['texts'] += len(texts)
+            self.stats['chars'] += sum(len(text) for text in texts)
+        return [f"[{self.target}] {text}" for text in texts]
+
+
+TRANSLATION_BACKENDS = {backend.name: backend for backend in (GoogleBackend, LocalBackend)}
+
+
+def create_translation_backend(name=None, source=SOURCE_LANGUAGE, target=TARGET_LANGUAGE, **options):
+    """Instantiate a backend by name; options go to its constructor"""
+    try:
+        backend = TRANSLATION_BACKENDS[name or DEFAULT_TRANSLATION_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unknown translation backend: {name}. Choose from {', '.join(TRANSLATION_BACKENDS)}")
+    return backend(source, target, **options)
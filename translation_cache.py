@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Translation Cache - Persistent translation memory in SQLite
+Bộ nhớ dịch lưu trên đĩa (SQLite): câu đã dịch không cần gọi mạng lại
+
+Entries are keyed by (normalised source text, source language, target
+language, backend). The least recently used entries are evicted once the
+cache grows past max_entries. Several processes (batch workers) can share
+one file.
+
+Usage:
+    python translation_cache.py stats
+    python translation_cache.py export memory.jsonl
+    python translation_cache.py import memory.jsonl
+    python translation_cache.py clear
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import unicodedata
+from pathlib import Path
+
+DEFAULT_CACHE_FILE = 'translation_cache.sqlite3'
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def normalize_source(text):
+    """Cache key form of a source string: NFKC, whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+
+class TranslationCache:
+    """SQLite-backed translation memory with LRU eviction and hit statistics"""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = str(path)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self.connection:
+            # WAL lets batch workers read while another process writes
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source TEXT NOT NULL, source_lang TEXT NOT NULL, target_lang TEXT NOT NULL,"
+                " backend TEXT NOT NULL, translation TEXT NOT NULL,"
+                " last_used REAL NOT NULL, uses INTEGER NOT NULL DEFAULT 1,"
+                " PRIMARY KEY (source, source_lang, target_lang, backend))"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)"
+            )
+
+    def get_many(self, texts, source_lang, target_lang, backend):
+        """{text: translation} for the texts that are cached"""
+        keys = {}
+        for text in texts:
+            keys.setdefault(normalize_source(text), []).append(text)
+        found = {}
+        now = time.time()
+        with self.lock, self.connection:
+            for key, originals in keys.items():
+                row = self.connection.execute(
+                    "SELECT translation FROM translations"
+                    " WHERE source = ? AND source_lang = ? AND target_lang = ? AND backend = ?",
+                    (key, source_lang, target_lang, backend)
+                ).fetchone()
+                if row is None:
+                    self.misses += len(originals)
+                    continue
+                self.hits += len(originals)
+                self.connection.execute(
+                    "UPDATE translations SET last_used = ?, uses = uses + 1"
+                    " WHERE source = ? AND source_lang = ? AND target_lang = ? AND backend = ?",
+                    (now, key, source_lang, target_lang, backend)
+                )
+                for text in originals:
+                    found[text] = row[0]
+        return found
+
+    def put_many(self, translations, source_lang, target_lang, backend):
+        """Store {text: translation} and evict the oldest entries past max_entries"""
+        now = time.time()
+        rows = [
+            (normalize_source(text), source_lang, target_lang, backend, translation, now)
+            for text, translation in translations.items() if text.strip() and translation
+        ]
+        if not rows:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations"
+                " (source, source_lang, target_lang, backend, translation, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries beyond max_entries (caller holds the lock)"""
+        count = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def export(self, output_file):
+        """Write all entries as JSON lines, returns the number written"""
+        count = 0
+        with self.lock, open(output_file, 'w', encoding='utf-8') as f:
+            for row in self.connection.execute(
+                "SELECT source, source_lang, target_lang, backend, translation, last_used, uses"
+                " FROM translations ORDER BY last_used"
+            ):
+                entry = dict(zip(('source', 'source_lang', 'target_lang', 'backend',
+                                  'translation', 'last_used', 'uses'), row))
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                count += 1
+        return count
+
+    def import_file(self, input_file):
+        """Merge entries exported by export(), returns the number read"""
+        rows = []
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                rows.append((
+                    normalize_source(entry['source']), entry['source_lang'], entry['target_lang'],
+                    entry['backend'], entry['translation'], entry.get('last_used', time.time()),
+                    entry.get('uses', 1)
+                ))
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations"
+                " (source, source_lang, target_lang, backend, translation, last_used, uses)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.evict()
+        return len(rows)
+
+    def clear(self):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM translations")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and move the translation memory")
+    parser.add_argument('command', choices=['stats', 'export', 'import', 'clear'])
+    parser.add_argument('file', nargs='?', help="JSON lines file for export/import")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_FILE, help="Cache database (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command in ('export', 'import') and not args.file:
+        parser.error(f"{args.command} needs a file")
+    if args.command != 'import' and not Path(args.cache).exists():
+        print(f"❌ No translation cache at {args.cache}")
+        return 1
+
+    cache = TranslationCache(args.cache)
+    try:
+        if args.command == 'stats':
+            print(f"📚 {args.cache}: {len(cache)} cached translations")
+        elif args.command == 'export':
+            print(f"📤 Exported {cache.export(args.file)} translations to {args.file}")
+        elif args.command == 'import':
+            print(f"📥 Imported {cache.import_file(args.file)} translations, {len(cache)} in cache")
+        elif args.command == 'clear':
+            cache.clear()
+            print("🗑️ Translation cache cleared")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Translation Scheduler - Batched, concurrent, rate-limited translation
+Dịch theo lô, song song có giới hạn, giới hạn tốc độ và tự thử lại khi lỗi
+
+Strings are de-duplicated, looked up in the translation memory, packed into
+batches and sent over a bounded thread pool. A token bucket keeps requests
+under the provider's quota and failed batches are retried with exponential
+backoff. Results come back in input order.
+"""
+
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from translation_cache import normalize_source
+from translation_backends import BATCH_SEPARATOR, BatchMismatchError
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_BATCH_CHARS = 4500
+DEFAULT_BATCH_ITEMS = 50
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF_SECONDS = 1.0
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+def plan_batches(texts, max_chars=DEFAULT_BATCH_CHARS, max_items=DEFAULT_BATCH_ITEMS):
+    """Greedily pack texts into batches under max_chars (joined) and max_items"""
+    batches = []
+    current = []
+    size = 0
+    for text in texts:
+        added = len(text) + (len(BATCH_SEPARATOR) if current else 0)
+        if current and (size + added > max_chars or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            size = 0
+            added = len(text)
+        current.append(text)
+        size += added
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TranslationScheduler:
+    """Translate many strings with batching, bounded concurrency, rate limiting and retries
+
+    translate_batch(list_of_texts) -> list_of_translations does the actual
+    request. cache (a TranslationCache) and cache_key (source_lang,
+    target_lang, backend) are optional.
+    """
+
+    def __init__(self, translate_batch, concurrency=DEFAULT_CONCURRENCY,
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, max_batch_chars=DEFAULT_BATCH_CHARS,
+                 max_batch_items=DEFAULT_BATCH_ITEMS, retries=DEFAULT_RETRIES,
+                 backoff_seconds=DEFAULT_BACKOFF_SECONDS, cache=None, cache_key=None):
+        self.translate_batch = translate_batch
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(requests_per_second)
+        self.max_batch_chars = int(max_batch_chars)
+        self.max_batch_items = int(max_batch_items)
+        self.retries = int(retries)
+        self.backoff_seconds = float(backoff_seconds)
+        self.cache = cache
+        self.cache_key = cache_key
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @classmethod
+    def for_backend(cls, backend, concurrency=None, requests_per_second=None, **options):
+        """Scheduler for a TranslationBackend, using its batch and concurrency hints unless overridden"""
+        options.setdefault('max_batch_chars', backend.max_batch_chars)
+        options.setdefault('max_batch_items', backend.max_batch_items)
+        options.setdefault('cache_key', backend.cache_key)
+        return cls(
+            backend.translate_batch,
+            concurrency=backend.concurrency if concurrency is None else concurrency,
+            requests_per_second=backend.requests_per_second if requests_per_second is None else requests_per_second,
+            **options
+        )
+
+    def reset_stats(self):
+        self.stats = {'texts': 0, 'unique': 0, 'cached': 0, 'requests': 0, 'retries': 0,
+                      'failed': 0, 'elapsed': 0.0}
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def run_batch(self, batch, stop_callback=None):
+        """Translate one batch, retrying with exponential backoff and jitter
+
+        A batch whose lines don't line up is split into single-text
+        requests, each waiting for the token bucket like any other request.
+        """
+        for attempt in range(self.retries + 1):
+            if stop_callback and stop_callback():
+                return None
+            self.bucket.acquire()
+            self.count('requests')
+            try:
+                translations = self.translate_batch(batch)
+                if len(translations) != len(batch):
+                    raise ValueError(f"Got {len(translations)} translations for {len(batch)} texts")
+                return translations
+            except BatchMismatchError:
+                if len(batch) == 1:
+                    raise
+                translations = []
+                for text in batch:
+                    translation = self.run_batch([text], stop_callback)
+                    if translation is None:
+                        return None
+                    translations.extend(translation)
+                return translations
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                self.count('retries')
+                delay = self.backoff_seconds * (2 ** attempt)
+                delay += random.uniform(0, delay / 2)
+                # Rate-limited providers say how long to wait
+                time.sleep(max(delay, getattr(e, 'retry_after', None) or 0))
+
+    def translate_all(self, texts, stop_callback=None, progress_callback=None):
+        """Translations for texts in input order; None where a text could not be translated
+
+        Returns (translations, errors) where errors lists the exceptions of
+        batches that failed after all retries.
+        """
+        started = time.time()
+        self.stats['texts'] += len(texts)
+
+        # One request per distinct (normalised) string
+        unique = {}
+        for text in texts:
+            if text.strip():
+                unique.setdefault(normalize_source(text), text)
+        self.stats['unique'] += len(unique)
+
+        results = {}
+        if self.cache is not None:
+            cached = self.cache.get_many(list(unique.values()), *self.cache_key)
+            for text, translation in cached.items():
+                results[normalize_source(text)] = translation
+            self.stats['cached'] += len(cached)
+        pending_texts = [text for key, text in unique.items() if key not in results]
+
+        batches = plan_batches(pending_texts, self.max_batch_chars, self.max_batch_items)
+        errors = []
+        done_count = 0
+        if batches:
+            executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches)))
+            try:
+                futures = {executor.submit(self.run_batch, batch, stop_callback): batch for batch in batches}
+                pending = set(futures)
+                while pending:
+                    if stop_callback and stop_callback():
+                        break
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch = futures[future]
+                        try:
+                            translations = future.result()
+                        except Exception as e:
+                            self.stats['failed'] += len(batch)
+                            errors.append(e)
+                            continue
+                        if translations is None:
+                            continue
+                        fresh = {}
+                        for text, translation in zip(batch, translations):
+                            if translation:
+                                results[normalize_source(text)] = translation
+                                fresh[text] = translation
+                        if self.cache is not None and fresh:
+                            self.cache.put_many(fresh, *self.cache_key)
+                        done_count += len(batch)
+                        if progress_callback:
+                            progress_callback(done_count, len(pending_texts))
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        self.stats['elapsed'] += time.time() - started
+        translations = [results.get(normalize_source(text)) if text.strip() else text for text in texts]
+        return translations, errors
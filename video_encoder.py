@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Video Encoder - Single-pass H.264 output through an ffmpeg pipe
+Ghi video một lần duy nhất: frame đi thẳng vào ffmpeg, âm thanh gốc được copy
+
+Rendered BGR frames are streamed to one ffmpeg process that encodes them
+with libx264 and muxes the source's audio stream in the same run, copied
+as-is when MP4 can carry the codec. No intermediate video file, no second
+encode. burn_ass_subtitles() skips Python entirely: ffmpeg's libass filter
+draws an ASS file onto the decoded frames.
+"""
+
+import re
+import subprocess
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from audio_processing import get_ffmpeg_exe
+
+VIDEO_PRESETS = ('ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow')
+DEFAULT_PRESET = 'medium'
+DEFAULT_CRF = 20
+# 'ffmpeg' burns an ASS file with libass, 'python' draws frames with SubtitleRenderer
+OVERLAY_ENGINES = ('auto', 'ffmpeg', 'python')
+# Audio codecs the MP4 container can hold without re-encoding
+MP4_AUDIO_CODECS = ('aac', 'mp3', 'ac3', 'eac3', 'alac', 'opus', 'flac')
+
+
+def probe_audio_codec(video_file):
+    """Codec name of the first audio stream of video_file, or None when it has no audio"""
+    cmd = [get_ffmpeg_exe(), '-hide_banner', '-nostdin', '-i', str(video_file)]
+    # Without an output ffmpeg exits with an error after printing the stream list
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    match = re.search(r'Stream #\d+:\d+.*?: Audio: (\w+)', result.stderr.decode(errors='ignore'))
+    return match.group(1) if match else None
+
+
+def audio_arguments(video_file, input_index=1):
+    """ffmpeg output arguments that carry over the source audio, copying it when possible"""
+    codec = probe_audio_codec(video_file)
+    if codec is None:
+        return []
+    args = ['-map', f'{input_index}:a:0']
+    if codec in MP4_AUDIO_CODECS:
+        return args + ['-c:a', 'copy']
+    return args + ['-c:a', 'aac', '-b:a', '192k']
+
+
+class VideoEncoder:
+    """Write BGR frames to an H.264 MP4 with one ffmpeg process
+
+    audio_source is a media file whose first audio stream is muxed in.
+    Use as a context manager or call close(); abort() stops early and
+    removes the partial file.
+    """
+
+    def __init__(self, output_file, width, height, fps, audio_source=None, preset=DEFAULT_PRESET,
+                 crf=DEFAULT_CRF):
+        if preset not in VIDEO_PRESETS:
+            raise ValueError(f"Unknown x264 preset: {preset}. Choose from {', '.join(VIDEO_PRESETS)}")
+        self.output_file = str(output_file)
+        self.width = int(width)
+        self.height = int(height)
+        self.frame_bytes = self.width * self.height * 3
+        self.frames = 0
+
+        cmd = [get_ffmpeg_exe(), '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+               '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{self.width}x{self.height}',
+               '-r', f'{fps}', '-i', '-']
+        audio = []
+        if audio_source:
+            cmd += ['-i', str(audio_source)]
+            audio = audio_arguments(audio_source)
+        # yuv420p needs even dimensions
+        cmd += ['-map', '0:v:0', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                '-c:v', 'libx264', '-preset', preset, '-crf', str(crf), '-pix_fmt', 'yuv420p']
+        cmd += audio
+        if audio:
+            cmd += ['-shortest']
+        cmd += ['-movflags', '+faststart', self.output_file]
+
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                        stderr=self.stderr, bufsize=self.frame_bytes)
+
+    def write(self, frame):
+        """Append one BGR frame of the configured size"""
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes != self.frame_bytes:
+            raise ValueError(f"Frame is {frame.shape}, encoder expects {self.height}x{self.width}x3")
+        try:
+            self.process.stdin.write(frame.data)
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg stopped encoding: {self.error_output()}")
+        self.frames += 1
+
+    def error_output(self):
+        self.process.wait()
+        self.stderr.seek(0)
+        return self.stderr.read().decode(errors='ignore').strip()
+
+    def close(self):
+        """Finish encoding; raises RuntimeError if ffmpeg failed"""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.process.wait()
+        error = self.error_output()
+        self.process = None
+        self.stderr.close()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to encode video: {error}")
+
+    def abort(self):
+        """Stop encoding and delete the unfinished output"""
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.wait()
+        self.process = None
+        self.stderr.close()
+        Path(self.output_file).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def escape_filter_value(value):
+    """value escaped as a filter option inside a -vf filtergraph"""
+    for special in '\\\':':
+        value = value.replace(special, '\\' + special)
+    for special in "\\'[],;":
+        value = value.replace(special, '\\' + special)
+    return value
+
+
+@lru_cache(maxsize=None)
+def libass_available():
+    """Whether this ffmpeg build has the libass 'ass' filter"""
+    try:
+        result = subprocess.run([get_ffmpeg_exe(), '-hide_banner', '-filters'],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except (RuntimeError, OSError):
+        return False
+    return re.search(r'^\s*\S+\s+ass\s', result.stdout.decode(errors='ignore'), re.MULTILINE) is not None
+
+
+def burn_ass_subtitles(video_file, ass_file, output_file, preset=DEFAULT_PRESET, crf=DEFAULT_CRF,
+                       progress_callback=None, stop_callback=None):
+    """Burn an ASS file into video_file with ffmpeg/libass, copying the audio
+
+    progress_callback(seconds_done) is called as encoding advances. Returns
+    False (and removes the partial output) when stop_callback asks to stop.
+    """
+    if preset not in VIDEO_PRESETS:
+        raise ValueError(f"Unknown x264 preset: {preset}. Choose from {', '.join(VIDEO_PRESETS)}")
+    ass_file = Path(ass_file).resolve()
+    # ffmpeg runs in the ASS file's folder, so a drive letter never reaches the filter syntax
+    filename = escape_filter_value(ass_file.name)
+    cmd = [get_ffmpeg_exe(), '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+           '-i', str(Path(video_file).resolve()),
+           '-map', '0:v:0', '-vf', f"ass=filename={filename},pad=ceil(iw/2)*2:ceil(ih/2)*2",
+           '-c:v', 'libx264', '-preset', preset, '-crf', str(crf), '-pix_fmt', 'yuv420p', '-threads', '0']
+    cmd += audio_arguments(video_file, input_index=0)
+    cmd += ['-movflags', '+faststart', '-progress', 'pipe:1', '-nostats', str(Path(output_file).resolve())]
+
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(cmd, cwd=str(ass_file.parent), stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            for line in process.stdout:
+                if stop_callback and stop_callback():
+                    process.kill()
+                    process.wait()
+                    Path(output_file).unlink(missing_ok=True)
+                    return False
+                key, _, value = line.decode(errors='ignore').strip().partition('=')
+                if key == 'out_time_us' and value.isdigit() and progress_callback:
+                    progress_callback(int(value) / 1e6)
+        finally:
+            if process.poll() is None:
+                process.wait()
+        if process.returncode != 0:
+            stderr.seek(0)
+            error = stderr.read().decode(errors='ignore').strip()
+            Path(output_file).unlink(missing_ok=True)
+            raise RuntimeError(f"ffmpeg failed to burn subtitles: {error}")
+    return True
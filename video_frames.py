@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Video Frames - Sampled frame reader for OCR
+Đọc frame theo khoảng thời gian (chỉ giải mã frame cần OCR) qua ffmpeg
+"""
+
+import math
+import subprocess
+import cv2
+import numpy as np
+
+from audio_processing import get_ffmpeg_exe
+
+
+def get_video_info(video_file):
+    """Return width, height, fps, frame count and duration of a video"""
+    cap = cv2.VideoCapture(str(video_file))
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return {
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': fps,
+            'frame_count': frame_count,
+            'duration': frame_count / fps if fps else 0.0
+        }
+    finally:
+        cap.release()
+
+
+class FrameSampler:
+    """Yield (timestamp, frame) every `interval` seconds of a video
+
+    With the ffmpeg mode the decoder's fps filter drops unwanted frames and
+    crops/converts before anything reaches Python; frames arrive over a raw
+    pipe and are wrapped with np.frombuffer, no per-frame conversion. The
+    OpenCV mode seeks to each sample time instead (fallback when no ffmpeg is
+    available). The seek mode starts one short ffmpeg run per sample that
+    seeks to it, so a few samples spread over a long video don't cost a full
+    decode pass. crop is (x, y, width, height) in source pixels; gray frames
+    are 2-D uint8, colour frames BGR like cv2.
+    """
+
+    def __init__(self, video_file, interval, gray=False, crop=None, start=0.0, end=None, mode='auto'):
+        self.video_file = str(video_file)
+        self.interval = float(interval)
+        self.gray = gray
+        self.crop = tuple(int(v) for v in crop) if crop else None
+        self.start = float(start)
+        self.info = get_video_info(video_file)
+        self.end = min(end, self.info['duration']) if end is not None else self.info['duration']
+        if mode in ('auto', 'seek'):
+            try:
+                get_ffmpeg_exe()
+                mode = 'ffmpeg' if mode == 'auto' else 'seek'
+            except RuntimeError:
+                mode = 'opencv'
+        self.mode = mode
+        self.process = None
+
+    @property
+    def frame_size(self):
+        """(width, height) of the frames this sampler yields"""
+        if self.crop:
+            return self.crop[2], self.crop[3]
+        return self.info['width'], self.info['height']
+
+    @property
+    def expected_samples(self):
+        span = max(0.0, self.end - self.start)
+        return max(1, math.ceil(span / self.interval))
+
+    def __iter__(self):
+        if self.mode == 'ffmpeg':
+            return self.iter_ffmpeg()
+        if self.mode == 'seek':
+            return self.iter_seek()
+        return self.iter_opencv()
+
+    def output_filters(self, pix_fmt):
+        filters = []
+        if self.crop:
+            x, y, w, h = self.crop
+            filters.append(f"crop={w}:{h}:{x}:{y}")
+        filters.append(f"format={pix_fmt}")
+        return filters
+
+    def iter_ffmpeg(self):
+        width, height = self.frame_size
+        channels = 1 if self.gray else 3
+        pix_fmt = 'gray' if self.gray else 'bgr24'
+
+        filters = [f"fps=1/{self.interval}"] + self.output_filters(pix_fmt)
+
+        cmd = [get_ffmpeg_exe(), '-nostdin', '-hide_banner', '-loglevel', 'error']
+        if self.start > 0:
+            # Input seeking jumps to the nearest keyframe before start
+            cmd += ['-ss', str(self.start)]
+        cmd += ['-i', self.video_file, '-an', '-sn', '-dn']
+        if self.end < self.info['duration']:
+            cmd += ['-t', str(self.end - self.start)]
+        cmd += ['-vf', ','.join(filters), '-f', 'rawvideo', '-pix_fmt', pix_fmt, '-']
+
+        frame_bytes = width * height * channels
+        shape = (height, width) if self.gray else (height, width, 3)
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        bufsize=frame_bytes * 2)
+        try:
+            index = 0
+            while True:
+                buffer = bytearray(frame_bytes)
+                view = memoryview(buffer)
+                filled = 0
+                while filled < frame_bytes:
+                    read = self.process.stdout.readinto(view[filled:])
+                    if not read:
+                        break
+                    filled += read
+                if filled < frame_bytes:
+                    break
+                frame = np.frombuffer(buffer, dtype=np.uint8).reshape(shape)
+                yield self.start + index * self.interval, frame
+                index += 1
+        finally:
+            self.close()
+
+    def iter_seek(self):
+        width, height = self.frame_size
+        pix_fmt = 'gray' if self.gray else 'bgr24'
+        shape = (height, width) if self.gray else (height, width, 3)
+        frame_bytes = width * height * (1 if self.gray else 3)
+        timestamp = self.start
+        while timestamp < self.end:
+            # Input seeking decodes from the keyframe before timestamp, not from the start
+            cmd = [get_ffmpeg_exe(), '-nostdin', '-hide_banner', '-loglevel', 'error',
+                   '-ss', f'{timestamp:.3f}', '-i', self.video_file, '-an', '-sn', '-dn',
+                   '-frames:v', '1', '-vf', ','.join(self.output_filters(pix_fmt)),
+                   '-f', 'rawvideo', '-pix_fmt', pix_fmt, '-']
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            if len(result.stdout) < frame_bytes:
+                break
+            yield timestamp, np.frombuffer(result.stdout[:frame_bytes], dtype=np.uint8).reshape(shape)
+            timestamp += self.interval
+
+    def iter_opencv(self):
+        cap = cv2.VideoCapture(self.video_file)
+        try:
+            timestamp = self.start
+            while timestamp < self.end:
+                cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if self.crop:
+                    x, y, w, h = self.crop
+                    frame = frame[y:y + h, x:x + w]
+                if self.gray:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                yield timestamp, frame
+                timestamp += self.interval
+        finally:
+            cap.release()
+
+    def close(self):
+        """Stop the decoder early (e.g. when processing is cancelled)"""
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None